@@ -0,0 +1,63 @@
+"""
+Any-angle planning against octile A* on every dataset query: visibility graph
+queries, Theta* on the grid, and A*, with expansions, time per query and path
+length relative to A*. Each map is compiled and its visibility graph built
+before its queries are timed; the build time is reported per map.
+
+    python benchmarks/any_angle.py [--limit N]
+"""
+import argparse
+import time
+
+from common import load_environments, make_query
+
+from llmastar.env.search import cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.any_angle import AnyAngle
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of dataset maps')
+    args = parser.parse_args()
+
+    environments = load_environments()[:args.limit]
+    planner = AnyAngle()
+    modes = {
+        'A*': lambda query: AStar().searching(query, filepath=None, precompute_motions=True),
+        'visibility': lambda query: planner.searching(query, filepath=None),
+        'Theta*': lambda query: planner.searching(query, filepath=None, use_theta_star=True),
+    }
+    # name -> [expansions, seconds, sum of lengths]
+    totals = {name: [0, 0.0, 0.0] for name in modes}
+    build = 0.0
+    nodes = queries = 0
+    for environment in environments:
+        cache.compile_environment(environment).grid(motions=True)
+        t0 = time.perf_counter()
+        nodes += len(planner.visibility_graph(environment).nodes)
+        build += time.perf_counter() - t0
+        for sg in environment['start_goal']:
+            query = make_query(environment, sg)
+            results = {}
+            for name, solve in modes.items():
+                t0 = time.perf_counter()
+                results[name] = solve(query)
+                totals[name][1] += time.perf_counter() - t0
+            if any(result['status'] != 'found' for result in results.values()):
+                continue
+            queries += 1
+            for name, result in results.items():
+                totals[name][0] += result['operation']
+                totals[name][2] += result['length']
+
+    print(f"visibility graph: {nodes / len(environments):.1f} nodes, "
+          f"built in {build / len(environments) * 1e3:.2f} ms per map")
+    print(f"{'':>10} {'expansions':>11} {'us/query':>9} {'length':>7}")
+    for name, (expansions, elapsed, length) in totals.items():
+        print(f"{name:>10} {expansions / queries:11.1f} {elapsed / queries * 1e6:9.1f} "
+              f"{length / totals['A*'][2]:7.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Weighted and anytime (ARA*) A* on every dataset query: expansions, wall time,
+the actual length ratio to the optimum and the reported suboptimality bound,
+first for fixed weights, then for the anytime mode under expansion budgets.
+
+    python benchmarks/anytime.py
+"""
+import math
+import time
+
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+
+WEIGHTS = [1.0, 1.5, 2.0, 3.0]
+BUDGETS = [25, 50, 100, 200, None]
+
+
+def main():
+    queries = list(iter_queries())
+    planner = AStar()
+    optimum = [planner.searching(query, filepath=None, use_bidirectional=True)['length'] for _, query in queries]
+
+    def run(**options):
+        expansions = found = bounded = 0
+        ratio = bound = worst = 0.0
+        t0 = time.perf_counter()
+        for (_, query), best in zip(queries, optimum):
+            result = planner.searching(query, filepath=None, precompute_motions=True, **options)
+            expansions += result['operation']
+            if result['status'] == 'found':
+                found += 1
+                ratio += result['length'] / best if best else 1.0
+                if result['bound'] is not None and math.isfinite(result['bound']):
+                    bounded += 1
+                    bound += result['bound']
+                    worst = max(worst, result['length'] / best / result['bound'] if best else 1.0)
+        elapsed = time.perf_counter() - t0
+        n = len(queries)
+        return (f"{expansions / n:11.1f} {elapsed / n * 1e3:9.2f} {found / n:7.1%} "
+                f"{ratio / max(found, 1):7.4f} {bound / max(bounded, 1):7.4f} {worst:10.4f}")
+
+    header = f"{'expansions':>11} {'ms/query':>9} {'found':>7} {'ratio':>7} {'bound':>7} {'ratio/bound':>10}"
+    print(f"{'weight':>8} {header}")
+    for weight in WEIGHTS:
+        print(f"{weight:8.1f} {run(weight=weight)}")
+    print(f"\n{'budget':>8} {header}")
+    for budget in BUDGETS:
+        print(f"{str(budget):>8} {run(anytime=True, max_expansions=budget)}")
+    print(f"{len(queries)} queries; ratio is length / optimal length over found paths,"
+          f" ratio/bound is the worst case and never exceeds 1")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Per-environment evaluation time of AStar.searching_batch against one
+AStar.searching call per start/goal pair, over the whole dataset.
+The cold rows clear the environment cache before every query, which is
+what each call paid before compiled environments were cached.
+
+    python benchmarks/batch.py
+"""
+import time
+
+from common import load_environments
+
+from llmastar.env.search import environment_cache
+from llmastar.pather.a_star.a_star import AStar
+
+
+def cold(search):
+    environment_cache.clear()
+    return search()
+
+
+def main():
+    environments = load_environments()
+    modes = {
+        'searching (cold)': lambda e: [cold(lambda: AStar().searching({**e, 'start': sg[0], 'goal': sg[1]},
+                                                                     filepath=None))
+                                       for sg in e['start_goal']],
+        'searching (tables, cold)': lambda e: [cold(lambda: AStar().searching({**e, 'start': sg[0], 'goal': sg[1]},
+                                                                              filepath=None, precompute_motions=True))
+                                               for sg in e['start_goal']],
+        'searching': lambda e: [AStar().searching({**e, 'start': sg[0], 'goal': sg[1]}, filepath=None)
+                                for sg in e['start_goal']],
+        'searching (tables)': lambda e: [AStar().searching({**e, 'start': sg[0], 'goal': sg[1]},
+                                                           filepath=None, precompute_motions=True)
+                                         for sg in e['start_goal']],
+        'searching_batch': lambda e: AStar().searching_batch(e, e['start_goal']),
+        'searching_batch (no tables)': lambda e: AStar().searching_batch(e, e['start_goal'],
+                                                                         precompute_motions=False),
+    }
+    reference = None
+    for name, run in modes.items():
+        t0 = time.perf_counter()
+        results = [run(e) for e in environments]
+        elapsed = time.perf_counter() - t0
+        if reference is None:
+            reference = results
+        same = sum(r == q for rs, qs in zip(results, reference) for r, q in zip(rs, qs))
+        print(f"{name:>27}: {elapsed / len(environments) * 1e3:7.2f} ms/environment  "
+              f"(identical results {same}/{sum(len(e['start_goal']) for e in environments)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Node expansions and path length of bidirectional A* against unidirectional A*
+on every dataset query. Unidirectional A* is run both with its default heuristic
+and with the Euclidean heuristic the bidirectional search uses, which gives the
+optimal length to check against.
+
+    python benchmarks/bidirectional.py
+"""
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+
+
+class EuclideanAStar(AStar):
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
+
+
+def main():
+    totals = {'default': 0, 'euclidean': 0, 'bidirectional': 0}
+    fewer = more = suboptimal = queries = 0
+    for _, query in iter_queries():
+        default = AStar().searching(query, filepath=None)
+        euclidean = EuclideanAStar().searching(query, filepath=None)
+        bidirectional = AStar().searching(query, filepath=None, use_bidirectional=True)
+        totals['default'] += default['operation']
+        totals['euclidean'] += euclidean['operation']
+        totals['bidirectional'] += bidirectional['operation']
+        fewer += bidirectional['operation'] < euclidean['operation']
+        more += bidirectional['operation'] > euclidean['operation']
+        suboptimal += bidirectional['length'] > euclidean['length'] + 1e-9
+        queries += 1
+
+    for name, total in totals.items():
+        print(f"{name:>14}: {total / queries:8.1f} expansions/query")
+    print(f"bidirectional expands fewer nodes than Euclidean A* on {fewer}/{queries} queries, more on {more}")
+    print(f"bidirectional paths longer than the optimum: {suboptimal}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Checks SegmentCollider against the shapely based is_lines_collision on every
+unit move of every map in the dataset (plus the start-goal segments), and
+reports the speedup of each kernel.
+
+    python benchmarks/collision.py [--limit N]
+"""
+import argparse
+import time
+
+from common import load_environments
+
+from llmastar.env.search import env
+from llmastar.utils import SegmentCollider, is_lines_collision
+
+
+def shapely_collision(line1, horizontal_barriers, vertical_barriers, range_x, range_y):
+    """The shapely test AStar.is_collision used before SegmentCollider."""
+    for horizontal in horizontal_barriers:
+        if is_lines_collision(line1, [[horizontal[1], horizontal[0]], [horizontal[2], horizontal[0]]]):
+            return True
+    for vertical in vertical_barriers:
+        if is_lines_collision(line1, [[vertical[0], vertical[1]], [vertical[0], vertical[2]]]):
+            return True
+    for x in range_x:
+        if is_lines_collision(line1, [[x, range_y[0]], [x, range_y[1]]]):
+            return True
+    for y in range_y:
+        if is_lines_collision(line1, [[range_x[0], y], [range_x[1], y]]):
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of environments to check')
+    args = parser.parse_args()
+
+    motions = env.Env(3, 3, [], []).motions
+    checked = mismatches = 0
+    t_shapely = t_scalar = t_vector = 0.0
+    environments = load_environments()[:args.limit]
+    for environment in environments:
+        horizontal, vertical = environment['horizontal_barriers'], environment['vertical_barriers']
+        # the planners test against the border after shrinking the ranges by one
+        range_x = [environment['range_x'][0], environment['range_x'][1] - 1]
+        range_y = [environment['range_y'][0], environment['range_y'][1] - 1]
+        collider = SegmentCollider(horizontal, vertical, range_x, range_y)
+        moves = {}
+        for x in range(range_x[0], range_x[1] + 1):
+            for y in range(range_y[0], range_y[1] + 1):
+                moves[(x, y)] = [(x + u[0], y + u[1]) for u in motions]
+        segments = [(s, e) for s, ends in moves.items() for e in ends]
+        segments += [(tuple(sg[0]), tuple(sg[1])) for sg in environment['start_goal']]
+
+        t0 = time.perf_counter()
+        expected = [shapely_collision([s, e], horizontal, vertical, range_x, range_y) for s, e in segments]
+        t1 = time.perf_counter()
+        scalar = [collider.is_collision(s, e) for s, e in segments]
+        t2 = time.perf_counter()
+        vector = []
+        for s, ends in moves.items():
+            vector.extend(collider.collisions(s, ends).tolist())
+        t3 = time.perf_counter()
+        vector += [bool(collider.collisions(s, [e])[0]) for s, e in segments[len(vector):]]
+
+        checked += len(segments)
+        mismatches += sum(a != b or a != c for a, b, c in zip(expected, scalar, vector))
+        t_shapely, t_scalar, t_vector = t_shapely + t1 - t0, t_scalar + t2 - t1, t_vector + t3 - t2
+
+    print(f"environments: {len(environments)}  segments: {checked}  mismatches: {mismatches}")
+    print(f"shapely : {t_shapely / checked * 1e6:8.2f} us/segment")
+    print(f"scalar  : {t_scalar / checked * 1e6:8.2f} us/segment  ({t_shapely / t_scalar:.0f}x)")
+    print(f"numpy   : {t_vector / checked * 1e6:8.2f} us/segment  ({t_shapely / t_vector:.0f}x, batched per cell)")
+
+
+if __name__ == '__main__':
+    main()
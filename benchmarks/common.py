@@ -0,0 +1,54 @@
+import json
+import random
+import sys
+import time
+
+sys.path.append('.')
+
+DATASET = 'dataset/environment_50_30.json'
+
+
+def load_environments(filepath=DATASET):
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def make_query(environment, sg):
+    """Build a searching() query from a dataset environment and one of its start_goal entries."""
+    return {"start": sg[0], "goal": sg[1],
+            "range_x": environment['range_x'], "range_y": environment['range_y'],
+            "horizontal_barriers": environment['horizontal_barriers'],
+            "vertical_barriers": environment['vertical_barriers']}
+
+
+def iter_queries(filepath=DATASET, limit=None):
+    environments = load_environments(filepath)
+    if limit is not None:
+        environments = environments[:limit]
+    for environment in environments:
+        for sg in environment['start_goal']:
+            yield environment['id'], make_query(environment, sg)
+
+
+def random_barriers(x_range, y_range, count, seed=0):
+    """Random horizontal/vertical barriers in the dataset format, split evenly between the two kinds."""
+    rng = random.Random(seed)
+    horizontal, vertical = [], []
+    for i in range(count):
+        if i % 2 == 0:
+            x_start = rng.randrange(1, x_range - 1)
+            horizontal.append([rng.randrange(1, y_range - 1), x_start, min(x_range - 1, x_start + rng.randrange(1, 6))])
+        else:
+            y_start = rng.randrange(1, y_range - 1)
+            vertical.append([rng.randrange(1, x_range - 1), y_start, min(y_range - 1, y_start + rng.randrange(1, 6))])
+    return horizontal, vertical
+
+
+def timeit(fn, repeat=5):
+    """Best-of-`repeat` wall time of fn() in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -0,0 +1,86 @@
+"""
+Repair cost of D* Lite against a full A* re-search when barriers change. On every
+dataset map the first query is planned once, then barriers are added or removed
+CHANGES times while the start moves along the path; each change is answered by
+DStarLite.update_barriers() and by a fresh Euclidean A* search, which also checks
+that the repaired path is optimal. Maps are compiled before timing, so both times
+are search only.
+
+    python benchmarks/d_star_lite.py
+"""
+import random
+import time
+
+from common import load_environments, make_query, random_barriers
+
+from llmastar.env.search import cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.d_star_lite import DStarLite
+
+CHANGES = 8
+
+
+class EuclideanAStar(AStar):
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
+
+
+def solve(fn):
+    """Result and wall time of fn(), None for an unreachable goal."""
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    if result['status'] != 'found':
+        result = None
+    return result, elapsed
+
+
+def main():
+    rng = random.Random(0)
+    totals = {'D* Lite': [0, 0.0], 'A*': [0, 0.0]}
+    changes = mismatches = 0
+    for environment in load_environments():
+        query = make_query(environment, environment['start_goal'][0])
+        planner = DStarLite()
+        path = planner.searching(query, filepath=None)['path']
+        horizontal = list(query['horizontal_barriers'])
+        vertical = list(query['vertical_barriers'])
+        for _ in range(CHANGES):
+            if rng.random() < 0.5 or not horizontal or not vertical:
+                added_h, added_v = random_barriers(query['range_x'][1], query['range_y'][1], 2,
+                                                   seed=rng.randrange(2 ** 32))
+                horizontal, vertical = horizontal + added_h, vertical + added_v
+            else:
+                horizontal = horizontal[:]
+                vertical = vertical[:]
+                horizontal.pop(rng.randrange(len(horizontal)))
+                vertical.pop(rng.randrange(len(vertical)))
+            start = path[min(2, len(path) - 1)] if rng.random() < 0.5 else path[0]
+            changed = dict(query, start=list(start), horizontal_barriers=horizontal, vertical_barriers=vertical)
+            cache.compile_environment(changed).grid(motions=True)
+
+            repaired, elapsed = solve(lambda: planner.update_barriers(horizontal, vertical, start=start,
+                                                                      filepath=None))
+            totals['D* Lite'][1] += elapsed
+            full, elapsed = solve(lambda: EuclideanAStar().searching(changed, filepath=None))
+            totals['A*'][1] += elapsed
+            changes += 1
+            if (repaired is None) != (full is None):
+                mismatches += 1
+                continue
+            if repaired is None:
+                path = [start]
+                continue
+            totals['D* Lite'][0] += repaired['operation']
+            totals['A*'][0] += full['operation']
+            mismatches += abs(repaired['length'] - full['length']) > 1e-9
+            path = repaired['path']
+
+    print(f"{'':>8} {'expansions':>11} {'ms/change':>10}")
+    for name, (expansions, elapsed) in totals.items():
+        print(f"{name:>8} {expansions / changes:11.1f} {elapsed / changes * 1e3:10.2f}")
+    print(f"changes with a different result than the full re-search: {mismatches}/{changes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Many starts towards one goal per dataset map: A* from scratch for every start
+against one cached DistanceField answering them all by descent.
+
+    python benchmarks/distance_field.py [--starts N]
+"""
+import argparse
+import random
+import time
+
+from common import load_environments, make_query
+
+from llmastar.env.search import environment_cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.distance_field import DistanceField
+
+
+class EuclideanAStar(AStar):
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--starts', type=int, default=50, help='starts per map')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    t_astar = t_field = t_build = 0.0
+    queries = mismatches = 0
+    planner = DistanceField()
+    for environment in load_environments():
+        goal = environment['start_goal'][0][1]
+        grid = environment_cache.get(environment).grid(motions=True)
+        free = [(x, y) for x in range(grid.x_range) for y in range(grid.y_range) if grid.passable[x, y]]
+        starts = rng.sample(free, min(args.starts, len(free)))
+        field, _ = DistanceField().field(make_query(environment, [starts[0], goal]))
+        starts = [s for s in starts if field[s] < float('inf')]
+
+        t0 = time.perf_counter()
+        planner.field(make_query(environment, [starts[0], goal]))
+        t_build += time.perf_counter() - t0
+        for start in starts:
+            query = make_query(environment, [list(start), goal])
+            t0 = time.perf_counter()
+            a = EuclideanAStar().searching(query, filepath=None)
+            t1 = time.perf_counter()
+            b = planner.searching(query, filepath=None)
+            t2 = time.perf_counter()
+            t_astar, t_field = t_astar + t1 - t0, t_field + t2 - t1
+            mismatches += abs(a['length'] - b['length']) > 1e-9
+            queries += 1
+
+    print(f"queries: {queries}  length mismatches against A*: {mismatches}")
+    print(f"A* per query          : {t_astar / queries * 1e3:7.3f} ms")
+    print(f"field build per goal  : {t_build / len(load_environments()) * 1e3:7.3f} ms")
+    print(f"field query (cached)  : {t_field / queries * 1e3:7.3f} ms")
+    print(f"cached fields: {len(planner._fields)}  ({planner.nbytes / 2 ** 20:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Expansions, wall time and path length of AStar for every registered heuristic on
+the dataset queries, against the optimal length; motion tables are compiled
+beforehand. The waypoint row guides the octile distance through every 10th cell
+of the optimal path, as a stand-in for well placed LLM waypoints.
+
+    python benchmarks/heuristics.py [--limit N]
+"""
+import argparse
+import time
+
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.heuristics import HEURISTICS, WaypointHeuristic, is_admissible
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of dataset maps')
+    args = parser.parse_args()
+
+    heuristics = [(name, name) for name in HEURISTICS]
+    heuristics.append(('waypoints', None))
+    # name -> [expansions, seconds, sum of length ratios, worst length ratio]
+    totals = {name: [0, 0.0, 0.0, 0.0] for name, _ in heuristics}
+    queries = 0
+    # every heuristic on a query before the next, so that its map stays in the environment cache
+    for _, query in iter_queries(limit=args.limit):
+        planner = AStar()
+        result = planner.searching(query, filepath=None, precompute_motions=True)
+        if result['status'] != 'found':
+            continue
+        optimum = result['length']
+        waypoints = planner.extract_path(planner.PARENT)[10:-1:10]
+        queries += 1
+        for name, heuristic in heuristics:
+            h = heuristic if heuristic is not None else WaypointHeuristic(waypoints, base='octile')
+            t0 = time.perf_counter()
+            result = AStar().searching(query, filepath=None, precompute_motions=True, heuristic=h)
+            total = totals[name]
+            total[1] += time.perf_counter() - t0
+            total[0] += result['operation']
+            ratio = result['length'] / optimum if optimum else 1
+            total[2] += ratio
+            total[3] = max(total[3], ratio)
+
+    print(f"{'heuristic':>18} {'admissible':>10} {'expansions':>11} {'ms':>7} {'length':>7} {'worst':>7}")
+    for name, heuristic in heuristics:
+        expansions, elapsed, ratio, worst = totals[name]
+        admissible = is_admissible(heuristic) if heuristic is not None else False
+        print(f"{name:>18} {str(admissible):>10} {expansions / queries:11.1f} "
+              f"{elapsed / queries * 1e3:7.3f} {ratio / queries:7.4f} {worst:7.4f}")
+
+if __name__ == '__main__':
+    main()
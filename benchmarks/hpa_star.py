@@ -0,0 +1,71 @@
+"""
+HPA* against A* on growing random maps. For each size the map is compiled first
+(shared by both, not timed), then the abstract graph is built, and the same random
+start/goal pairs are answered by Euclidean A* and by HPAStar, once while clusters
+are still searched on first use and once more with all of them cached. Lengths are
+reported as the ratio to the optimal A* length.
+
+    python benchmarks/hpa_star.py [--sizes 250,500,1000] [--queries N] [--cluster-size C]
+"""
+import argparse
+import random
+import time
+
+from common import random_barriers
+
+from llmastar.env.search import cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.hpa_star import HPAStar
+
+
+class EuclideanAStar(AStar):
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='250,500,1000', help='comma separated map sizes')
+    parser.add_argument('--queries', type=int, default=20, help='start/goal pairs per map')
+    parser.add_argument('--cluster-size', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'size':>5} {'build ms':>9} {'A* exp':>8} {'A* ms':>8} {'HPA* exp':>9} "
+          f"{'cold ms':>8} {'warm ms':>8} {'length':>7}")
+    for size in map(int, args.sizes.split(',')):
+        horizontal, vertical = random_barriers(size, size, size * size // 5000, seed=size)
+        environment = {"range_x": [0, size + 1], "range_y": [0, size + 1],
+                       "horizontal_barriers": horizontal, "vertical_barriers": vertical}
+        grid = cache.compile_environment(environment).grid(motions=True)
+        planner = HPAStar(cluster_size=args.cluster_size)
+        t0 = time.perf_counter()
+        planner.abstraction(environment)
+        t_build = time.perf_counter() - t0
+
+        free = [(x, y) for x in range(grid.x_range) for y in range(grid.y_range) if grid.passable[x, y]]
+        queries = []
+        while len(queries) < args.queries:
+            start, goal = rng.sample(free, 2)
+            query = dict(environment, start=list(start), goal=list(goal))
+            t0 = time.perf_counter()
+            optimum = EuclideanAStar().searching(query, filepath=None)
+            if optimum['status'] == 'found':
+                queries.append((query, optimum, time.perf_counter() - t0))
+
+        timings = []
+        for _ in range(2):
+            t0 = time.perf_counter()
+            results = [planner.searching(query, filepath=None) for query, _, _ in queries]
+            timings.append((time.perf_counter() - t0) / len(queries))
+        assert all(result['status'] == 'found' for result in results)
+        ratio = sum(result['length'] / optimum['length'] for result, (_, optimum, _) in zip(results, queries))
+        print(f"{size:>5} {t_build * 1e3:9.1f} "
+              f"{sum(optimum['operation'] for _, optimum, _ in queries) / len(queries):8.0f} "
+              f"{sum(elapsed for _, _, elapsed in queries) / len(queries) * 1e3:8.2f} "
+              f"{sum(result['operation'] for result in results) / len(results):9.0f} "
+              f"{timings[0] * 1e3:8.2f} {timings[1] * 1e3:8.2f} {ratio / len(results):7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Jump point search against plain A* on every dataset query: heap operations,
+expansions, wall time, and a check that both return paths of the same length.
+Both run with the Euclidean heuristic so that A* returns optimal lengths.
+
+    python benchmarks/jps.py
+"""
+import heapq
+import time
+
+from common import iter_queries
+
+from llmastar.pather.a_star import a_star
+
+
+class EuclideanAStar(a_star.AStar):
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
+
+
+class CountingHeap:
+    """Stand-in for the heapq module that counts pushes and pops."""
+    def __init__(self):
+        self.operations = 0
+
+    def heappush(self, heap, item):
+        self.operations += 1
+        heapq.heappush(heap, item)
+
+    def heappop(self, heap):
+        self.operations += 1
+        return heapq.heappop(heap)
+
+
+def main():
+    counter = CountingHeap()
+    a_star.heapq = counter
+    totals = {False: [0, 0, 0.0], True: [0, 0, 0.0]}
+    mismatches = queries = 0
+    for _, query in iter_queries():
+        lengths = []
+        for use_jps in (False, True):
+            counter.operations = 0
+            t0 = time.perf_counter()
+            result = EuclideanAStar().searching(query, filepath=None,
+                                                precompute_motions=True, use_jps=use_jps)
+            totals[use_jps][2] += time.perf_counter() - t0
+            totals[use_jps][0] += counter.operations
+            totals[use_jps][1] += result['operation']
+            lengths.append(result['length'])
+        mismatches += abs(lengths[0] - lengths[1]) > 1e-9
+        queries += 1
+    a_star.heapq = heapq
+
+    print(f"{'':>6} {'heap ops':>10} {'expansions':>11} {'ms/query':>9}")
+    for use_jps, name in ((False, 'A*'), (True, 'JPS')):
+        ops, expansions, elapsed = totals[use_jps]
+        print(f"{name:>6} {ops / queries:10.1f} {expansions / queries:11.1f} {elapsed / queries * 1e3:9.2f}")
+    print(f"queries with a different path length: {mismatches}/{queries}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+ALT landmark heuristics against plain octile A* on every query of a dataset:
+expansions saved per query, search time, and the one-off cost of building the
+landmark tables of each map, for several numbers K of landmarks. Lengths are
+checked to stay optimal.
+
+    python benchmarks/landmarks.py [--k 1,2,4,8,16] [--filepath dataset/environment_50_30.json]
+"""
+import argparse
+import time
+
+from common import DATASET, load_environments, make_query
+
+from llmastar.env.search import cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.a_star.landmarks import get_landmarks
+
+
+def run(environment, landmarks):
+    """Expansions, search seconds and lengths of the reachable queries of a map, compiled beforehand."""
+    expansions, elapsed, lengths = 0, 0.0, []
+    for sg in environment['start_goal']:
+        query = make_query(environment, sg)
+        t0 = time.perf_counter()
+        result = AStar().searching(query, filepath=None, precompute_motions=True, landmarks=landmarks)
+        if result['status'] != 'found':
+            continue
+        elapsed += time.perf_counter() - t0
+        expansions += result['operation']
+        lengths.append(result['length'])
+    return expansions, elapsed, lengths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--k', default='1,2,4,8,16', help='comma separated numbers of landmarks')
+    parser.add_argument('--filepath', default=DATASET)
+    args = parser.parse_args()
+
+    ks = [None] + [int(k) for k in args.k.split(',')]
+    # K -> [expansions, search seconds, build seconds]
+    totals = {k: [0, 0.0, 0.0] for k in ks}
+    queries = 0
+    environments = load_environments(args.filepath)
+    # one map at a time, so that its compiled form and tables stay in the caches while it is timed
+    for environment in environments:
+        compiled = cache.compile_environment(environment)
+        compiled.grid(motions=True)
+        optimum = None
+        for k in ks:
+            if k is not None:
+                t0 = time.perf_counter()
+                get_landmarks(compiled, k)
+                totals[k][2] += time.perf_counter() - t0
+            expansions, elapsed, lengths = run(environment, k)
+            if optimum is None:
+                optimum = lengths
+                queries += len(lengths)
+            assert all(abs(a - b) < 1e-9 for a, b in zip(lengths, optimum))
+            totals[k][0] += expansions
+            totals[k][1] += elapsed
+
+    base, base_time, _ = totals[None]
+    print(f"{'K':>4} {'expansions':>11} {'saved':>7} {'search ms':>10} {'build ms/map':>13} {'break-even':>11}")
+    print(f"{'-':>4} {base / queries:11.1f} {'':>7} {base_time / queries * 1e3:10.3f}")
+    for k in ks[1:]:
+        expansions, elapsed, build = totals[k]
+        # queries per map after which the tables have paid for themselves
+        saved = (base_time - elapsed) / queries
+        break_even = f"{build / len(environments) / saved:11.1f}" if saved > 0 else f"{'never':>11}"
+        print(f"{k:>4} {expansions / queries:11.1f} {1 - expansions / base:7.1%} {elapsed / queries * 1e3:10.3f} "
+              f"{build / len(environments) * 1e3:13.2f} {break_even}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput of a local model answering LLM-A* prompts one at a time against
+MicroBatcher, which gathers the prompts of concurrent callers into one padded
+generate call. The prompts are those of the dataset queries; --concurrency
+callers ask at once, each batch holding at most that many prompts. By default
+the model is the CPU-only MyMistral.tiny, whose answers are noise but whose
+generation runs the real padding and batching path; --model mistral or llama
+loads the real weights. Reports prompts/s, mean batch size and mean latency.
+Every prompt is batched here whatever --max-new-tokens; MicroBatcher's default
+min_new_tokens comes from where this benchmark stops losing on the tiny model.
+
+    python benchmarks/llm_batching.py [--model tiny] [--prompts 32] [--concurrency 4,8,16]
+                                      [--max-wait 0.01] [--max-new-tokens 100]
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import iter_queries
+
+from llmastar.model import MicroBatcher
+from llmastar.pather.llm_a_star import LLMAStar
+
+
+def load(name):
+    # no response cache, every prompt reaches the model
+    if name == 'tiny':
+        from llmastar.model.my_mistral import MyMistral
+        return MyMistral.tiny()
+    if name == 'mistral':
+        from llmastar.model.my_mistral import MyMistral
+        return MyMistral(cache=False)
+    from llmastar.model import Llama3
+    return Llama3(cache=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='tiny', choices=['tiny', 'mistral', 'llama'])
+    parser.add_argument('--prompts', type=int, default=32, help='number of dataset queries asked')
+    parser.add_argument('--concurrency', default='4,8,16', help='comma separated numbers of concurrent callers')
+    parser.add_argument('--max-wait', type=float, default=0.01, help='seconds a batch waits for more prompts')
+    parser.add_argument('--max-new-tokens', type=int, default=100)
+    args = parser.parse_args()
+
+    model = load(args.model)
+    planner = LLMAStar(llm=model)
+    prompts = [planner.llm_prompt(query) for _, query in itertools.islice(iter_queries(), args.prompts)]
+    params = {'max_new_tokens': args.max_new_tokens}
+
+    print(f"{len(prompts)} prompts, {args.max_new_tokens} new tokens, {args.model} model")
+    print(f"{'callers':>7} {'prompts/s':>10} {'batch':>6} {'latency ms':>11}")
+    t0 = time.perf_counter()
+    for prompt in prompts:
+        model.ask(prompt, **params)
+    elapsed = time.perf_counter() - t0
+    print(f"{'single':>7} {len(prompts) / elapsed:10.2f} {1:6.1f} {elapsed / len(prompts) * 1e3:11.1f}")
+    for concurrency in [int(n) for n in args.concurrency.split(',')]:
+        batcher = MicroBatcher(model, max_batch=concurrency, max_wait=args.max_wait, min_new_tokens=0)
+        model.reset_usage()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda prompt: batcher.ask(prompt, **params), prompts))
+        elapsed = time.perf_counter() - t0
+        usage = model.usage()
+        print(f"{concurrency:>7} {len(prompts) / elapsed:10.2f} {usage['prompts'] / usage['calls']:6.1f} "
+              f"{batcher.usage()['seconds'] / len(prompts) * 1e3:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Node expansion of LLMAStar on every dataset query: the single pass over the
+successors of a cell, pushing improved neighbours straight onto OPEN, against
+the former loop that started a thread per push. No model is called, the LLM
+suggests no waypoints, so both searches expand the same cells and their results
+are checked to match.
+
+    python benchmarks/llm_expansion.py [--limit N]
+"""
+import argparse
+import heapq
+import math
+import threading
+import time
+
+from common import iter_queries
+
+from llmastar.pather.llm_a_star.llm_a_star import LLMAStar
+
+
+class OfflineLLMAStar(LLMAStar):
+    """LLMAStar without a model, whose waypoints are only the start and the goal."""
+    def __init__(self):
+        self.llm = None
+        self.prompt = 'standard'
+        self.jps = None
+
+    def _initialize_llm_paths(self, response=None):
+        self.target_list = [self.s_start, self.s_goal]
+
+
+class ThreadedLLMAStar(OfflineLLMAStar):
+    """The former expansion: one thread per improved neighbour, each running a single heappush."""
+    def _expand(self, s):
+        threads = []
+        for s_n, step in self._successors(s):
+            if s_n in self.CLOSED and not self.use_jps:
+                continue
+            new_cost = self.g[s] + step
+            if s_n not in self.g:
+                self.g[s_n] = math.inf
+            if new_cost < self.g[s_n]:
+                self.CLOSED.discard(s_n)
+                self.g[s_n] = new_cost
+                self.PARENT[s_n] = s
+                thread = threading.Thread(target=self._update_queue, args=(s_n,))
+                threads.append(thread)
+                thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _update_queue(self, s_n):
+        heapq.heappush(self.OPEN, (self.f_value(s_n), s_n))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of dataset maps')
+    args = parser.parse_args()
+
+    queries = [query for _, query in iter_queries(limit=args.limit)]
+    print(f"{'motions':>8} {'expansions':>11} {'threads ms':>11} {'single ms':>10} {'speedup':>8}")
+    for precompute_motions in (False, True):
+        elapsed, results = {}, {}
+        for planner in (ThreadedLLMAStar(), OfflineLLMAStar()):
+            t0 = time.perf_counter()
+            results[type(planner)] = [planner.searching(query, filepath=None, precompute_motions=precompute_motions)
+                                      for query in queries]
+            elapsed[type(planner)] = (time.perf_counter() - t0) / len(queries)
+        assert results[ThreadedLLMAStar] == results[OfflineLLMAStar]
+        expansions = sum(result['operation'] for result in results[OfflineLLMAStar]) / len(queries)
+        threaded, single = elapsed[ThreadedLLMAStar], elapsed[OfflineLLMAStar]
+        print(f"{'table' if precompute_motions else 'kernel':>8} {expansions:11.1f} {threaded * 1e3:11.2f} "
+              f"{single * 1e3:10.2f} {threaded / single:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Dataset evaluation of LLM-A* through LLMPipeline against the serial loop that
+asks the model, waits, then searches, one query after the other. The model is
+model.StandIn, which answers with waypoints around the barriers after a fixed
+latency, so the numbers show how much of the model latency the pipeline hides;
+its usage gives the calls, tokens and mean latency of each run.
+
+    python benchmarks/llm_pipeline.py [--limit N] [--latency 0.2] [--in-flight 1,8,32] [--workers 1] [--processes]
+"""
+import argparse
+import time
+
+from common import iter_queries
+
+from llmastar.model import StandIn
+from llmastar.pather.llm_a_star import LLMAStar, LLMPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=10, help='number of dataset maps')
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per model answer')
+    parser.add_argument('--in-flight', default='1,8,32', help='comma separated numbers of concurrent requests')
+    parser.add_argument('--workers', type=int, default=1, help='search workers')
+    parser.add_argument('--processes', action='store_true', help='search in worker processes instead of threads')
+    args = parser.parse_args()
+
+    queries = [query for _, query in iter_queries(limit=args.limit)]
+    model = StandIn(latency=args.latency)
+    planner = LLMAStar(llm=model)
+
+    t0 = time.perf_counter()
+    serial = [planner.searching(query, filepath=None, precompute_motions=True) for query in queries]
+    elapsed = time.perf_counter() - t0
+    print(f"{len(queries)} queries, {args.latency * 1e3:.0f} ms per answer")
+    print(f"{'in flight':>9} {'s':>7} {'queries/s':>10} {'calls':>6} {'tokens in':>10} {'tokens out':>11} "
+          f"{'latency ms':>11}")
+    report('serial', elapsed, len(queries), model.usage())
+    for in_flight in [int(n) for n in args.in_flight.split(',')]:
+        pipeline = LLMPipeline(planner, max_in_flight=in_flight, workers=args.workers, processes=args.processes)
+        model.reset_usage()
+        t0 = time.perf_counter()
+        results = pipeline.evaluate(queries, precompute_motions=True)
+        elapsed = time.perf_counter() - t0
+        assert results == serial
+        report(in_flight, elapsed, len(queries), model.usage())
+
+
+def report(name, elapsed, queries, usage):
+    print(f"{name:>9} {elapsed:7.2f} {queries / elapsed:10.1f} {usage['calls']:6d} {usage['prompt_tokens']:10d} "
+          f"{usage['completion_tokens']:11d} {usage['seconds'] / usage['calls'] * 1e3:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
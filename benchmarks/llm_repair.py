@@ -0,0 +1,79 @@
+"""
+LLMAStar with the waypoint repair stage against the old filter that dropped
+every waypoint on an obstacle or near the border. No model is called: the
+answer stands in for a slightly-off LLM, the start, every --every-th cell of
+the optimal path moved by up to --noise cells at random, and the goal, so some
+waypoints land on barriers or outside the map.
+Reports expansions, time per query, length ratio to the optimum and how many
+waypoints were repaired or dropped.
+Repair keeps the waypoints the filter drops, which only pays off while they are
+close to the optimal path: on the 1000 dataset queries it saved 3% of the
+expansions at noise 1, broke even at 2 and cost 2% at 4 and 7% at 8.
+
+    python benchmarks/llm_repair.py [--limit N] [--every 10] [--noise 1,2,4] [--seed 0]
+"""
+import argparse
+import random
+import time
+
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.llm_a_star import LLMAStar
+
+
+class FilteringLLMAStar(LLMAStar):
+    """LLMAStar before the repair stage: invalid waypoints are dropped."""
+    def _repair_waypoints(self, nodes):
+        valid = [(node[0], node[1]) for node in nodes
+                 if (node[0], node[1]) not in self.obs
+                 and self.range_x[0] + 1 < node[0] < self.range_x[1] - 1
+                 and self.range_y[0] + 1 < node[1] < self.range_y[1] - 1]
+        self.llm_dropped = len(nodes) - len(valid)
+        return valid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of dataset maps')
+    parser.add_argument('--every', type=int, default=10, help='spacing of the waypoints on the optimal path')
+    parser.add_argument('--noise', default='1,2,4', help='comma separated largest offsets of a waypoint, in cells')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    optima = []
+    for _, query in iter_queries(limit=args.limit):
+        optimum = AStar().searching(query, filepath=None, precompute_motions=True)
+        if optimum['status'] == 'found':
+            optima.append((query, optimum))
+
+    planners = {'filter': FilteringLLMAStar(llm=None), 'repair': LLMAStar(llm=None)}
+    print(f"{len(optima)} queries, a waypoint every {args.every} cells")
+    print(f"{'noise':>5} {'':>6} {'expansions':>11} {'ms':>7} {'length':>7} {'waypoints':>10} "
+          f"{'repaired':>9} {'dropped':>8}")
+    for noise in [int(noise) for noise in args.noise.split(',')]:
+        rng = random.Random(args.seed)
+        responses = []
+        for query, optimum in optima:
+            path = optimum['path']
+            waypoints = [[x + rng.randint(-noise, noise), y + rng.randint(-noise, noise)]
+                         for x, y in path[args.every:-1:args.every]]
+            responses.append(str([list(path[0])] + waypoints + [list(path[-1])]))
+        for name, planner in planners.items():
+            expansions, elapsed, ratio, waypoints, repaired, dropped = 0, 0.0, 0.0, 0, 0, 0
+            for (query, optimum), response in zip(optima, responses):
+                t0 = time.perf_counter()
+                result = planner.searching(query, filepath=None, precompute_motions=True, llm_response=response)
+                elapsed += time.perf_counter() - t0
+                expansions += result['operation']
+                ratio += result['length'] / optimum['length'] if optimum['length'] else 1
+                waypoints += response.count('[') - 3
+                repaired += result['llm_repaired']
+                dropped += result['llm_dropped']
+            n = len(optima)
+            print(f"{noise:>5} {name:>6} {expansions / n:11.1f} {elapsed / n * 1e3:7.3f} {ratio / n:7.4f} "
+                  f"{waypoints:>10} {repaired:>9} {dropped:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-query latency of LLM-A* waiting for the model before searching, against the
+speculative mode that searches at once and adopts the waypoints if they arrive
+in time. The model is model.StandIn, whose waypoints around the barriers come
+after a fixed latency. Reports mean, 95th percentile and worst latency,
+expansions, and how often the request was cancelled.
+
+    python benchmarks/llm_speculative.py [--limit N] [--latency 0,0.001,0.01,0.1]
+"""
+import argparse
+import time
+
+from common import iter_queries
+
+from llmastar.model import StandIn
+from llmastar.pather.llm_a_star import LLMAStar
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=10, help='number of dataset maps')
+    parser.add_argument('--latency', default='0,0.001,0.01,0.1', help='comma separated seconds per model answer')
+    args = parser.parse_args()
+
+    queries = [query for _, query in iter_queries(limit=args.limit)]
+
+    print(f"{'latency ms':>10} {'mode':>11} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7} {'expansions':>11} {'cancelled':>10}")
+    for latency in [float(latency) for latency in args.latency.split(',')]:
+        planner = LLMAStar(llm=StandIn(latency=latency))
+        for speculative in (False, True):
+            elapsed, expansions, cancelled = [], 0, 0
+            for query in queries:
+                t0 = time.perf_counter()
+                result = planner.searching(query, filepath=None, precompute_motions=True, speculative=speculative)
+                elapsed.append(time.perf_counter() - t0)
+                expansions += result['operation']
+                cancelled += result['llm_cancelled']
+            print(f"{latency * 1e3:10.1f} {'speculative' if speculative else 'serial':>11} "
+                  f"{sum(elapsed) / len(elapsed) * 1e3:8.2f} {percentile(elapsed, 0.95) * 1e3:7.2f} "
+                  f"{max(elapsed) * 1e3:7.2f} {expansions / len(queries):11.1f} {cancelled / len(queries):10.1%}")
+
+
+if __name__ == '__main__':
+    main()
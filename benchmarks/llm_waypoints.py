@@ -0,0 +1,74 @@
+"""
+LLMAStar guided by waypoints against plain A* on every dataset query. No model
+is called: the waypoints stand in for a good LLM answer, every --every-th cell
+of the optimal path, so the numbers show what the waypoint heuristic does when
+the suggestions are right. Reports expansions, time per query and length ratio
+to the optimum. --use-jps runs both searches as jump point searches.
+
+On the dataset the waypoints barely change the work: 223.7 to 225.3 expansions
+against 226.1 for A*, about 1%. Under JPS they cost expansions, 10.3 at every 5
+against 8.8, and stopping the jumps at the waypoints is what keeps it from the
+16.5 the chain took before it advanced under JPS.
+
+    python benchmarks/llm_waypoints.py [--limit N] [--every 5,10,20] [--use-jps]
+"""
+import argparse
+import time
+
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.llm_a_star.llm_a_star import LLMAStar
+
+
+class OracleLLMAStar(LLMAStar):
+    """LLMAStar without a model, whose waypoints are given before each search."""
+    def __init__(self):
+        self.llm = None
+        self.prompt = 'standard'
+        self.jps = None
+        self.waypoints = []
+
+    def _initialize_llm_paths(self, response=None):
+        self.target_list = [self.s_start] + self.waypoints + [self.s_goal]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of dataset maps')
+    parser.add_argument('--every', default='5,10,20', help='comma separated spacings of the waypoints')
+    parser.add_argument('--use-jps', action='store_true', help='jump point search for A* and LLMAStar')
+    args = parser.parse_args()
+
+    everies = [int(every) for every in args.every.split(',')]
+    # name -> [expansions, seconds, sum of length ratios]
+    totals = {name: [0, 0.0, 0.0] for name in ['A*'] + [f"every {every}" for every in everies]}
+    queries = 0
+    planner = OracleLLMAStar()
+    for _, query in iter_queries(limit=args.limit):
+        a_star = AStar()
+        t0 = time.perf_counter()
+        optimum = a_star.searching(query, filepath=None, precompute_motions=True, use_jps=args.use_jps)
+        elapsed = time.perf_counter() - t0
+        if optimum['status'] != 'found':
+            continue
+        queries += 1
+        totals['A*'][0] += optimum['operation']
+        totals['A*'][1] += elapsed
+        totals['A*'][2] += 1
+        for every in everies:
+            planner.waypoints = optimum['path'][every:-1:every]
+            t0 = time.perf_counter()
+            result = planner.searching(query, filepath=None, precompute_motions=True, use_jps=args.use_jps)
+            total = totals[f"every {every}"]
+            total[1] += time.perf_counter() - t0
+            total[0] += result['operation']
+            total[2] += result['length'] / optimum['length'] if optimum['length'] else 1
+
+    print(f"{'':>9} {'expansions':>11} {'ms':>7} {'length':>7}")
+    for name, (expansions, elapsed, ratio) in totals.items():
+        print(f"{name:>9} {expansions / queries:11.1f} {elapsed / queries * 1e3:7.3f} {ratio / queries:7.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Neighbour generation with the per-cell motion tables against get_neighbor + cost
+through the collision kernel, over every free cell of every dataset map.
+
+    python benchmarks/motions.py [--limit N]
+"""
+import argparse
+import math
+import time
+
+from common import load_environments
+
+from llmastar.env.search import env
+from llmastar.utils import SegmentCollider
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of environments')
+    args = parser.parse_args()
+
+    t_compile = t_kernel = t_table = 0.0
+    expansions = 0
+    for environment in load_environments()[:args.limit]:
+        range_x, range_y = environment['range_x'], environment['range_y']
+        horizontal, vertical = environment['horizontal_barriers'], environment['vertical_barriers']
+        Env = env.Env(range_x[1], range_y[1], horizontal, vertical)
+        t0 = time.perf_counter()
+        grid = Env.compile(motions=True)
+        t_compile += time.perf_counter() - t0
+        collider = SegmentCollider(horizontal, vertical, [range_x[0], range_x[1] - 1], [range_y[0], range_y[1] - 1])
+        cells = [(x, y) for x in range(range_x[1]) for y in range(range_y[1]) if grid.is_free((x, y))]
+
+        t0 = time.perf_counter()
+        for s in cells:
+            neighbors = [(s[0] + u[0], s[1] + u[1]) for u in Env.motions]
+            [(n, math.hypot(n[0] - s[0], n[1] - s[1])) for n in neighbors
+             if grid.is_free(n) and not collider.is_collision(s, n)]
+        t1 = time.perf_counter()
+        for s in cells:
+            grid.successors(s)
+        t2 = time.perf_counter()
+        # second pass is what every further start/goal pair on the map pays
+        for s in cells:
+            grid.successors(s)
+        t3 = time.perf_counter()
+        t_kernel += t1 - t0
+        t_table += t3 - t2
+        expansions += len(cells)
+
+    print(f"cells expanded: {expansions}")
+    print(f"compile (mask + cost table): {t_compile * 1e3:8.2f} ms total")
+    print(f"collision kernel : {t_kernel / expansions * 1e6:6.2f} us/expansion")
+    print(f"motion table     : {t_table / expansions * 1e6:6.2f} us/expansion")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Per-expansion cost of AStar.get_neighbor against the number of barriers,
+comparing the compiled occupancy grid with the former per-node barrier scan.
+
+    python benchmarks/occupancy.py
+"""
+from common import random_barriers, timeit
+
+from llmastar.env.search import env, compiled
+
+X_RANGE, Y_RANGE = 201, 201
+MOTIONS = env.Env(3, 3, [], []).motions
+
+
+def scan_is_valid(s, horizontal_barriers, vertical_barriers):
+    """The barrier scan AStar.is_valid used before the compiled map."""
+    if not (0 <= s[0] < X_RANGE - 1 and 0 <= s[1] < Y_RANGE - 1):
+        return False
+    for horizontal in horizontal_barriers:
+        if horizontal[0] <= s[1] <= horizontal[1] and s[0] == horizontal[2]:
+            return False
+    for vertical in vertical_barriers:
+        if vertical[0] <= s[0] <= vertical[1] and s[1] == vertical[2]:
+            return False
+    return True
+
+
+def main():
+    cells = [(x, y) for x in range(1, X_RANGE - 1, 4) for y in range(1, Y_RANGE - 1, 4)]
+    print(f"{'barriers':>8} {'scan us/exp':>12} {'grid us/exp':>12}")
+    for count in (2, 10, 50, 100, 200):
+        horizontal, vertical = random_barriers(X_RANGE, Y_RANGE, count)
+        grid = compiled.CompiledMap(env.Env(X_RANGE, Y_RANGE, horizontal, vertical))
+
+        def scan():
+            for s in cells:
+                [n for n in ((s[0] + u[0], s[1] + u[1]) for u in MOTIONS) if scan_is_valid(n, horizontal, vertical)]
+
+        def lookup():
+            for s in cells:
+                [n for n in ((s[0] + u[0], s[1] + u[1]) for u in MOTIONS) if grid.is_free(n)]
+
+        t_scan, t_grid = timeit(scan) / len(cells) * 1e6, timeit(lookup) / len(cells) * 1e6
+        print(f"{count:>8} {t_scan:>12.2f} {t_grid:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
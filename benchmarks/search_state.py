@@ -0,0 +1,54 @@
+"""
+Wall time and peak traced memory of AStar with the dict/tuple search state
+against the array-backed SearchState, on the dataset and on larger maps.
+
+    python benchmarks/search_state.py
+"""
+import time
+import tracemalloc
+
+from common import iter_queries
+
+from llmastar.pather.a_star.a_star import AStar
+
+
+def large_query(size):
+    """A size x size map whose goal sits behind a long wall, so the search has to flood most of it."""
+    return {"start": [size // 4, size // 2], "goal": [size - size // 4, size // 2],
+            "range_x": [0, size + 1], "range_y": [0, size + 1],
+            "horizontal_barriers": [[size // 4, size // 2, size - 2]],
+            "vertical_barriers": [[size // 2, 2, size], [size - size // 8, size // 4 + 1, size - 2]]}
+
+
+def run(queries, planner, **kwargs):
+    """Total wall time, and the largest tracemalloc peak of a single search."""
+    t0 = time.perf_counter()
+    results = [planner.searching(q, filepath=None, **kwargs) for q in queries]
+    elapsed = time.perf_counter() - t0
+    peak = 0
+    for query in queries:
+        tracemalloc.start()
+        planner.searching(query, filepath=None, **kwargs)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed, peak, results
+
+
+def report(name, queries):
+    planner = AStar()
+    t_dict, m_dict, r_dict = run(queries, AStar())
+    t_array, m_array, r_array = run(queries, planner, use_array_state=True)
+    assert r_dict == r_array
+    state = planner.state.nbytes() / 1024
+    print(f"{name:>14} {t_dict * 1e3:10.1f} {t_array * 1e3:10.1f} {m_dict / 1024:10.1f} {m_array / 1024:10.1f} {state:10.1f}")
+
+
+def main():
+    print(f"{'':>14} {'dict ms':>10} {'array ms':>10} {'dict KiB':>10} {'array KiB':>10} {'state KiB':>10}")
+    report('dataset', [q for _, q in iter_queries()])
+    for size in (100, 250, 500):
+        report(f'{size}x{size}', [large_query(size)])
+
+
+if __name__ == '__main__':
+    main()
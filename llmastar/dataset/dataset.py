@@ -2,7 +2,7 @@ import random
 from shapely.geometry import LineString, Point
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from llmastar.env.search import env as env_search, plotting as plotting_search
+from llmastar.env.search import env as env_search, plotting as plotting_search, cache
 import json, os
 import inquirer
 
@@ -93,11 +93,16 @@ class Dataset:
         horizontal_barriers = generate_horizontal_obstacles(num_h_obstacles, x_range, y_range, existing_obstacles)
         vertical_barriers = generate_vertical_obstacles(num_v_obstacles, x_range, y_range, existing_obstacles)
         
+        # connected components of the map, to reject start/goal pairs that no path joins
+        grid = cache.compile_environment({'range_x': x_range, 'range_y': y_range,
+                                          'horizontal_barriers': horizontal_barriers,
+                                          'vertical_barriers': vertical_barriers}).grid(components=True)
         sg_list = []
         while len(sg_list) < self.unique_sg:
             start = generate_random_point(x_range, y_range, existing_obstacles)
             goal = generate_random_point(x_range, y_range, existing_obstacles)
-            if any(LineString([start, goal]).intersects(ob) for ob in existing_obstacles):
+            if any(LineString([start, goal]).intersects(ob) for ob in existing_obstacles) \
+                    and grid.connected(tuple(start), tuple(goal)):
                 sg_list.append((start, goal))
         
         environment = {
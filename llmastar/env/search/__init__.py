@@ -1,2 +1,4 @@
 from .env import *
-from .plotting import *
\ No newline at end of file
+from .plotting import *
+from .compiled import *
+from .cache import *
\ No newline at end of file
@@ -0,0 +1,143 @@
+import hashlib
+from collections import OrderedDict
+from llmastar.utils import SegmentCollider
+from .env import Env
+
+
+class CompiledEnv:
+    """
+    Immutable compiled form of a map: ranges and barriers as tuples, the Env with its cached
+    CompiledMap, and the collision kernel against the barriers and the border.
+    Instances are shared between queries through EnvironmentCache, so neither they nor their Env
+    may be changed in place; a map with different barriers is a different CompiledEnv.
+    """
+    def __init__(self, key, range_x, range_y, horizontal_barriers, vertical_barriers):
+        fields = {
+            'key': key,
+            'range_x': range_x,
+            'range_y': range_y,
+            'horizontal_barriers': horizontal_barriers,
+            'vertical_barriers': vertical_barriers,
+            'Env': Env(range_x[1], range_y[1], [list(h) for h in horizontal_barriers],
+                       [list(v) for v in vertical_barriers]),
+            # the planners test against the border one cell inside the ranges
+            'collider': SegmentCollider(horizontal_barriers, vertical_barriers,
+                                        [range_x[0], range_x[1] - 1], [range_y[0], range_y[1] - 1]),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledEnv is immutable")
+
+    def grid(self, motions=False, components=False, nearest=False):
+        return self.Env.compile(motions=motions, components=components, nearest=nearest)
+
+
+def environment_key(range_x, range_y, horizontal_barriers, vertical_barriers):
+    """Content hash of the ranges and barriers of a map."""
+    content = repr((range_x, range_y, horizontal_barriers, vertical_barriers)).encode()
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded least recently used mapping behind the per-map caches, such as the compiled maps
+    of EnvironmentCache and the distance fields. Once it holds more than maxsize entries, or
+    their total size() exceeds max_bytes, the least recently used are evicted; the newest entry
+    is always kept.
+    """
+    def __init__(self, maxsize=None, max_bytes=None, size=None):
+        """
+        :param maxsize: maximum number of entries, None for no limit
+        :param max_bytes: maximum total size of the entries, None for no limit
+        :param size: size of a value in bytes, needed with max_bytes
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.size = size
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, build=None):
+        """
+        Value of key, marked as the most recently used.
+        :param build: called on a miss, its value is stored and returned; without it a miss returns None
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+        self.misses += 1
+        if build is None:
+            return None
+        value = build()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if key in self._entries:
+            self.nbytes -= self._sizeof(self._entries.pop(key))
+        self._entries[key] = value
+        self.nbytes += self._sizeof(value)
+        while len(self._entries) > 1 and (self.maxsize is not None and len(self._entries) > self.maxsize
+                                          or self.max_bytes is not None and self.nbytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= self._sizeof(evicted)
+
+    def _sizeof(self, value):
+        return self.size(value) if self.size is not None else 0
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = self.hits = self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class EnvironmentCache:
+    """Bounded LRU cache of CompiledEnv keyed by environment_key()."""
+    def __init__(self, maxsize=64):
+        self._entries = LRUCache(maxsize)
+
+    @property
+    def hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        return self._entries.misses
+
+    def get(self, query):
+        """
+        CompiledEnv of the map described by query, built on first use.
+        :param query: dict with range_x, range_y, horizontal_barriers and vertical_barriers, left untouched
+        """
+        range_x = tuple(query['range_x'])
+        range_y = tuple(query['range_y'])
+        horizontal_barriers = tuple(tuple(h) for h in query['horizontal_barriers'])
+        vertical_barriers = tuple(tuple(v) for v in query['vertical_barriers'])
+        key = environment_key(range_x, range_y, horizontal_barriers, vertical_barriers)
+        return self._entries.get(key, lambda: CompiledEnv(key, range_x, range_y, horizontal_barriers,
+                                                          vertical_barriers))
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+environment_cache = EnvironmentCache()
+
+
+def compile_environment(query):
+    """CompiledEnv of the map described by query, from the shared environment_cache."""
+    return environment_cache.get(query)
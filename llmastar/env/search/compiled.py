@@ -0,0 +1,250 @@
+import math
+import numpy as np
+from llmastar.utils import SegmentCollider
+
+
+class CompiledMap:
+    """
+    Array form of an Env, built through Env.compile() so that it is shared by every query on the map.
+    The occupancy grid holds the same cells as Env.obs_map(), indexed as [x, y],
+    so that validity of a cell is a single lookup instead of a scan over the barriers.
+    """
+    def __init__(self, Env):
+        self.Env = Env
+        self.x_range = Env.x_range
+        self.y_range = Env.y_range
+        self.occupancy = np.zeros((self.x_range, self.y_range), dtype=bool)
+        cells = [s for s in Env.obs if self.in_bounds(s)]
+        if cells:
+            xs, ys = zip(*cells)
+            self.occupancy[list(xs), list(ys)] = True
+        self.occupancy.setflags(write=False)
+        # flat copy of the grid, scalar indexing into a list is cheaper than into numpy
+        self._blocked = self.occupancy.ravel().tolist()
+        self.motions = Env.motions
+        self.motion_mask = None
+        self.motion_cost = None
+        self.passable = None
+        self.cell_model = False
+        self.components = None
+        self.nearest = None
+
+    def _collider(self):
+        return SegmentCollider(self.Env.horizontal_barriers, self.Env.vertical_barriers,
+                               [0, self.x_range - 1], [0, self.y_range - 1])
+
+    def compile_passable(self):
+        """
+        Cells that touch no barrier nor the border: passable[x, y] is False on obstacles and on every cell
+        lying on a barrier. A cell touches a segment only by lying on it, so each barrier marks its cells
+        in one slice, in time and memory of the map plus the barrier lengths, without a collision test
+        of every cell against every barrier.
+        """
+        collider = self._collider()
+        blocked = self.occupancy.copy()
+        for c, lo, hi in collider.horizontal:
+            if c == int(c) and 0 <= c < self.y_range:
+                blocked[max(math.ceil(lo), 0):max(math.floor(hi) + 1, 0), int(c)] = True
+        for c, lo, hi in collider.vertical:
+            if c == int(c) and 0 <= c < self.x_range:
+                blocked[int(c), max(math.ceil(lo), 0):max(math.floor(hi) + 1, 0)] = True
+        passable = ~blocked
+        passable.setflags(write=False)
+        self.passable = passable
+        return self
+
+    def compile_motions(self):
+        """
+        Precompute which of the Env.motions are legal from every cell.
+        motion_mask[x, y] has bit k set when motions[k] stays in bounds, lands on a free cell
+        and does not touch a barrier or the border; motion_cost[x, y, k] is its length, or inf.
+        """
+        collider = self._collider()
+        moves = np.array(self.motions)
+        lengths = np.hypot(moves[:, 0], moves[:, 1])
+        bits = (1 << np.arange(len(self.motions))).astype(np.uint8)
+        mask = np.zeros((self.x_range, self.y_range), dtype=np.uint8)
+        cost = np.full((self.x_range, self.y_range, len(self.motions)), math.inf)
+        ys = np.arange(self.y_range)
+        # a few columns at a time keeps the (moves x barriers) collision arrays small on big maps
+        segments = len(collider.horizontal) + len(collider.vertical)
+        step = max(1, 2 ** 21 // (self.y_range * len(self.motions) * segments))
+        for x0 in range(0, self.x_range, step):
+            xs = np.arange(x0, min(x0 + step, self.x_range))
+            cells = np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1).reshape(-1, 2)
+            ends = cells[:, None, :] + moves[None, :, :]
+            ex, ey = ends[..., 0], ends[..., 1]
+            legal = (ex >= 0) & (ex < self.x_range) & (ey >= 0) & (ey < self.y_range)
+            legal[legal] = ~self.occupancy[ex[legal], ey[legal]]
+            hits = collider.collisions(np.repeat(cells, len(self.motions), axis=0), ends.reshape(-1, 2))
+            legal &= ~hits.reshape(legal.shape)
+            mask[xs] = (legal * bits).sum(axis=1).reshape(len(xs), self.y_range)
+            cost[xs] = np.where(legal, lengths, math.inf).reshape(len(xs), self.y_range, -1)
+        # on integer maps a motion is legal exactly when it joins two passable cells, which is the
+        # grid model jump point search relies on
+        if self.passable is None:
+            self.compile_passable()
+        passable = self.passable
+        padded = np.zeros((self.x_range + 2, self.y_range + 2), dtype=bool)
+        padded[1:-1, 1:-1] = passable
+        derived = np.zeros_like(mask)
+        for k, (dx, dy) in enumerate(self.motions):
+            target = padded[1 + dx:1 + dx + self.x_range, 1 + dy:1 + dy + self.y_range]
+            derived |= ((passable & target) * bits[k]).astype(np.uint8)
+        self.cell_model = bool(np.array_equal(derived, mask))
+        mask.setflags(write=False)
+        cost.setflags(write=False)
+        self.motion_mask = mask
+        self.motion_cost = cost
+        self._lengths = lengths.tolist()
+        self._mask = mask.ravel().tolist()
+        # (neighbor, cost) lists are built on first visit of a cell, then reused by every query
+        self._successors = [None] * (self.x_range * self.y_range)
+        self._motion_index = {u: k for k, u in enumerate(self.motions)}
+        self._cost = cost.ravel().tolist()
+        return self
+
+    def grid_aligned(self):
+        """
+        True when the motions are single steps to the 8 neighbours and every barrier lies on a grid line.
+        A step then meets a barrier only at its ends, so it is legal exactly when it joins two passable
+        cells and the cell model holds without the motion tables.
+        """
+        steps = {(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)} - {(0, 0)}
+        collider = self._collider()
+        return {tuple(u) for u in self.motions} <= steps and \
+            all(c == int(c) for c, _, _ in collider.horizontal + collider.vertical)
+
+    def compile_components(self):
+        """
+        Label the connected components of the legal moves. components[x, y] is the same for two cells
+        exactly when a path of motions joins them, and -1 on obstacles. On grid aligned maps the moves
+        are the steps between neighbouring passable cells, so only the passable grid is needed; other
+        maps compile the motion tables first. Motions are legal both ways, so the labels come from a
+        union-find over every move at once: the larger root of each edge is hooked under the smaller
+        one, then the pointers are compressed, until no edge joins two roots.
+        """
+        cells = np.arange(self.x_range * self.y_range)
+        if self.motion_mask is None and self.grid_aligned():
+            if self.passable is None:
+                self.compile_passable()
+            index = cells.reshape(self.x_range, self.y_range)
+            u, v = [], []
+            # each step once, its reverse joins the same two cells
+            for dx, dy in {step if step > (0, 0) else (-step[0], -step[1]) for step in map(tuple, self.motions)}:
+                xs = slice(max(-dx, 0), self.x_range - max(dx, 0))
+                ys = slice(max(-dy, 0), self.y_range - max(dy, 0))
+                xe = slice(max(dx, 0), self.x_range - max(-dx, 0))
+                ye = slice(max(dy, 0), self.y_range - max(-dy, 0))
+                legal = self.passable[xs, ys] & self.passable[xe, ye]
+                u.append(index[xs, ys][legal])
+                v.append(index[xe, ye][legal])
+        else:
+            if self.motion_mask is None:
+                self.compile_motions()
+            mask = self.motion_mask.ravel()
+            u = [cells[(mask >> k & 1).astype(bool)] for k in range(len(self.motions))]
+            v = [u[k] + dx * self.y_range + dy for k, (dx, dy) in enumerate(self.motions)]
+        u, v = np.concatenate(u), np.concatenate(v)
+        parent = cells.copy()
+        while True:
+            pu, pv = parent[u], parent[v]
+            differ = pu != pv
+            if not differ.any():
+                break
+            pu, pv = pu[differ], pv[differ]
+            np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+        components = np.where(self.occupancy.ravel(), -1, parent).reshape(self.x_range, self.y_range)
+        components.setflags(write=False)
+        self.components = components
+        self._components = components.ravel().tolist()
+        return self
+
+    def compile_nearest(self):
+        """
+        Nearest passable cell of every cell, compiling the passable grid first if needed: nearest[x, y] is
+        the flat index of a passable cell closest to (x, y), itself when it is passable, -1 when the map
+        has none. Every cell repeatedly takes the candidate of a neighbour when it is closer than its own,
+        all cells at once, until no candidate changes.
+        """
+        if self.passable is None:
+            self.compile_passable()
+        xs, ys = np.meshgrid(np.arange(self.x_range), np.arange(self.y_range), indexing='ij')
+        nearest = np.where(self.passable, xs * self.y_range + ys, -1)
+
+        def distance(candidates):
+            cx, cy = np.divmod(candidates, self.y_range)
+            return np.where(candidates < 0, np.inf, (cx - xs) ** 2 + (cy - ys) ** 2)
+
+        best = distance(nearest)
+        changed = bool(self.passable.any())
+        while changed:
+            changed = False
+            for dx, dy in self.motions:
+                padded = np.pad(nearest, 1, constant_values=-1)
+                candidates = padded[1 + dx:1 + dx + self.x_range, 1 + dy:1 + dy + self.y_range]
+                d = distance(candidates)
+                closer = d < best
+                if closer.any():
+                    nearest = np.where(closer, candidates, nearest)
+                    best = np.where(closer, d, best)
+                    changed = True
+        nearest.setflags(write=False)
+        self.nearest = nearest
+        return self
+
+    def nearest_passable(self, s):
+        """Passable cell closest to s, which is clamped into the map first; None when there is none."""
+        x = min(max(int(round(s[0])), 0), self.x_range - 1)
+        y = min(max(int(round(s[1])), 0), self.y_range - 1)
+        i = int(self.nearest[x, y])
+        return None if i < 0 else divmod(i, self.y_range)
+
+    def component(self, s):
+        """Label of the component of s, -1 on obstacles and off the map."""
+        return self._components[s[0] * self.y_range + s[1]] if self.in_bounds(s) else -1
+
+    def connected(self, a, b):
+        """True when a path of motions joins a and b, a constant-time lookup into the component labels."""
+        if a == b:
+            return True
+        if not self.in_bounds(a) or not self.in_bounds(b):
+            return False
+        label = self._components[a[0] * self.y_range + a[1]]
+        return label >= 0 and label == self._components[b[0] * self.y_range + b[1]]
+
+    def successors(self, s):
+        """Legal (neighbor, cost) pairs of s from the motion tables."""
+        if not self.in_bounds(s):
+            return []
+        i = s[0] * self.y_range + s[1]
+        legal = self._successors[i]
+        if legal is None:
+            m = self._mask[i]
+            legal = [((s[0] + u[0], s[1] + u[1]), self._lengths[k])
+                     for k, u in enumerate(self.motions) if m >> k & 1]
+            self._successors[i] = legal
+        return legal
+
+    def move_cost(self, s_start, s_goal):
+        """Table cost of a single motion, None when it is not one of the Env.motions."""
+        k = self._motion_index.get((s_goal[0] - s_start[0], s_goal[1] - s_start[1]))
+        if k is None or not self.in_bounds(s_start):
+            return None
+        return self._cost[(s_start[0] * self.y_range + s_start[1]) * len(self.motions) + k]
+
+    def in_bounds(self, s):
+        return 0 <= s[0] < self.x_range and 0 <= s[1] < self.y_range
+
+    def index(self, s):
+        return s[0] * self.y_range + s[1]
+
+    def is_free(self, s):
+        if not self.in_bounds(s):
+            return False
+        return not self._blocked[s[0] * self.y_range + s[1]]
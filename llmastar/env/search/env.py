@@ -1,3 +1,6 @@
+from .compiled import CompiledMap
+
+
 class Env:
     def __init__(self, x_range, y_range, horizontal_barriers, vertical_barriers):
         self.x_range = x_range  # size of background
@@ -7,9 +10,30 @@ class Env:
         self.motions = [(-1, 0), (-1, 1), (0, 1), (1, 1),
                         (1, 0), (1, -1), (0, -1), (-1, -1)]
         self.obs = self.obs_map()
+        self._compiled = None
 
     def update_obs(self, obs):
         self.obs = obs
+        self._compiled = None
+
+    def compile(self, motions=False, components=False, nearest=False):
+        """
+        Compiled array form of the map, cached on the environment until the obstacles change
+        :param motions: also precompute the per-cell legal-move mask and move-cost table
+        :param components: also label the connected components of the moves, which implies motions
+                           only on maps that are not CompiledMap.grid_aligned
+        :param nearest: also find the nearest passable cell of every cell
+        :return: CompiledMap
+        """
+        if self._compiled is None:
+            self._compiled = CompiledMap(self)
+        if motions and self._compiled.motion_mask is None:
+            self._compiled.compile_motions()
+        if components and self._compiled.components is None:
+            self._compiled.compile_components()
+        if nearest and self._compiled.nearest is None:
+            self._compiled.compile_nearest()
+        return self._compiled
 
     def obs_map(self):
         """
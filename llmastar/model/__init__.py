@@ -1,2 +1,6 @@
+from .cache import *
+from .backend import *
+from .batching import *
 from .chatgpt import *
-from .llama3 import *
\ No newline at end of file
+from .llama3 import *
+from .stand_in import *
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+
+class Completion(str):
+    """Response text carrying the number of tokens the model generated for it, which re-encoding the text need not give back."""
+
+    def __new__(cls, text, tokens):
+        completion = super().__new__(cls, text)
+        completion.tokens = tokens
+        return completion
+
+
+class Backend:
+    """
+    Interface of the models that answer LLM-A* prompts. A backend implements _complete, and
+    _complete_batch or _complete_async when it can do better than one prompt at a time or a worker
+    thread; ask, ask_batch and their async variants add the response cache and the accounting of
+    model calls, tokens and latency on top. Cache hits are not counted, they never reach the model.
+    """
+    # name LLMAStar knows the backend by, 'gpt' selects the GPT prompt templates
+    NAME = None
+    # model id, part of the cache key
+    MODEL = None
+    # generation settings sent with every prompt unless overridden, part of the cache key
+    DEFAULTS = {}
+
+    def __init__(self, cache=None):
+        """:param cache: ResponseCache of the responses, None or False to always ask the model"""
+        self.cache = None if cache is False else cache
+        self._usage_lock = threading.Lock()
+        self.reset_usage()
+
+    def reset_usage(self):
+        # calls: model invocations, a batch is one; prompts: prompts answered by the model
+        self.calls = 0
+        self.prompts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = 0.0
+
+    def usage(self):
+        """Model calls, prompts, tokens and seconds spent waiting for the model since reset_usage."""
+        with self._usage_lock:
+            return {"calls": self.calls, "prompts": self.prompts, "prompt_tokens": self.prompt_tokens,
+                    "completion_tokens": self.completion_tokens, "seconds": self.seconds}
+
+    def count_tokens(self, text):
+        """Token count of text; whitespace separated words unless the backend has a tokenizer."""
+        return len(text.split())
+
+    def _complete(self, prompt, **params):
+        raise NotImplementedError
+
+    def _complete_batch(self, prompts, **params):
+        return [self._complete(prompt, **params) for prompt in prompts]
+
+    async def _complete_async(self, prompt, **params):
+        return await asyncio.to_thread(self._complete, prompt, **params)
+
+    def _record(self, prompts, responses, seconds):
+        prompt_tokens = sum(self.count_tokens(prompt) for prompt in prompts)
+        completion_tokens = sum(response.tokens if isinstance(response, Completion) else self.count_tokens(response)
+                                for response in responses)
+        with self._usage_lock:
+            self.calls += 1
+            self.prompts += len(prompts)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.seconds += seconds
+
+    def _cached(self, template, prompt, params):
+        if self.cache is None:
+            return None
+        return self.cache.get(self.MODEL, template, prompt, **params)
+
+    def _store(self, template, prompt, response, params):
+        if self.cache is not None:
+            self.cache.put(self.MODEL, template, prompt, response, **params)
+
+    def ask(self, prompt, template=None, **params):
+        """
+        Response of the model to prompt, from the cache when possible.
+        :param template: name of the prompt template, part of the cache key
+        :param params: generation settings overriding DEFAULTS
+        """
+        params = {**self.DEFAULTS, **params}
+        response = self._cached(template, prompt, params)
+        if response is None:
+            t0 = time.perf_counter()
+            response = self._complete(prompt, **params)
+            self._record([prompt], [response], time.perf_counter() - t0)
+            self._store(template, prompt, response, params)
+        return response
+
+    def ask_batch(self, prompts, template=None, **params):
+        """Responses to prompts in order; only the prompts missing from the cache go to the model, in one batch."""
+        params = {**self.DEFAULTS, **params}
+        responses = [self._cached(template, prompt, params) for prompt in prompts]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            t0 = time.perf_counter()
+            generated = self._complete_batch([prompts[i] for i in missing], **params)
+            self._record([prompts[i] for i in missing], generated, time.perf_counter() - t0)
+            for i, response in zip(missing, generated):
+                self._store(template, prompts[i], response, params)
+                responses[i] = response
+        return responses
+
+    async def ask_async(self, prompt, template=None, **params):
+        """ask without blocking the event loop while the model answers."""
+        params = {**self.DEFAULTS, **params}
+        response = self._cached(template, prompt, params)
+        if response is None:
+            t0 = time.perf_counter()
+            response = await self._complete_async(prompt, **params)
+            self._record([prompt], [response], time.perf_counter() - t0)
+            self._store(template, prompt, response, params)
+        return response
+
+    async def ask_batch_async(self, prompts, template=None, **params):
+        """ask_batch in a worker thread, so that the event loop is not blocked by the batch."""
+        return await asyncio.to_thread(self.ask_batch, prompts, template, **params)
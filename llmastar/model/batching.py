@@ -0,0 +1,113 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .backend import Backend
+
+
+class MicroBatcher(Backend):
+    """
+    Dynamic micro-batching in front of a local model such as Llama3 or MyMistral. Prompts asked by
+    concurrent searches, from threads or event loops, are collected for up to max_wait seconds after
+    the first one or until max_batch are waiting, then go to the model in one padded generate call
+    (its _complete_batch) and each caller gets its own response back. The wrapped backend's usage
+    counts the batches as calls; the batcher's own usage counts the requests, with the time spent
+    queueing in their latency.
+
+    Batching only pays off for long generations: padding every prompt to the longest one and the
+    wait for the batch to fill cost more than the shared decoding steps save on short ones. With
+    MyMistral.tiny on one CPU core (benchmarks/llm_batching.py, 32 dataset prompts) batches of 4 to
+    16 answered 26 prompts/s against 55 one at a time for 5 new tokens, 25 against 37 for 20 and
+    about the same 23 for 50, and won from 100 new tokens on, 20 against 13.5. Prompts asking for
+    fewer than min_new_tokens are therefore generated one at a time, without waiting for others.
+    """
+    def __init__(self, backend, max_batch=8, max_wait=0.01, min_new_tokens=64):
+        """
+        :param backend: Backend whose _complete_batch generates several prompts at once
+        :param max_batch: most prompts in one generate call
+        :param max_wait: seconds the first prompt of a batch waits for others
+        :param min_new_tokens: fewest max_new_tokens a prompt must ask for to be batched, 0 to batch
+            every prompt; prompts without max_new_tokens are always batched
+        """
+        super().__init__(backend.cache)
+        self.backend = backend
+        self.NAME = backend.NAME
+        self.MODEL = backend.MODEL
+        self.DEFAULTS = backend.DEFAULTS
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.min_new_tokens = min_new_tokens
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def count_tokens(self, text):
+        return self.backend.count_tokens(text)
+
+    def _complete(self, prompt, **params):
+        return self._submit(prompt, params).result()
+
+    def _complete_batch(self, prompts, **params):
+        futures = [self._submit(prompt, params) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    async def _complete_async(self, prompt, **params):
+        # cancelling the caller cancels the request too, unless its batch is already generating
+        return await asyncio.wrap_future(self._submit(prompt, params))
+
+    def _submit(self, prompt, params):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((prompt, params, future))
+        return future
+
+    def _batched(self, params):
+        return params.get("max_new_tokens", self.min_new_tokens) >= self.min_new_tokens
+
+    def _collect(self):
+        """The next batch: the first request waiting and those arriving within max_wait of it."""
+        batch = [self._queue.get()]
+        if not self._batched(batch[0][1]):
+            return batch
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # one generate call for each set of generation settings in the batch
+            groups = {}
+            for prompt, params, future in self._collect():
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(repr(sorted(params.items())), (params, []))[1].append((prompt, future))
+            for params, requests in groups.values():
+                if self._batched(params):
+                    self._generate(requests, params)
+                else:
+                    for request in requests:
+                        self._generate([request], params)
+
+    def _generate(self, requests, params):
+        prompts = [prompt for prompt, _ in requests]
+        t0 = time.perf_counter()
+        try:
+            responses = self.backend._complete_batch(prompts, **params)
+        except BaseException as error:
+            for _, future in requests:
+                future.set_exception(error)
+            return
+        self.backend._record(prompts, responses, time.perf_counter() - t0)
+        for (_, future), response in zip(requests, responses):
+            future.set_result(response)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'llmastar', 'responses.sqlite')
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of model responses, kept in SQLite so that it survives the run and is shared
+    by every process on the machine. Entries are keyed by model id, prompt template name and a hash
+    of the prompt with the generation settings; once the responses exceed max_bytes the least
+    recently used ones are evicted. The models answer deterministically (temperature 0, no
+    sampling), so a cached response is the one the model would give again.
+    """
+    def __init__(self, path=None, max_bytes=256 * 2 ** 20):
+        """
+        :param path: database file, LLMASTAR_CACHE or DEFAULT_PATH by default
+        :param max_bytes: total size of the responses kept
+        """
+        self.path = path or os.environ.get('LLMASTAR_CACHE', DEFAULT_PATH)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # one connection for the threads of this process, other processes wait for the file lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses (model TEXT, template TEXT, digest TEXT, '
+                         'response TEXT, size INTEGER, used REAL, PRIMARY KEY (model, template, digest))')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+
+    @staticmethod
+    def digest(prompt, **params):
+        """Content hash of a prompt and the generation settings it is sent with."""
+        content = repr((prompt, sorted(params.items()))).encode()
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def get(self, model, template, prompt, build=None, **params):
+        """
+        Cached response to prompt, or build() stored on a miss; None on a miss without build.
+        :param params: generation settings that change the response, such as max_tokens or stop
+        """
+        key = (model, template or '', self.digest(prompt, **params))
+        with self._lock:
+            row = self._db.execute('SELECT response FROM responses WHERE model = ? AND template = ? AND digest = ?',
+                                   key).fetchone()
+            if row is not None:
+                self.hits += 1
+                self._db.execute('UPDATE responses SET used = ? WHERE model = ? AND template = ? AND digest = ?',
+                                 (time.time(),) + key)
+                return row[0]
+            self.misses += 1
+        if build is None:
+            return None
+        response = build()
+        self._put(key, response)
+        return response
+
+    def put(self, model, template, prompt, response, **params):
+        self._put((model, template or '', self.digest(prompt, **params)), response)
+
+    def _put(self, key, response):
+        size = len(response.encode())
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                                 key + (response, size, time.time()))
+                self._evict()
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def _evict(self):
+        """Delete the least recently used responses until the rest fit in max_bytes."""
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for rowid, size in self._db.execute('SELECT rowid, size FROM responses ORDER BY used').fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((rowid,))
+            total -= size
+        self._db.executemany('DELETE FROM responses WHERE rowid = ?', stale)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+
+_default = None
+
+
+def default_cache():
+    """ResponseCache at the default path, opened on first use and shared by every backend of the process."""
+    global _default
+    if _default is None:
+        _default = ResponseCache()
+    return _default
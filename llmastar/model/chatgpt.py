@@ -1,13 +1,21 @@
 import openai
 import os
 import asyncio
+from .backend import Backend
+from .cache import default_cache
 
 # این کلاس برای ارتباط با API GPT طراحی شده است
-class ChatGPT:
-    def __init__(self, method, sysprompt, example):
+class ChatGPT(Backend):
+    NAME = "gpt"
+    MODEL = "gpt-3.5-turbo-instruct"
+    CHAT_MODEL = "gpt-3.5-turbo"
+    DEFAULTS = {"stop": ["\n"], "max_tokens": 100}
+
+    def __init__(self, method=None, sysprompt="", example=None, cache=None):
+        # کش پاسخ‌ها روی دیسک، مشترک بین اجراها و پردازه‌ها
+        super().__init__(default_cache() if cache is None else cache)
         self.id = 0
         self.chat_history = [{"role": "system", "content": sysprompt}]
-        self.cache = {}  # کش برای ذخیره نتایج
 
         # در صورتی که مثال‌هایی برای ورودی‌ها وجود داشته باشد، آن‌ها را پردازش می‌کنیم
         if example:
@@ -22,49 +30,54 @@ class ChatGPT:
         else:
             self.prompt = sysprompt
 
-    def ask(self, prompt, stop=["\n"], max_tokens=100):
+    def count_tokens(self, text):
+        """تخمین تعداد توکن‌ها، حدود چهار نویسه برای هر توکن مدل‌های OpenAI"""
+        return (len(text) + 3) // 4
+
+    def _complete(self, prompt, stop=["\n"], max_tokens=100):
         """
-        این متد درخواست را از کش چک می‌کند، اگر قبلاً پردازش شده باشد، از کش استفاده می‌کند.
-        در غیر این صورت، درخواست را به OpenAI ارسال می‌کند.
+        ارسال درخواست به OpenAI؛ Backend.ask پیش از آن کش را چک می‌کند و پاسخ را در آن ذخیره می‌کند
         """
-        if prompt in self.cache:
-            return self.cache[prompt]
-
         response = openai.Completion.create(
-            model="gpt-3.5-turbo-instruct",  # می‌توان مدل را تغییر داد تا سبک‌تر باشد
+            model=self.MODEL,  # می‌توان مدل را تغییر داد تا سبک‌تر باشد
             prompt=prompt,
             temperature=0,  # کاهش تصادفی بودن برای سرعت بیشتر
             top_p=0.9,  # محدود کردن فضای جستجو برای سرعت بیشتر
             max_tokens=max_tokens,
             stop=stop
         )
-        result = response["choices"][0]["text"]
-        self.cache[prompt] = result  # ذخیره نتیجه در کش
-        return result
+        return response["choices"][0]["text"]
 
-    def chat(self, query, prompt="", stop=["\n"], max_tokens=100):
+    def chat(self, query, prompt="", stop=["\n"], max_tokens=100, template=None):
         """
         این متد برای ارسال درخواست‌های چت به OpenAI است.
         """
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": self.prompt},
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": prompt}
-            ],
-            temperature=0,  # کاهش تصادفی بودن برای سرعت بیشتر
-            max_tokens=max_tokens,
-            stop=stop
-        )
-        return response["choices"][0]["message"]["content"]
+        messages = [
+            {"role": "system", "content": self.prompt},
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": prompt}
+        ]
 
-    async def ask_async(self, prompt, stop=["\n"], max_tokens=100):
+        def complete():
+            response = openai.ChatCompletion.create(
+                model=self.CHAT_MODEL,
+                messages=messages,
+                temperature=0,  # کاهش تصادفی بودن برای سرعت بیشتر
+                max_tokens=max_tokens,
+                stop=stop
+            )
+            return response["choices"][0]["message"]["content"]
+        if self.cache is None:
+            # کش غیرفعال است (cache=False)، هر درخواست به OpenAI می‌رود
+            return complete()
+        return self.cache.get(self.CHAT_MODEL, template, repr(messages), complete, stop=stop, max_tokens=max_tokens)
+
+    async def _complete_async(self, prompt, stop=["\n"], max_tokens=100):
         """
-        این متد غیرهمزمان برای ارسال درخواست به OpenAI است.
+        نسخه غیرهمزمان _complete؛ acreate حلقه رویداد را در انتظار پاسخ مسدود نمی‌کند.
         """
-        response = await openai.Completion.create(
-            model="gpt-3.5-turbo-instruct",
+        response = await openai.Completion.acreate(
+            model=self.MODEL,
             prompt=prompt,
             temperature=0,  # کاهش تصادفی بودن برای سرعت بیشتر
             top_p=0.9,
@@ -73,12 +86,19 @@ class ChatGPT:
         )
         return response["choices"][0]["text"]
 
-    async def batch_ask(self, prompts):
+    async def ask_batch_async(self, prompts, template=None, max_in_flight=8, **params):
         """
-        ارسال چندین درخواست به صورت غیرهمزمان
+        ارسال چندین درخواست به صورت غیرهمزمان، با حداکثر max_in_flight درخواست همزمان
         """
-        tasks = [self.ask_async(prompt) for prompt in prompts]
-        return await asyncio.gather(*tasks)
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def ask(prompt):
+            async with semaphore:
+                return await self.ask_async(prompt, template=template, **params)
+        return await asyncio.gather(*(ask(prompt) for prompt in prompts))
+
+    async def batch_ask(self, prompts, max_in_flight=8, template=None, **params):
+        return await self.ask_batch_async(prompts, template=template, max_in_flight=max_in_flight, **params)
 
     def chat_with_image(self, chat_history, stop=["\n"], max_tokens=100):
         """
@@ -1,10 +1,19 @@
 import transformers
 import torch
+from .backend import Backend
+from .cache import default_cache
 
-class Llama3:
-    def __init__(self):
+class Llama3(Backend):
+    NAME = "llama"
+    MODEL = "meta-llama/Meta-Llama-3-8B-Instruct"
+    MAX_NEW_TOKENS = 1000
+    DEFAULTS = {"max_new_tokens": MAX_NEW_TOKENS}
+
+    def __init__(self, cache=None):
         # استفاده از مدل و pipeline
-        model_id = "meta-llama/Meta-Llama-3-8B-Instruct"
+        model_id = self.MODEL
+        # کش پاسخ‌ها روی دیسک، مشترک بین اجراها و پردازه‌ها
+        super().__init__(default_cache() if cache is None else cache)
         
         # استفاده از float16 برای بهبود سرعت
         self.pipeline = transformers.pipeline(
@@ -20,12 +29,24 @@ class Llama3:
             self.pipeline.tokenizer.eos_token_id,
             self.pipeline.tokenizer.convert_tokens_to_ids("<|eot_id|>")  # این باید برای اتمام توکن استفاده شود
         ]
+        # padding از چپ برای تولید دسته‌ای پرس و جوهایی با طول‌های متفاوت
+        self.pipeline.tokenizer.pad_token_id = self.pipeline.tokenizer.eos_token_id
+        self.pipeline.tokenizer.padding_side = "left"
     
-    def ask(self, prompt):
+    def count_tokens(self, text):
+        return len(self.pipeline.tokenizer.encode(text, add_special_tokens=False))
+
+    def _complete(self, prompt, max_new_tokens=MAX_NEW_TOKENS):
+        return self._generate(prompt, max_new_tokens)
+
+    def _complete_batch(self, prompts, max_new_tokens=MAX_NEW_TOKENS):
+        return self._generate_batch(prompts, max_new_tokens)
+
+    def _generate(self, prompt, max_new_tokens=MAX_NEW_TOKENS):
         # استفاده از batching و تنظیمات بهینه برای زمان پردازش سریع‌تر
         outputs = self.pipeline(
             prompt,
-            max_new_tokens=1000,  # تعداد توکن‌های تولید شده را کاهش دهید تا سرعت بهبود یابد
+            max_new_tokens=max_new_tokens,  # تعداد توکن‌های تولید شده را کاهش دهید تا سرعت بهبود یابد
             eos_token_id=self.terminators,
             do_sample=False,  # از sample کردن استفاده نمی‌کنیم تا سرعت بالا برود
             temperature=0,  # تنظیم temperature به صفر تا تنوع کمتری داشته باشیم
@@ -34,14 +55,12 @@ class Llama3:
         )
         return outputs[0]["generated_text"][len(prompt):]
 
-    # اگر بخواهید پردازش همزمان را پیاده‌سازی کنید
-    def ask_batch(self, prompts):
-        """
-        پردازش همزمان چندین درخواست برای سرعت بیشتر
-        """
+    def _generate_batch(self, prompts, max_new_tokens=MAX_NEW_TOKENS):
+        """پردازش همزمان چندین درخواست در یک فراخوانی generate، padشده تا طول بلندترین آن‌ها"""
         outputs = self.pipeline(
             prompts,
-            max_new_tokens=1000,
+            batch_size=len(prompts),
+            max_new_tokens=max_new_tokens,
             eos_token_id=self.terminators,
             do_sample=False,
             temperature=0,
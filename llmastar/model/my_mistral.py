@@ -1,14 +1,82 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, MistralConfig, PreTrainedTokenizerFast
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
 import torch
+from .backend import Backend, Completion
+from .cache import default_cache
 
-class MyMistral:
-    def __init__(self, prompt="standard"):
-        model_id = "mistralai/Mistral-7B-Instruct-v0.1"
-        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
-        self.model = AutoModelForCausalLM.from_pretrained(model_id, device_map="auto", torch_dtype=torch.float16)
+class MyMistral(Backend):
+    NAME = "mistral"
+    MODEL = "mistralai/Mistral-7B-Instruct-v0.1"
+    MAX_NEW_TOKENS = 100
+    DEFAULTS = {"max_new_tokens": MAX_NEW_TOKENS}
+
+    def __init__(self, prompt="standard", cache=None, tokenizer=None, model=None):
+        """:param tokenizer, model: به جای مدل MODEL، مانند پیکربندی tiny"""
+        model_id = self.MODEL
+        self.prompt = prompt
+        super().__init__(default_cache() if cache is None else cache)
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+        if model is None:
+            model = AutoModelForCausalLM.from_pretrained(model_id, device_map="auto", torch_dtype=torch.float16)
+        self.tokenizer = tokenizer
+        self.model = model
+        # padding از چپ تا تولید همه پرس و جوهای یک دسته از انتهای واقعی آن‌ها ادامه یابد
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+    @classmethod
+    def tiny(cls, prompt="standard", cache=False, seed=0):
+        """
+        پیکربندی کوچک فقط روی CPU برای آزمون‌ها و اندازه‌گیری توان عملیاتی، بدون GPU و دانلود: یک Mistral دو لایه
+        با وزن‌های تصادفی و یک توکنایزر بایتی. پاسخ‌ها بی‌معنی هستند ولی padding، دسته‌بندی و تولید همان مسیر مدل
+        واقعی را طی می‌کنند؛ کش به طور پیش‌فرض خاموش است تا پاسخ‌ها با پاسخ‌های MODEL مخلوط نشوند.
+        """
+        special = ["<pad>", "<s>", "</s>"]
+        vocab = {token: i for i, token in enumerate(special + sorted(pre_tokenizers.ByteLevel.alphabet()))}
+        tokenizer = Tokenizer(models.BPE(vocab=vocab, merges=[]))
+        tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+        tokenizer.decoder = decoders.ByteLevel()
+        tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>", bos_token="<s>",
+                                            eos_token="</s>")
+        config = MistralConfig(vocab_size=len(vocab), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                               num_attention_heads=2, num_key_value_heads=1, max_position_embeddings=4096,
+                               pad_token_id=0, bos_token_id=1, eos_token_id=2)
+        torch.manual_seed(seed)
+        model = AutoModelForCausalLM.from_config(config).eval()
+        backend = cls(prompt=prompt, cache=cache, tokenizer=tokenizer, model=model)
+        backend.MODEL = "tiny-mistral"
+        return backend
 
     def run(self, query: str) -> str:
-        inputs = self.tokenizer(query, return_tensors="pt").to(self.model.device)
-        outputs = self.model.generate(**inputs, max_new_tokens=100)
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return response
+        return self.ask(query, template=self.prompt)
+
+    async def run_async(self, query: str) -> str:
+        return await self.ask_async(query, template=self.prompt)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _complete(self, query: str, max_new_tokens=MAX_NEW_TOKENS) -> str:
+        return self._generate(query, max_new_tokens)
+
+    def _complete_batch(self, queries, max_new_tokens=MAX_NEW_TOKENS):
+        return self._generate_batch(queries, max_new_tokens)
+
+    def _generate(self, query: str, max_new_tokens=MAX_NEW_TOKENS) -> str:
+        return self._generate_batch([query], max_new_tokens)[0]
+
+    def _generate_batch(self, queries, max_new_tokens=MAX_NEW_TOKENS):
+        """
+        یک فراخوانی generate برای همه پرس و جوها، padشده تا طول بلندترین آن‌ها. generate پرس و جو را هم برمی‌گرداند،
+        پس فقط توکن‌های پس از ورودی padشده رمزگشایی و به عنوان توکن‌های تولیدشده شمرده می‌شوند.
+        """
+        inputs = self.tokenizer(queries, return_tensors="pt", padding=True).to(self.model.device)
+        outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens,
+                                      pad_token_id=self.tokenizer.pad_token_id)
+        generated = outputs[:, inputs["input_ids"].shape[1]:]
+        # پس از پایان یک پاسخ، generate بقیه ردیف را با pad پر می‌کند
+        tokens = (generated != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        responses = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        return [Completion(response, n) for response, n in zip(responses, tokens)]
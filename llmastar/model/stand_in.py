@@ -0,0 +1,103 @@
+import ast
+import asyncio
+import math
+import re
+import time
+
+from .backend import Backend
+
+
+class StandIn(Backend):
+    """
+    Offline stand-in for an LLM, to run and load-test LLM-A* without a GPU or network. It reads the
+    start, goal and barriers of the last query in the prompt and answers in the format of the prompt
+    templates with waypoints found geometrically: walking the straight line to the goal, the first
+    barrier it crosses is passed diagonally one cell beyond whichever end makes the shorter detour,
+    until the line is clear. Answers are deterministic and come after latency seconds, plus per_token seconds
+    per prompt token, in place of the model latency.
+    """
+    NAME = 'standin'
+    MODEL = 'stand-in'
+    # most detours in one answer
+    MAX_WAYPOINTS = 10
+
+    def __init__(self, latency=0.0, per_token=0.0, cache=None):
+        super().__init__(cache)
+        self.latency = latency
+        self.per_token = per_token
+
+    def _delay(self, prompts):
+        return self.latency + self.per_token * sum(self.count_tokens(prompt) for prompt in prompts)
+
+    def _complete(self, prompt, **params):
+        time.sleep(self._delay([prompt]))
+        return self.answer(prompt)
+
+    def _complete_batch(self, prompts, **params):
+        # one model call: the latency is paid once for the batch
+        time.sleep(self._delay(prompts))
+        return [self.answer(prompt) for prompt in prompts]
+
+    async def _complete_async(self, prompt, **params):
+        await asyncio.sleep(self._delay([prompt]))
+        return self.answer(prompt)
+
+    @staticmethod
+    def _field(prompt, name):
+        return ast.literal_eval(re.findall(rf'{name}: (\[.*\])', prompt)[-1])
+
+    def answer(self, prompt):
+        """Answer to prompt, without the latency."""
+        start = self._field(prompt, 'Start Point')
+        goal = self._field(prompt, 'Goal Point')
+        barriers = [((x_start, y), (x_end, y)) for y, x_start, x_end in self._field(prompt, 'Horizontal Barriers')]
+        barriers += [((x, y_start), (x, y_end)) for x, y_start, y_end in self._field(prompt, 'Vertical Barriers')]
+        return f"Generated Path: {[list(s) for s in self.waypoints(tuple(start), tuple(goal), barriers)]}"
+
+    @classmethod
+    def waypoints(cls, start, goal, barriers):
+        """start, the detours around the barriers crossed on the way and goal."""
+        path, passed = [start], []
+        while len(path) <= cls.MAX_WAYPOINTS:
+            crossed = cls._first_crossing(path[-1], goal, barriers)
+            if crossed is None:
+                break
+            passed.append(crossed)
+            # cells diagonally past the ends of the barrier, reached in a clear line, from which the goal
+            # is seen past every barrier gone around so far; the prompt has no map size, but barriers
+            # that start at 0 meet the border there
+            detours = [s for s in cls._corners(crossed) if min(s) >= 0 and s not in path
+                       and cls._first_crossing(path[-1], s, barriers) is None
+                       and cls._first_crossing(s, goal, passed) is None]
+            if not detours:
+                break
+            path.append(min(detours, key=lambda s: math.dist(path[-1], s) + math.dist(s, goal)))
+        return path + [goal]
+
+    @staticmethod
+    def _corners(barrier):
+        (x1, y1), (x2, y2) = sorted(barrier)
+        if y1 == y2:
+            return [(x1 - 1, y1 - 1), (x1 - 1, y1 + 1), (x2 + 1, y1 - 1), (x2 + 1, y1 + 1)]
+        return [(x1 - 1, y1 - 1), (x1 + 1, y1 - 1), (x1 - 1, y2 + 1), (x1 + 1, y2 + 1)]
+
+    @staticmethod
+    def _crossing(a, b, barrier):
+        """Fraction of the way from a to b where the segment meets barrier, None when it does not."""
+        p, q = barrier
+        denominator = (b[0] - a[0]) * (q[1] - p[1]) - (b[1] - a[1]) * (q[0] - p[0])
+        if denominator == 0:
+            return None
+        t = ((p[0] - a[0]) * (q[1] - p[1]) - (p[1] - a[1]) * (q[0] - p[0])) / denominator
+        u = ((p[0] - a[0]) * (b[1] - a[1]) - (p[1] - a[1]) * (b[0] - a[0])) / denominator
+        return t if 0 < t <= 1 and 0 <= u <= 1 else None
+
+    @classmethod
+    def _first_crossing(cls, a, b, barriers):
+        """Barrier the segment a-b meets first after leaving a, None when there is none."""
+        first, crossed = math.inf, None
+        for barrier in barriers:
+            t = cls._crossing(a, b, barrier)
+            if t is not None and t < first:
+                first, crossed = t, barrier
+        return crossed
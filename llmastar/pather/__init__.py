@@ -1,2 +1,6 @@
 from .llm_a_star import *
-from .a_star import *
\ No newline at end of file
+from .a_star import *
+from .distance_field import *
+from .d_star_lite import *
+from .hpa_star import *
+from .any_angle import *
\ No newline at end of file
@@ -1 +1,5 @@
-from .a_star import AStar
\ No newline at end of file
+from .a_star import AStar
+from .search_state import SearchState
+from .jps import JumpPointSearch, expand_path
+from .anytime import ara_star
+from .landmarks import Landmarks, get_landmarks
\ No newline at end of file
@@ -1,91 +1,215 @@
 import heapq
 import math
-from llmastar.env.search import env, plotting
-from llmastar.utils import is_lines_collision
+import time
+from llmastar.env.search import plotting, cache
+from llmastar.pather.status import FOUND, UNREACHABLE, BUDGET_EXCEEDED
+from llmastar.pather.heuristics import get_heuristic, is_admissible
+from .search_state import SearchState
+from .jps import JumpPointSearch, expand_path
+from .anytime import ara_star
+from .landmarks import get_landmarks
 
 class AStar:
+    # initial inflation and its decrement per improvement of the anytime mode
+    ANYTIME_WEIGHT = 2.5
+    ANYTIME_STEP = 0.5
+
     def __init__(self):
-        pass
+        self.state = None
+        self.jps = None
+        self._heuristic = get_heuristic('octile')
 
-    def searching(self, query, filepath='temp.png', use_bidirectional=False):
-        self.filepath = filepath
-        self.s_start = tuple(query['start'])
-        self.s_goal = tuple(query['goal'])
+    def searching(self, query, filepath='temp.png', use_bidirectional=False, precompute_motions=False,
+                  use_array_state=False, use_jps=False, weight=None, anytime=False,
+                  max_seconds=None, max_expansions=None, heuristic='octile', landmarks=None):
+        """
+        :param precompute_motions: search over the motion tables of the map, compiled on its first query,
+                                   instead of testing every move against the barriers. Either way the
+                                   connected components of the map are labelled, from the passable grid
+                                   alone on grid aligned maps, so that a goal out of reach of the start is
+                                   UNREACHABLE at once, with the path [start], instead of after an
+                                   exhaustive search
+        :param heuristic: name in heuristics.HEURISTICS or a function (s, goal) -> estimate, used by the
+                          unidirectional, array, jump point, weighted and anytime searches
+        :param landmarks: number K of landmark distance tables, built once per map and cached; the
+                          heuristic, which has to be admissible, is raised to their ALT lower bound
+        :param weight: inflation of the heuristic, the path is then at most weight times the optimum when
+                       the heuristic is admissible, otherwise the bound is None; with anytime it is the
+                       initial inflation, ANYTIME_WEIGHT by default
+        :param anytime: ARA*, keep improving the first path until the bound reaches 1 or a budget runs out
+        :param max_seconds, max_expansions: budgets of every mode; when one runs out the search stops,
+                                            with status BUDGET_EXCEEDED and the path to the expanded cell
+                                            closest to the goal
+        :return: dict with operation, storage, length, bound, status (FOUND, UNREACHABLE or BUDGET_EXCEEDED)
+                 and path, which leads to the expanded cell closest to the goal when the goal is not reached
+        """
+        self._initialize_environment(query, precompute_motions)
+        return self._search(query['start'], query['goal'], filepath, use_bidirectional=use_bidirectional,
+                            use_array_state=use_array_state, use_jps=use_jps, weight=weight, anytime=anytime,
+                            max_seconds=max_seconds, max_expansions=max_expansions, heuristic=heuristic,
+                            landmarks=landmarks)
+
+    def searching_batch(self, environment, start_goal, filepaths=None, use_bidirectional=False,
+                        precompute_motions=True, use_array_state=False, use_jps=False, weight=None,
+                        anytime=False, max_seconds=None, max_expansions=None, heuristic='octile',
+                        landmarks=None):
+        """
+        Run several start/goal queries on one map. The environment, its compiled map, the motion
+        tables and the collision kernel are built once and shared by every query.
+        :param environment: dict with range_x, range_y, horizontal_barriers and vertical_barriers
+        :param start_goal: list of [start, goal, ...] entries, as in the dataset
+        :param filepaths: optional list with one plot path per query
+        :return: list of result dicts, in the order of start_goal
+        """
+        self._initialize_environment(environment, precompute_motions)
+        return [self._search(sg[0], sg[1], filepaths[i] if filepaths else None,
+                             use_bidirectional=use_bidirectional, use_array_state=use_array_state,
+                             use_jps=use_jps, weight=weight, anytime=anytime,
+                             max_seconds=max_seconds, max_expansions=max_expansions, heuristic=heuristic,
+                             landmarks=landmarks)
+                for i, sg in enumerate(start_goal)]
+
+    def _initialize_environment(self, query, precompute_motions):
+        self.precompute_motions = precompute_motions
+        self.environment = cache.compile_environment(query)
         self.horizontal_barriers = query['horizontal_barriers']
         self.vertical_barriers = query['vertical_barriers']
-        self.range_x = query['range_x']
-        self.range_y = query['range_y']
-        self.Env = env.Env(self.range_x[1], self.range_y[1], self.horizontal_barriers, self.vertical_barriers)
-        self.plot = plotting.Plotting(self.s_start, self.s_goal, self.Env)
-        self.range_x[1] -= 1
-        self.range_y[1] -= 1
+        self.range_x = [query['range_x'][0], query['range_x'][1] - 1]
+        self.range_y = [query['range_y'][0], query['range_y'][1] - 1]
+        self.Env = self.environment.Env
+        self.grid = self.environment.grid(motions=self.precompute_motions)
+        self.collider = self.environment.collider
         self.u_set = self.Env.motions
         self.obs = self.Env.obs
 
-        if use_bidirectional:
-            path = self.bidirectional_search(self.s_start, self.s_goal)
-            visited = []  # Optional: track visited nodes
+    def _search(self, start, goal, filepath, use_bidirectional=False, use_array_state=False, use_jps=False,
+                weight=None, anytime=False, max_seconds=None, max_expansions=None, heuristic='octile',
+                landmarks=None):
+        self.filepath = filepath
+        self.s_start = tuple(start)
+        self.s_goal = tuple(goal)
+        self.status = FOUND
+        self.max_expansions = max_expansions
+        self.deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        self._heuristic = get_heuristic(heuristic)
+        if hasattr(self._heuristic, 'reset'):
+            self._heuristic.reset()
+        if landmarks:
+            if not is_admissible(self._heuristic):
+                raise ValueError("Landmarks need an admissible heuristic, such as 'octile'.")
+            self._heuristic = get_landmarks(self.environment, landmarks).heuristic(self._heuristic)
+        # suboptimality bound of the path, None when the heuristic gives no guarantee
+        bound = 1.0 if is_admissible(self._heuristic) else None
+
+        if not self.environment.grid(components=True).connected(self.s_start, self.s_goal):
+            # start and goal lie in different components, no search can join them
+            self.status = UNREACHABLE
+            path, visited = [self.s_start], []
+        elif weight is not None or anytime:
+            path, visited, bound = self.anytime_search(weight, anytime, max_seconds, max_expansions)
+        elif use_bidirectional:
+            path, visited, bound = self.bidirectional_search(self.s_start, self.s_goal)
+        elif use_jps:
+            path, visited, operation, g = self.jps_search()
+        elif use_array_state:
+            path, visited, operation, g = self.array_search()
         else:
             path, visited, operation, g = self.unidirectional_search()
 
         result = {
-            "operation": len(visited) if not use_bidirectional else None,
-            "storage": len(path) if not use_bidirectional else None,
-            "length": sum(self._euclidean_distance(path[i], path[i + 1]) for i in range(len(path) - 1))
+            "operation": len(visited),
+            "storage": len(path),
+            "length": sum(self._euclidean_distance(path[i], path[i + 1]) for i in range(len(path) - 1)),
+            "bound": bound if self.status == FOUND else None,
+            "status": self.status,
+            "path": path
         }
-        self.plot.animation(path, visited, True, "A* Final", self.filepath)
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.Env)
+            self.plot.animation(path, visited, True, "A* Final", self.filepath)
         return result
 
-    def bidirectional_search(self, start, goal):
-        open_start = []
-        open_goal = []
-        heapq.heappush(open_start, (0, start))
-        heapq.heappush(open_goal, (0, goal))
+    def anytime_search(self, weight, anytime, max_seconds, max_expansions):
+        """
+        Weighted A* or ARA* keyed by the selected heuristic. With an admissible heuristic the returned
+        bound holds: length <= bound * optimal length; an inadmissible one, such as 'manhattan', gives
+        no guarantee and the bound is None. The Euclidean distance, admissible on this grid, is the
+        lower bound the bound is computed from.
+        A path that does not reach the goal leads to the expanded cell closest to it.
+        """
+        if weight is None:
+            weight = self.ANYTIME_WEIGHT
+        lower_bound = lambda s: self._euclidean_distance(s, self.s_goal)
+        successors = lambda s: [(s_n, self.cost(s, s_n)) for s_n in self.get_neighbor(s)]
+        path, expanded, _, bound, exhausted = ara_star(self.s_start, self.s_goal, successors, self.heuristic,
+                                               lower_bound, max(1.0, weight), self.ANYTIME_STEP, anytime,
+                                               max_seconds, max_expansions)
+        if path[-1] != self.s_goal:
+            self.status = BUDGET_EXCEEDED if exhausted else UNREACHABLE
+        return path, list(expanded), bound if is_admissible(self._heuristic) else None
 
+    def bidirectional_search(self, start, goal):
+        """
+        Bidirectional A*, each side guided by the Euclidean distance to the opposite end.
+        The side with the smaller OPEN list is expanded, and the search stops once the smallest f
+        on either side reaches the cheapest start-goal cost found through a meeting node,
+        so the returned path is optimal, unless a budget stopped the search first.
+        :return: (path, visited cells, bound: 1.0 for an optimal path, None otherwise)
+        """
+        open_start = [(self._euclidean_distance(start, goal), start)]
+        open_goal = [(self._euclidean_distance(goal, start), goal)]
         came_from_start = {start: None}
         came_from_goal = {goal: None}
         g_score_start = {start: 0}
         g_score_goal = {goal: 0}
-        best_path_cost = float('inf')
-        best_meeting_point = None
+        closed_start = set()
+        closed_goal = set()
+        best_path_cost = 0 if start == goal else math.inf
+        best_meeting_point = start if start == goal else None
+        count = 0
+        exhausted = False
 
         while open_start and open_goal:
-            _, current_start = heapq.heappop(open_start)
-            _, current_goal = heapq.heappop(open_goal)
-
-            for neighbor in self.get_neighbor(current_start):
-                tentative_g = g_score_start[current_start] + self.cost(current_start, neighbor)
-                if neighbor not in g_score_start or tentative_g < g_score_start[neighbor]:
-                    came_from_start[neighbor] = current_start
-                    g_score_start[neighbor] = tentative_g
-                    f_score = tentative_g + self.heuristic(neighbor)
-                    heapq.heappush(open_start, (f_score, neighbor))
-                    if neighbor in g_score_goal:
-                        total_cost = tentative_g + g_score_goal[neighbor]
-                        if total_cost < best_path_cost:
-                            best_path_cost = total_cost
-                            best_meeting_point = neighbor
-
-            for neighbor in self.get_neighbor(current_goal):
-                tentative_g = g_score_goal[current_goal] + self.cost(current_goal, neighbor)
-                if neighbor not in g_score_goal or tentative_g < g_score_goal[neighbor]:
-                    came_from_goal[neighbor] = current_goal
-                    g_score_goal[neighbor] = tentative_g
-                    f_score = tentative_g + self._euclidean_distance(neighbor, start)
-                    heapq.heappush(open_goal, (f_score, neighbor))
-                    if neighbor in g_score_start:
-                        total_cost = tentative_g + g_score_start[neighbor]
-                        if total_cost < best_path_cost:
-                            best_path_cost = total_cost
-                            best_meeting_point = neighbor
-
-            if best_meeting_point:
-                path_start = self.reconstruct_path(came_from_start, best_meeting_point)
-                path_goal = self.reconstruct_path(came_from_goal, best_meeting_point)
-                path_goal.pop(0)
-                return path_start + path_goal[::-1]
-
-        return []
+            if self._over_budget(count):
+                exhausted = True
+                break
+            count += 1
+            if max(open_start[0][0], open_goal[0][0]) >= best_path_cost:
+                break
+            forward = len(open_start) <= len(open_goal)
+            if forward:
+                OPEN, CLOSED, came_from, g_score, g_other, target = \
+                    open_start, closed_start, came_from_start, g_score_start, g_score_goal, goal
+            else:
+                OPEN, CLOSED, came_from, g_score, g_other, target = \
+                    open_goal, closed_goal, came_from_goal, g_score_goal, g_score_start, start
+
+            _, current = heapq.heappop(OPEN)
+            if current in CLOSED:
+                continue
+            CLOSED.add(current)
+            for neighbor in self.get_neighbor(current):
+                if neighbor in CLOSED:
+                    continue
+                # the goal side walks edges backwards
+                step = self.cost(current, neighbor) if forward else self.cost(neighbor, current)
+                tentative_g = g_score[current] + step
+                f_score = tentative_g + self._euclidean_distance(neighbor, target)
+                if tentative_g < g_score.get(neighbor, math.inf) and f_score < best_path_cost:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    heapq.heappush(OPEN, (f_score, neighbor))
+                    if neighbor in g_other and tentative_g + g_other[neighbor] < best_path_cost:
+                        best_path_cost = tentative_g + g_other[neighbor]
+                        best_meeting_point = neighbor
+
+        visited = list(closed_start) + list(closed_goal)
+        if best_meeting_point is None:
+            return self.reconstruct_path(came_from_start, self._partial(closed_start, exhausted)), visited, None
+        path_start = self.reconstruct_path(came_from_start, best_meeting_point)
+        path_goal = self.reconstruct_path(came_from_goal, best_meeting_point)
+        path_goal.pop()
+        return path_start + path_goal[::-1], visited, None if exhausted else 1.0
 
     def unidirectional_search(self):
         self.OPEN = []
@@ -96,13 +220,19 @@ class AStar:
         self.g[self.s_start] = 0
         heapq.heappush(self.OPEN, (self.f_value(self.s_start), self.s_start))
         count = 0
+        exhausted = False
 
         while self.OPEN:
+            if self._over_budget(count):
+                exhausted = True
+                break
             count += 1
             _, s = heapq.heappop(self.OPEN)
             self.CLOSED.add(s)
             if s == self.s_goal:
                 break
+            if self._reached(s):
+                self.OPEN = self._rekey(self.OPEN)
             for s_n in self.get_neighbor(s):
                 if s_n in self.CLOSED:
                     continue
@@ -114,55 +244,175 @@ class AStar:
                     self.PARENT[s_n] = s
                     heapq.heappush(self.OPEN, (self.f_value(s_n), s_n))
 
-        path = self.extract_path(self.PARENT)
+        if self.s_goal in self.CLOSED:
+            path = self.extract_path(self.PARENT)
+        else:
+            path = self.extract_path(self.PARENT, self._partial(self.CLOSED, exhausted))
         visited = list(self.CLOSED)
         return path, visited, count, self.g
 
+    def jps_search(self):
+        """
+        unidirectional_search over jump points; the expanded path has the same length
+        as the A* path while the heap only ever holds jump points
+        """
+        grid = self.Env.compile(motions=True)
+        if self.jps is None or self.jps.grid is not grid:
+            self.jps = JumpPointSearch(grid)
+        jps = self.jps
+        OPEN = []
+        CLOSED = set()
+        PARENT = {self.s_start: self.s_start}
+        self.g = {self.s_start: 0}
+        heapq.heappush(OPEN, (self.f_value(self.s_start), self.s_start))
+        count = 0
+        exhausted = False
+
+        while OPEN:
+            if self._over_budget(count):
+                exhausted = True
+                break
+            count += 1
+            _, s = heapq.heappop(OPEN)
+            if s in CLOSED:
+                continue
+            CLOSED.add(s)
+            if s == self.s_goal:
+                break
+            if self._reached(s):
+                OPEN = self._rekey(OPEN)
+            # the current waypoint of a stateful heuristic stops a jump too; jump points skip the cells
+            # between them, so a jump running into it reaches it and the jumps are made again from s,
+            # in every direction, toward the next waypoint
+            parent, successors, passed = PARENT[s], [], False
+            while True:
+                target = getattr(self._heuristic, 'target', None)
+                successors += jps.successors(s, parent, self.s_goal, target)
+                if not (jps.passed and self._reached(target)):
+                    break
+                parent, passed = s, True
+            for s_n, step in successors:
+                new_cost = self.g[s] + step
+                if new_cost < self.g.get(s_n, math.inf):
+                    # a jump point only scans the directions left open by its parent, so a cheaper
+                    # parent found under an inconsistent heuristic has to reopen it
+                    CLOSED.discard(s_n)
+                    self.g[s_n] = new_cost
+                    PARENT[s_n] = s
+                    heapq.heappush(OPEN, (self.f_value(s_n), s_n))
+            if passed:
+                OPEN = self._rekey(OPEN)
+
+        end = self.s_goal if self.s_goal in CLOSED else self._partial(CLOSED, exhausted)
+        path = expand_path(self.extract_path(PARENT, end))
+        return path, list(CLOSED), count, self.g
+
+    def array_search(self):
+        """
+        unidirectional_search over flat cell ids, with g, parent and closed flags kept in a
+        SearchState that later searches on maps of the same size reuse instead of reallocating
+        """
+        if not self.grid.in_bounds(self.s_start) or not self.grid.in_bounds(self.s_goal):
+            # cells off the map have no flat id; the dict search gives the same unreachable result
+            return self.unidirectional_search()
+        size = self.grid.x_range * self.grid.y_range
+        if self.state is None or self.state.size != size:
+            self.state = SearchState(size)
+        state = self.state
+        stamp = state.reset()
+        g, parent, seen, closed = state.g, state.parent, state.seen, state.closed
+        y_range = self.grid.y_range
+        start, goal = self.grid.index(self.s_start), self.grid.index(self.s_goal)
+        g[start], parent[start], seen[start] = 0, start, stamp
+        OPEN = [(self.heuristic(self.s_start), start)]
+        CLOSED = []
+        count = 0
+        exhausted = False
+
+        while OPEN:
+            if self._over_budget(count):
+                exhausted = True
+                break
+            count += 1
+            _, i = heapq.heappop(OPEN)
+            if closed[i] == stamp:
+                continue
+            closed[i] = stamp
+            CLOSED.append(i)
+            if i == goal:
+                break
+            s = divmod(i, y_range)
+            if self._reached(s):
+                OPEN = [(g[j] + self.heuristic(divmod(j, y_range)), j) for _, j in OPEN]
+                heapq.heapify(OPEN)
+            for s_n in self.get_neighbor(s):
+                j = s_n[0] * y_range + s_n[1]
+                if closed[j] == stamp:
+                    continue
+                new_cost = g[i] + self.cost(s, s_n)
+                if seen[j] != stamp:
+                    seen[j], g[j] = stamp, math.inf
+                if new_cost < g[j]:
+                    g[j], parent[j] = new_cost, i
+                    heapq.heappush(OPEN, (new_cost + self.heuristic(s_n), j))
+
+        visited = [divmod(i, y_range) for i in CLOSED]
+        path = [goal if closed[goal] == stamp else self.grid.index(self._partial(visited, exhausted))]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        path = [divmod(i, y_range) for i in reversed(path)]
+        return path, visited, count, state
+
     def get_neighbor(self, s):
+        if self.grid.motion_mask is not None:
+            return [s_n for s_n, _ in self.grid.successors(s)]
         neighbors = [(s[0] + u[0], s[1] + u[1]) for u in self.u_set]
         return [n for n in neighbors if self.is_valid(n)]
 
     def is_valid(self, s):
-        if not (0 <= s[0] < self.range_x[1] and 0 <= s[1] < self.range_y[1]):
-            return False
-        for horizontal in self.horizontal_barriers:
-            if horizontal[0] <= s[1] <= horizontal[1] and s[0] == horizontal[2]:
-                return False
-        for vertical in self.vertical_barriers:
-            if vertical[0] <= s[0] <= vertical[1] and s[1] == vertical[2]:
-                return False
-        return True
+        return self.grid.is_free(s)
 
     def cost(self, s_start, s_goal):
+        if self.grid.motion_mask is not None:
+            step = self.grid.move_cost(s_start, s_goal)
+            if step is not None:
+                return step
         if self.is_collision(s_start, s_goal):
             return math.inf
         return math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
 
     def is_collision(self, s_start, s_end):
-        line1 = [s_start, s_end]
-        for horizontal in self.horizontal_barriers:
-            line2 = [[horizontal[1], horizontal[0]], [horizontal[2], horizontal[0]]]
-            if is_lines_collision(line1, line2):
-                return True
-        for vertical in self.vertical_barriers:
-            line2 = [[vertical[0], vertical[1]], [vertical[0], vertical[2]]]
-            if is_lines_collision(line1, line2):
-                return True
-        for x in self.range_x:
-            line2 = [[x, self.range_y[0]], [x, self.range_y[1]]]
-            if is_lines_collision(line1, line2):
-                return True
-        for y in self.range_y:
-            line2 = [[self.range_x[0], y], [self.range_x[1], y]]
-            if is_lines_collision(line1, line2):
-                return True
-        return False
+        return self.collider.is_collision(s_start, s_end)
 
     def f_value(self, s):
         return self.g[s] + self.heuristic(s)
 
     def heuristic(self, s):
-        return self._euclidean_distance_squared(s, self.s_goal)
+        return self._heuristic(s, self.s_goal)
+
+    def _reached(self, s):
+        """Tell a stateful heuristic, such as heuristics.WaypointHeuristic, that s is expanded; True when it changed."""
+        reached = getattr(self._heuristic, 'reached', None)
+        return reached is not None and reached(s)
+
+    def _rekey(self, OPEN):
+        """OPEN of (f, s) entries as a heap again, with f recomputed after the heuristic changed."""
+        OPEN = [(self.f_value(s), s) for _, s in OPEN]
+        heapq.heapify(OPEN)
+        return OPEN
+
+    def _over_budget(self, count):
+        """True once count expansions or the time of the search reach its budget."""
+        return (self.max_expansions is not None and count >= self.max_expansions) or \
+            (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+    def _partial(self, expanded, exhausted):
+        """
+        End of the best partial path when the goal was not reached: the expanded cell closest to the goal,
+        or the start when nothing was expanded. Sets the status from why the search stopped.
+        """
+        self.status = BUDGET_EXCEEDED if exhausted else UNREACHABLE
+        return min(expanded, key=lambda s: self._euclidean_distance(s, self.s_goal), default=self.s_start)
 
     def _euclidean_distance_squared(self, p1, p2):
         return (p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2
@@ -178,9 +428,10 @@ class AStar:
             current = came_from[current]
         return path[::-1]
 
-    def extract_path(self, PARENT):
-        path = [self.s_goal]
-        s = self.s_goal
+    def extract_path(self, PARENT, s_end=None):
+        """Path from s_start to s_end, the goal by default, along PARENT."""
+        s = self.s_goal if s_end is None else s_end
+        path = [s]
         while s != self.s_start:
             s = PARENT[s]
             path.append(s)
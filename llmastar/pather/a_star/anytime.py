@@ -0,0 +1,85 @@
+import heapq
+import math
+import time
+
+
+def ara_star(start, goal, successors, heuristic, lower_bound, weight, step=0.5, anytime=True,
+             max_seconds=None, max_expansions=None):
+    """
+    Weighted A*, and ARA* (Likhachev, Gordon and Thrun, 2003) when anytime is set: the first path
+    comes from a search inflated by weight, then the weight is lowered by step and the search
+    resumed, reusing its state, until it reaches 1 or a budget runs out.
+    :param successors: function s -> list of (neighbor, cost)
+    :param heuristic: function s -> estimate used in the keys g + weight * heuristic
+    :param lower_bound: admissible function s -> lower bound of the cost to goal, used for the bound
+    :return: (path, expanded cells, g, suboptimality bound of the path, whether a budget ran out);
+             when the goal was not reached, the path leads to the expanded cell with the smallest
+             lower_bound instead and the bound is inf; a path improved by an interrupted iteration
+             keeps the bound of the last completed one
+    """
+    deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+    g = {start: 0}
+    PARENT = {start: start}
+    OPEN = set([start])
+    CLOSED = set()
+    INCONS = set()
+    expanded = set()
+    heap = [(weight * heuristic(start), start)]
+    count = 0
+    eps = weight
+    path, bound = [], math.inf
+
+    def improve_path():
+        nonlocal count
+        while heap:
+            key, s = heap[0]
+            if s not in OPEN:
+                heapq.heappop(heap)
+                continue
+            if g.get(goal, math.inf) <= key:
+                return False
+            if (max_expansions is not None and count >= max_expansions) or \
+                    (deadline is not None and time.perf_counter() >= deadline):
+                return True
+            heapq.heappop(heap)
+            OPEN.discard(s)
+            CLOSED.add(s)
+            expanded.add(s)
+            count += 1
+            for s_n, cost in successors(s):
+                new_cost = g[s] + cost
+                if new_cost < g.get(s_n, math.inf):
+                    g[s_n] = new_cost
+                    PARENT[s_n] = s
+                    if s_n in CLOSED:
+                        INCONS.add(s_n)
+                    else:
+                        OPEN.add(s_n)
+                        heapq.heappush(heap, (new_cost + eps * heuristic(s_n), s_n))
+        return False
+
+    while True:
+        exhausted = improve_path()
+        if goal not in g:
+            path = [min(expanded, key=lambda s: (lower_bound(s), g[s]), default=start)]
+            while path[-1] != start:
+                path.append(PARENT[path[-1]])
+            path.reverse()
+        else:
+            path = [goal]
+            while path[-1] != start:
+                path.append(PARENT[path[-1]])
+            path.reverse()
+            if not exhausted:
+                # the inflation itself bounds the path, and every cheaper path still runs through
+                # a state of OPEN or INCONS with its optimal g, which can make the bound tighter
+                frontier = min((g[s] + lower_bound(s) for s in OPEN | INCONS), default=math.inf)
+                bound = max(1.0, min(eps, g[goal] / frontier if frontier > 0 else math.inf))
+        if exhausted or not anytime or eps <= 1 or bound <= 1:
+            return path, expanded, g, bound, exhausted
+        eps = max(1.0, eps - step)
+        OPEN |= INCONS
+        INCONS.clear()
+        CLOSED.clear()
+        heap = [(g[s] + eps * heuristic(s), s) for s in OPEN]
+        heapq.heapify(heap)
@@ -0,0 +1,115 @@
+import math
+
+
+class JumpPointSearch:
+    """
+    Jump point successors (Harabor and Grastien, 2011) over a CompiledMap.
+    A diagonal move may pass between two blocked cells, as it does through the collision test,
+    so the pruning rules are those of the original paper.
+    Maps whose motion tables do not follow the cell model fall back to the plain table successors.
+    """
+    def __init__(self, grid):
+        if grid.motion_mask is None:
+            grid.compile_motions()
+        self.grid = grid
+        self.enabled = grid.cell_model
+        self.x_range = grid.x_range
+        self.y_range = grid.y_range
+        self._passable = grid.passable.ravel().tolist()
+        # whether a jump of the last successors call ran into its waypoint
+        self.passed = False
+
+    def walkable(self, x, y):
+        return 0 <= x < self.x_range and 0 <= y < self.y_range and self._passable[x * self.y_range + y]
+
+    def successors(self, s, parent, goal, waypoint=None):
+        """
+        (jump point, cost) pairs reached from s when it was entered from parent. A jump stops at
+        waypoint as it does at goal, and passed tells whether one did: jump points skip the cells
+        between them, so a waypoint on the way may never be expanded itself. Stopping there keeps
+        a waypoint chain advancing rather than saving work: with the waypoints of the optimal path
+        (benchmarks/llm_waypoints.py --use-jps) it took 10.3 expansions a query instead of 16.5,
+        still more than the 8.8 of JPS without waypoints, in 1.8 ms instead of 1.0.
+        """
+        self.passed = False
+        if not self.enabled:
+            return self.grid.successors(s)
+        result = []
+        for dx, dy in self._directions(s, parent):
+            j = self._jump(s[0], s[1], dx, dy, goal, waypoint)
+            if j is not None:
+                steps = max(abs(j[0] - s[0]), abs(j[1] - s[1]))
+                result.append((j, steps * math.sqrt(2) if dx and dy else float(steps)))
+        return result
+
+    def _directions(self, s, parent):
+        x, y = s
+        walkable = self.walkable
+        if parent is None or parent == s:
+            return [u for u in self.grid.motions if walkable(x + u[0], y + u[1])]
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        directions = []
+        if dx and dy:
+            if walkable(x, y + dy):
+                directions.append((0, dy))
+            if walkable(x + dx, y):
+                directions.append((dx, 0))
+            if walkable(x + dx, y + dy):
+                directions.append((dx, dy))
+            if not walkable(x - dx, y) and walkable(x - dx, y + dy):
+                directions.append((-dx, dy))
+            if not walkable(x, y - dy) and walkable(x + dx, y - dy):
+                directions.append((dx, -dy))
+        elif dx:
+            if walkable(x + dx, y):
+                directions.append((dx, 0))
+            if not walkable(x, y + 1) and walkable(x + dx, y + 1):
+                directions.append((dx, 1))
+            if not walkable(x, y - 1) and walkable(x + dx, y - 1):
+                directions.append((dx, -1))
+        else:
+            if walkable(x, y + dy):
+                directions.append((0, dy))
+            if not walkable(x + 1, y) and walkable(x + 1, y + dy):
+                directions.append((1, dy))
+            if not walkable(x - 1, y) and walkable(x - 1, y + dy):
+                directions.append((-1, dy))
+        return directions
+
+    def _jump(self, x, y, dx, dy, goal, waypoint=None):
+        walkable = self.walkable
+        while True:
+            x, y = x + dx, y + dy
+            if not walkable(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if (x, y) == waypoint:
+                self.passed = True
+                return x, y
+            if dx and dy:
+                if (walkable(x - dx, y + dy) and not walkable(x - dx, y)) or \
+                        (walkable(x + dx, y - dy) and not walkable(x, y - dy)):
+                    return x, y
+                if self._jump(x, y, dx, 0, goal, waypoint) or self._jump(x, y, 0, dy, goal, waypoint):
+                    return x, y
+            elif dx:
+                if (walkable(x + dx, y + 1) and not walkable(x, y + 1)) or \
+                        (walkable(x + dx, y - 1) and not walkable(x, y - 1)):
+                    return x, y
+            else:
+                if (walkable(x + 1, y + dy) and not walkable(x + 1, y)) or \
+                        (walkable(x - 1, y + dy) and not walkable(x - 1, y)):
+                    return x, y
+
+
+def expand_path(points):
+    """Fill in the cells between consecutive jump points, which always lie on one of the 8 directions."""
+    path = list(points[:1])
+    for a, b in zip(points, points[1:]):
+        dx = (b[0] > a[0]) - (b[0] < a[0])
+        dy = (b[1] > a[1]) - (b[1] < a[1])
+        for k in range(1, max(abs(b[0] - a[0]), abs(b[1] - a[1])) + 1):
+            path.append((a[0] + k * dx, a[1] + k * dy))
+    return path
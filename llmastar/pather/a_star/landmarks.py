@@ -0,0 +1,86 @@
+import numpy as np
+from llmastar.env.search import cache
+from llmastar.pather.distance_field import dijkstra
+
+
+class Landmarks:
+    """
+    ALT lower bounds (Goldberg and Harrelson, 2005) from k landmark distance tables of a compiled map.
+    Landmarks are picked farthest first: each is the free cell farthest from the ones before.
+    Moves between free cells are legal both ways at the same cost, so for free cells s and goal,
+    |d(s, L) - d(goal, L)| never exceeds d(s, goal) by the triangle inequality; the largest of
+    these over the landmarks is an admissible and consistent heuristic that, unlike the octile
+    distance, accounts for the barriers between s and the goal.
+    """
+    def __init__(self, grid, k):
+        self.grid = grid
+        self.k = k
+        self.landmarks = []
+        self.expanded = 0
+        free = ~grid.occupancy
+        cells = np.argwhere(free)
+        tables = []
+        self._tables = np.zeros((0, grid.x_range * grid.y_range))
+        # ALT bound of every cell towards the goal of the last search
+        self._goal = None
+        self._bounds = None
+        if not len(cells):
+            return
+        score, self.expanded = dijkstra(grid, tuple(cells[0].tolist()))
+        for _ in range(k):
+            masked = np.where(free & np.isfinite(score), score, -1)
+            landmark = np.unravel_index(np.argmax(masked), masked.shape)
+            if masked[landmark] <= 0:
+                break
+            landmark = (int(landmark[0]), int(landmark[1]))
+            table, expanded = dijkstra(grid, landmark)
+            self.expanded += expanded
+            score = table if not self.landmarks else np.minimum(score, table)
+            self.landmarks.append(landmark)
+            tables.append(table.ravel())
+        if tables:
+            self._tables = np.stack(tables)
+
+    def bounds(self, goal):
+        """
+        ALT lower bound of the cost from every cell to goal, as a flat list indexed like CompiledMap.index(),
+        computed for all cells at once and kept until the next goal.
+        """
+        if goal != self._goal:
+            if not self.grid.in_bounds(goal) or not len(self._tables):
+                bounds = np.zeros(self.grid.x_range * self.grid.y_range)
+            else:
+                j = self.grid.index(goal)
+                tables, to_goal = self._tables, self._tables[:, j:j + 1]
+                reach, reach_goal = np.isfinite(tables), np.isfinite(to_goal)
+                # a landmark reached from neither the cell nor the goal bounds nothing
+                d = np.abs(np.where(reach, tables, 0) - np.where(reach_goal, to_goal, 0))
+                # reached from only one of them: the two lie in different components
+                d[reach != reach_goal] = np.inf
+                bounds = d.max(axis=0)
+            # scalar indexing into a list is cheaper than into numpy
+            self._goal, self._bounds = goal, bounds.tolist()
+        return self._bounds
+
+    def lower_bound(self, s, goal):
+        if not self.grid.in_bounds(s):
+            return 0
+        return self.bounds(goal)[self.grid.index(s)]
+
+    def heuristic(self, base):
+        """Function (s, goal) -> the larger of base and the landmark bound."""
+        y_range = self.grid.y_range
+
+        def alt(s, goal):
+            bounds = self._bounds if goal == self._goal else self.bounds(goal)
+            return max(base(s, goal), bounds[s[0] * y_range + s[1]])
+        alt.admissible = True
+        return alt
+
+
+_landmarks = cache.LRUCache(maxsize=64)
+
+
+def get_landmarks(environment, k):
+    """Landmarks of a CompiledEnv, built on first use and shared by every later search on the map."""
+    return _landmarks.get((environment.key, k), lambda: Landmarks(environment.grid(motions=True), k))
@@ -0,0 +1,24 @@
+import math
+from array import array
+
+
+class SearchState:
+    """
+    Preallocated g / parent / closed buffers for a map, indexed by the flat cell id of CompiledMap.index().
+    Entries only count when their stamp matches the current search, so reset() is O(1)
+    and the same buffers serve every search on maps of the same size.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.g = array('d', [math.inf]) * size
+        self.parent = array('q', [-1]) * size
+        self.seen = array('q', [0]) * size
+        self.closed = array('q', [0]) * size
+        self.stamp = 0
+
+    def reset(self):
+        self.stamp += 1
+        return self.stamp
+
+    def nbytes(self):
+        return sum(buf.itemsize * len(buf) for buf in (self.g, self.parent, self.seen, self.closed))
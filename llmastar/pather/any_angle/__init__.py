@@ -0,0 +1 @@
+from .any_angle import AnyAngle, VisibilityGraph
\ No newline at end of file
@@ -0,0 +1,172 @@
+import heapq
+import math
+import numpy as np
+from llmastar.env.search import plotting, cache
+from llmastar.pather.status import FOUND, UNREACHABLE
+
+
+class VisibilityGraph:
+    """
+    Visibility graph of the barriers of a map. Its nodes are the free cells around the ends of
+    every barrier, which is where shortest any-angle paths bend, and two nodes are joined when
+    the segment between them touches no barrier nor the border.
+    A map with a handful of barriers gives a few dozen nodes, so the shortest distances between
+    all of them are kept, and a query only needs the line of sight from its start and goal to
+    every node.
+    """
+    # below this many segment tests a Python loop beats the fixed cost of the vectorised kernel
+    VECTORISE = 4096
+
+    def __init__(self, environment):
+        self.collider = environment.collider
+        grid = environment.grid()
+        # the last two segments of either kind are the border
+        ends = [(x, c) for c, lo, hi in self.collider.horizontal[:-2] for x in (lo, hi)]
+        ends += [(c, y) for c, lo, hi in self.collider.vertical[:-2] for y in (lo, hi)]
+        candidates = set()
+        for x, y in ends:
+            candidates.update((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+        candidates = sorted(s for s in candidates if grid.is_free(s))
+        touching = self.collider.collisions(candidates, candidates) if candidates else []
+        self.nodes = [s for s, touches in zip(candidates, touching) if not touches]
+        self._points = np.array(self.nodes, dtype=float).reshape(-1, 2)
+        n = len(self.nodes)
+        # all-pairs shortest distances between the nodes, and the node after i on the way to j
+        self.dist = np.full((n, n), math.inf)
+        self._next = np.tile(np.arange(n), (n, 1))
+        np.fill_diagonal(self.dist, 0)
+        if n > 1:
+            i, j = np.triu_indices(n, k=1)
+            visible = ~self.collider.collisions(self._points[i], self._points[j])
+            i, j = i[visible], j[visible]
+            self.dist[i, j] = self.dist[j, i] = np.hypot(*(self._points[i] - self._points[j]).T)
+        for k in range(n):
+            via = self.dist[:, k:k + 1] + self.dist[k:k + 1, :]
+            shorter = via < self.dist
+            self.dist = np.where(shorter, via, self.dist)
+            self._next = np.where(shorter, self._next[:, k:k + 1], self._next)
+
+    def distances(self, points):
+        """Length of the segment from each of points to every node, inf where it touches a barrier."""
+        segments = len(self.collider.horizontal) + len(self.collider.vertical)
+        if len(points) * len(self.nodes) * segments < self.VECTORISE:
+            is_collision = self.collider.is_collision
+            return np.array([[math.inf if is_collision(s, s_n) else math.dist(s, s_n) for s_n in self.nodes]
+                             for s in points]).reshape(len(points), len(self.nodes))
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        starts = np.repeat(points, len(self.nodes), axis=0)
+        ends = np.tile(self._points, (len(points), 1))
+        d = np.where(self.collider.collisions(starts, ends), math.inf, np.hypot(*(ends - starts).T))
+        return d.reshape(len(points), len(self.nodes))
+
+    def route(self, i, j):
+        """Nodes of the shortest path from node i to node j."""
+        path = [i]
+        while path[-1] != j:
+            path.append(int(self._next[path[-1], j]))
+        return [self.nodes[k] for k in path]
+
+
+class AnyAngle:
+    """
+    Any-angle planner: paths are polylines whose segments touch no barrier, instead of chains of
+    8-connected moves. The default mode searches the VisibilityGraph of the map, built once per
+    map and cached, after linking the start and goal to the nodes they see. Its nodes are
+    cells, so narrow gaps between barriers can leave it disconnected; the query then falls back
+    to Theta*, which use_theta_star selects directly: A* over the grid moves where a cell takes
+    the parent of its parent whenever that one is in line of sight.
+    """
+    def __init__(self, maxsize=64):
+        self._graphs = cache.LRUCache(maxsize)
+
+    def visibility_graph(self, query):
+        """VisibilityGraph of the map of query, from the cache when possible."""
+        environment = cache.compile_environment(query)
+        return self._graphs.get(environment.key, lambda: VisibilityGraph(environment))
+
+    def searching(self, query, filepath='temp.png', use_theta_star=False):
+        self.filepath = filepath
+        self.s_start = tuple(query['start'])
+        self.s_goal = tuple(query['goal'])
+        self.environment = cache.compile_environment(query)
+        self.collider = self.environment.collider
+        self.grid = self.environment.grid(motions=True)
+        cached = self.environment.key in self._graphs
+
+        path, visited = [], []
+        if not use_theta_star:
+            self.graph = self.visibility_graph(query)
+            path, visited = self.visibility_search()
+        if not path:
+            path, visited = self.theta_star()
+        self.status = FOUND if path else UNREACHABLE
+        path = path or [self.s_start]
+        result = {
+            "operation": len(visited),
+            "storage": len(path),
+            "length": sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1)),
+            "status": self.status,
+            "path": path,
+            "cached": cached
+        }
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.environment.Env)
+            self.plot.animation(path, visited, True, "Any-Angle", self.filepath)
+        return result
+
+    def line_of_sight(self, s, s_n):
+        return not self.collider.is_collision(s, s_n)
+
+    def visibility_search(self):
+        """
+        Shortest path through the visibility graph: the best node pair (i, j) with i seen from the
+        start and j from the goal, over the cached all-pairs distances.
+        :return: (path of vertices, empty when the graph does not connect them, list of the nodes seen)
+        """
+        if self.s_start == self.s_goal:
+            return [self.s_start], []
+        if self.line_of_sight(self.s_start, self.s_goal):
+            return [self.s_start, self.s_goal], []
+        graph = self.graph
+        if not graph.nodes:
+            return [], []
+        from_start, to_goal = graph.distances([self.s_start, self.s_goal])
+        seen = [graph.nodes[i] for i in np.flatnonzero(np.isfinite(from_start) | np.isfinite(to_goal))]
+        total = from_start[:, None] + graph.dist + to_goal[None, :]
+        i, j = np.unravel_index(np.argmin(total), total.shape)
+        if not np.isfinite(total[i, j]):
+            return [], seen
+        return [self.s_start] + graph.route(i, j) + [self.s_goal], seen
+
+    def theta_star(self):
+        """
+        Theta* over the grid moves, Euclidean heuristic.
+        :return: (path of vertices, empty when the goal is unreachable, list of expanded cells)
+        """
+        g = {self.s_start: 0}
+        PARENT = {self.s_start: self.s_start}
+        OPEN = [(math.dist(self.s_start, self.s_goal), self.s_start)]
+        CLOSED = set()
+        while OPEN:
+            _, s = heapq.heappop(OPEN)
+            if s in CLOSED:
+                continue
+            CLOSED.add(s)
+            if s == self.s_goal:
+                path = [s]
+                while path[-1] != self.s_start:
+                    path.append(PARENT[path[-1]])
+                return path[::-1], list(CLOSED)
+            parent = PARENT[s]
+            for s_n, step in self.grid.successors(s):
+                if s_n in CLOSED:
+                    continue
+                if parent != s and self.line_of_sight(parent, s_n):
+                    source, new_cost = parent, g[parent] + math.dist(parent, s_n)
+                else:
+                    source, new_cost = s, g[s] + step
+                if new_cost < g.get(s_n, math.inf):
+                    g[s_n] = new_cost
+                    PARENT[s_n] = source
+                    heapq.heappush(OPEN, (new_cost + math.dist(s_n, self.s_goal), s_n))
+        return [], list(CLOSED)
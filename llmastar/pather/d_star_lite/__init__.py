@@ -0,0 +1 @@
+from .d_star_lite import DStarLite
\ No newline at end of file
@@ -0,0 +1,180 @@
+import heapq
+import math
+import numpy as np
+from llmastar.env.search import plotting, cache
+from llmastar.env.search.env import Env
+from llmastar.pather.status import FOUND, UNREACHABLE
+
+
+class DStarLite:
+    """
+    Incremental planner, D* Lite (Koenig and Likhachev, 2002). The search runs from the goal
+    towards the start and its g / rhs values are kept between calls, so when barriers are added
+    or removed, or the start moves, only the cells whose distance to the goal changed are
+    expanded again instead of searching the whole map from scratch.
+    Changed moves are found by diffing the motion tables of the old and the new compiled map.
+    """
+    TOLERANCE = 1e-9
+
+    def __init__(self):
+        self.grid = None
+
+    def searching(self, query, filepath='temp.png'):
+        """Plan from scratch on the map of query; later changes go through update_barriers / update_obs."""
+        self.range_x = query['range_x']
+        self.range_y = query['range_y']
+        environment = cache.compile_environment(query)
+        self.Env = environment.Env
+        self.grid = environment.grid(motions=True)
+        self.s_start = tuple(query['start'])
+        self.s_goal = tuple(query['goal'])
+        self.s_last = self.s_start
+        self.km = 0
+        self.g = dict()
+        self.rhs = {self.s_goal: 0}
+        self.U = []
+        self.keys = dict()
+        self.update_vertex(self.s_goal)
+        return self._plan(filepath)
+
+    def update_barriers(self, horizontal_barriers, vertical_barriers, start=None, filepath='temp.png'):
+        """
+        Repair the plan after the barrier list changed.
+        :param start: new position of the start, when it moved since the last call
+        """
+        environment = cache.compile_environment({
+            "range_x": self.range_x, "range_y": self.range_y,
+            "horizontal_barriers": horizontal_barriers, "vertical_barriers": vertical_barriers})
+        return self._update(environment.Env, environment.grid(motions=True), start, filepath)
+
+    def update_obs(self, obs, start=None, filepath='temp.png'):
+        """Repair the plan after the obstacle cells changed, as set by Env.update_obs()."""
+        environment = Env(self.Env.x_range, self.Env.y_range,
+                          self.Env.horizontal_barriers, self.Env.vertical_barriers)
+        environment.update_obs(obs)
+        return self._update(environment, environment.compile(motions=True), start, filepath)
+
+    def _update(self, environment, grid, start, filepath):
+        if start is not None:
+            self.s_start = tuple(start)
+        # keys already in the queue are lower bounds shifted by the distance the start moved
+        self.km += self.heuristic(self.s_last, self.s_start)
+        self.s_last = self.s_start
+        old_cost = self.grid.motion_cost
+        self.Env = environment
+        self.grid = grid
+        for x, y, k in np.argwhere(old_cost != grid.motion_cost).tolist():
+            u = (x, y)
+            if u == self.s_goal:
+                continue
+            v = (x + grid.motions[k][0], y + grid.motions[k][1])
+            c_old, c_new = old_cost[x, y, k], grid.motion_cost[x, y, k]
+            g_v = self.g.get(v, math.inf)
+            if c_old > c_new:
+                self.rhs[u] = min(self.rhs.get(u, math.inf), c_new + g_v)
+            elif self.rhs.get(u, math.inf) == c_old + g_v:
+                self.rhs[u] = self._lookahead(u)
+            self.update_vertex(u)
+        return self._plan(filepath)
+
+    def _plan(self, filepath):
+        self.filepath = filepath
+        count, visited = self.compute_shortest_path()
+        path = self.extract_path()
+        result = {
+            "operation": count,
+            "storage": len(path),
+            "length": sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1)),
+            "status": self.status,
+            "path": path
+        }
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.Env)
+            self.plot.animation(path, list(visited), True, "D* Lite", self.filepath)
+        return result
+
+    def compute_shortest_path(self):
+        """
+        Expand inconsistent cells until the start is consistent and no queued key is smaller.
+        :return: (number of expansions, set of expanded cells)
+        """
+        count = 0
+        visited = set()
+        while self.U:
+            k1, k2, s = self.U[0]
+            if self.keys.get(s) != (k1, k2):
+                heapq.heappop(self.U)
+                continue
+            # cells on an optimal path tie with the start key up to rounding, and stopping
+            # before one of them leaves a stale g on the path, so ties are expanded too
+            if k1 > self.calculate_key(self.s_start)[0] + self.TOLERANCE and \
+                    self.rhs.get(self.s_start, math.inf) == self.g.get(self.s_start, math.inf):
+                break
+            heapq.heappop(self.U)
+            k_new = self.calculate_key(s)
+            if (k1, k2) < k_new:
+                self.keys[s] = k_new
+                heapq.heappush(self.U, (*k_new, s))
+                continue
+            del self.keys[s]
+            count += 1
+            visited.add(s)
+            g_old = self.g.get(s, math.inf)
+            rhs = self.rhs.get(s, math.inf)
+            if g_old > rhs:
+                self.g[s] = rhs
+                for u, c in self.predecessors(s):
+                    if u != self.s_goal and c + rhs < self.rhs.get(u, math.inf):
+                        self.rhs[u] = c + rhs
+                        self.update_vertex(u)
+            else:
+                self.g[s] = math.inf
+                for u, c in self.predecessors(s) + [(s, None)]:
+                    if u != self.s_goal and (c is None or self.rhs.get(u, math.inf) == c + g_old):
+                        self.rhs[u] = self._lookahead(u)
+                    self.update_vertex(u)
+        return count, visited
+
+    def update_vertex(self, s):
+        """Queue s when it is inconsistent (g != rhs), drop it from the queue otherwise."""
+        if self.g.get(s, math.inf) != self.rhs.get(s, math.inf):
+            key = self.calculate_key(s)
+            if self.keys.get(s) != key:
+                self.keys[s] = key
+                heapq.heappush(self.U, (*key, s))
+        else:
+            self.keys.pop(s, None)
+
+    def calculate_key(self, s):
+        k2 = min(self.g.get(s, math.inf), self.rhs.get(s, math.inf))
+        return k2 + self.heuristic(self.s_start, s) + self.km, k2
+
+    def _lookahead(self, s):
+        """rhs of s: the cheapest move out of s plus the g of the cell it lands on."""
+        return min((c + self.g.get(s_n, math.inf) for s_n, c in self.grid.successors(s)), default=math.inf)
+
+    def predecessors(self, s):
+        """(cell, cost) pairs of the legal moves that end in s."""
+        preds = []
+        for u in self.grid.motions:
+            s_p = (s[0] - u[0], s[1] - u[1])
+            c = self.grid.move_cost(s_p, s)
+            if c is not None and c < math.inf:
+                preds.append((s_p, c))
+        return preds
+
+    def extract_path(self):
+        """Follow the cheapest move from the start until the goal, [start] with status UNREACHABLE if there is none."""
+        if self.g.get(self.s_start, math.inf) == math.inf and self.s_start != self.s_goal:
+            self.status = UNREACHABLE
+            return [self.s_start]
+        self.status = FOUND
+        path = [self.s_start]
+        while path[-1] != self.s_goal:
+            s, _ = min(self.grid.successors(path[-1]), key=lambda n: n[1] + self.g.get(n[0], math.inf))
+            path.append(s)
+        return path
+
+    @staticmethod
+    def heuristic(p1, p2):
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
@@ -0,0 +1 @@
+from .distance_field import DistanceField, dijkstra
\ No newline at end of file
@@ -0,0 +1,106 @@
+import heapq
+import math
+import numpy as np
+from llmastar.env.search import plotting, cache
+from llmastar.pather.status import FOUND, UNREACHABLE
+
+
+class DistanceField:
+    """
+    One-to-many planner: a full Dijkstra distance field towards a goal cell, with the octile
+    move costs of the motion tables, answers every start on the same map and goal by descending
+    the field in O(path length). Fields are cached per (map, goal) and evicted least recently used
+    once they take more than max_bytes.
+    """
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self._fields = cache.LRUCache(max_bytes=max_bytes, size=lambda field: field.nbytes)
+
+    @property
+    def nbytes(self):
+        """Total size of the cached fields."""
+        return self._fields.nbytes
+
+    def searching(self, query, filepath='temp.png'):
+        self.filepath = filepath
+        self.s_start = tuple(query['start'])
+        self.s_goal = tuple(query['goal'])
+        self.environment = cache.compile_environment(query)
+        self.grid = self.environment.grid(motions=True)
+        cached = (self.environment.key, self.s_goal) in self._fields
+        field, expanded = self.field(query)
+
+        path = self.descend(field, self.s_start)
+        result = {
+            "operation": expanded,
+            "storage": len(path),
+            "length": sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1)),
+            "status": self.status,
+            "path": path,
+            "cached": cached
+        }
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.environment.Env)
+            self.plot.animation(path, [], True, "Distance Field", self.filepath)
+        return result
+
+    def field(self, query):
+        """
+        Distance field towards query['goal'] on the map of query, from the cache when possible.
+        :return: (array of shape (x_range, y_range) with inf where the goal is unreachable,
+                  number of cells expanded to build it, 0 on a cache hit)
+        """
+        environment = cache.compile_environment(query)
+        key = (environment.key, tuple(query['goal']))
+        field = self._fields.get(key)
+        if field is not None:
+            return field, 0
+        field, expanded = dijkstra(environment.grid(motions=True), tuple(query['goal']))
+        self._fields.put(key, field)
+        return field, expanded
+
+    def descend(self, field, start):
+        """
+        Follow the steepest descent of the field from start down to the goal at distance 0.
+        :return: the path, [start] with status UNREACHABLE when the field is inf at start
+        """
+        if not self.grid.in_bounds(start) or math.isinf(field[start]):
+            self.status = UNREACHABLE
+            return [start]
+        self.status = FOUND
+        path = [start]
+        s = start
+        while field[s] > 0:
+            s = min((s_n for s_n, _ in self.grid.successors(s)),
+                    key=lambda s_n: self.grid.move_cost(s, s_n) + field[s_n])
+            path.append(s)
+        return path
+
+
+def dijkstra(grid, goal):
+    """Cost of the cheapest path from every cell to goal, walking the motion tables backwards."""
+    dist = np.full((grid.x_range, grid.y_range), math.inf)
+    if not grid.in_bounds(goal):
+        dist.setflags(write=False)
+        return dist, 0
+    flat = dist.ravel()
+    y_range = grid.y_range
+    flat[grid.index(goal)] = 0
+    OPEN = [(0, goal)]
+    expanded = 0
+    while OPEN:
+        d, s = heapq.heappop(OPEN)
+        if d > flat[s[0] * y_range + s[1]]:
+            continue
+        expanded += 1
+        for u in grid.motions:
+            s_p = (s[0] - u[0], s[1] - u[1])
+            if not grid.in_bounds(s_p):
+                continue
+            new_cost = d + grid.move_cost(s_p, s)
+            i = s_p[0] * y_range + s_p[1]
+            if new_cost < flat[i]:
+                flat[i] = new_cost
+                heapq.heappush(OPEN, (new_cost, s_p))
+    dist.setflags(write=False)
+    return dist, expanded
@@ -0,0 +1,107 @@
+"""
+Heuristics selectable per search by name, or passed in as a function (s, goal) -> estimate.
+Octile and Euclidean distances never overestimate the cost of the 8-connected moves, whose
+cost is 1 straight and sqrt(2) diagonal, so A* returns optimal paths with them;
+octile is the tighter of the two. Manhattan and squared Euclidean distances overestimate,
+the search is greedier and its paths carry no guarantee.
+"""
+import math
+
+SQRT2 = math.sqrt(2)
+
+
+def octile(s, goal):
+    dx, dy = abs(s[0] - goal[0]), abs(s[1] - goal[1])
+    return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+
+def euclidean(s, goal):
+    return math.hypot(s[0] - goal[0], s[1] - goal[1])
+
+
+def manhattan(s, goal):
+    return abs(s[0] - goal[0]) + abs(s[1] - goal[1])
+
+
+def squared_euclidean(s, goal):
+    return (s[0] - goal[0]) ** 2 + (s[1] - goal[1]) ** 2
+
+
+HEURISTICS = {
+    'octile': octile,
+    'euclidean': euclidean,
+    'manhattan': manhattan,
+    'squared_euclidean': squared_euclidean,
+}
+ADMISSIBLE = {octile, euclidean}
+
+
+def register_heuristic(name, heuristic, admissible=False):
+    """Make heuristic selectable by name; admissible when it never overestimates the cost to the goal."""
+    HEURISTICS[name] = heuristic
+    if admissible:
+        ADMISSIBLE.add(heuristic)
+
+
+def get_heuristic(heuristic):
+    """Function (s, goal) -> estimate of a registered name, or heuristic itself when it is callable."""
+    if callable(heuristic):
+        return heuristic
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Invalid heuristic {heuristic!r}. Choose one of {sorted(HEURISTICS)} or pass a function.")
+    return HEURISTICS[heuristic]
+
+
+def is_admissible(heuristic):
+    """Registered as admissible, or a function that says so with an admissible attribute."""
+    heuristic = get_heuristic(heuristic)
+    return heuristic in ADMISSIBLE or getattr(heuristic, 'admissible', False)
+
+
+class WaypointHeuristic:
+    """
+    Waypoint-guided heuristic of LLM-A*: the base distance to the current waypoint plus the base
+    length of the chain through the remaining waypoints to the goal. The search calls reached(s)
+    on every expansion and the target moves on to the next waypoint once the current one is
+    expanded; reset() starts over at the first waypoint. Waypoints pull the search along them,
+    so paths are not guaranteed optimal; without waypoints it is the base heuristic.
+    """
+    def __init__(self, waypoints, base='euclidean'):
+        self.waypoints = [tuple(w) for w in waypoints]
+        self.base = get_heuristic(base)
+        self.admissible = not self.waypoints and is_admissible(self.base)
+        self.i = 0
+        # chain lengths from every waypoint to the goal of the last call
+        self._goal = None
+        self._chain = None
+
+    def reset(self):
+        self.i = 0
+
+    @property
+    def target(self):
+        return self.waypoints[self.i] if self.i < len(self.waypoints) else None
+
+    def reached(self, s):
+        """Move on to the next waypoint when s is the current one, True when the target changed."""
+        if s != self.target:
+            return False
+        self.i += 1
+        return True
+
+    def chain(self, goal):
+        """chain(goal)[i]: base length from waypoint i through the later ones to goal, kept until the next goal."""
+        if goal != self._goal:
+            nodes = self.waypoints + [goal]
+            chain = [0.0] * len(nodes)
+            for i in range(len(self.waypoints) - 1, -1, -1):
+                chain[i] = self.base(nodes[i], nodes[i + 1]) + chain[i + 1]
+            self._goal, self._chain = goal, chain
+        return self._chain
+
+    def __call__(self, s, goal):
+        target = self.target
+        if target is None:
+            return self.base(s, goal)
+        chain = self._chain if goal == self._goal else self.chain(goal)
+        return self.base(s, target) + chain[self.i]
@@ -0,0 +1 @@
+from .hpa_star import HPAStar, AbstractGraph
\ No newline at end of file
@@ -0,0 +1,283 @@
+import heapq
+import math
+from collections import defaultdict
+from llmastar.env.search import plotting, cache
+from llmastar.pather.status import FOUND, UNREACHABLE
+
+
+class AbstractGraph:
+    """
+    Cluster abstraction of a compiled map (Botea, Müller and Schaeffer, 2004). The grid is cut
+    into cluster_size x cluster_size clusters; every maximal run of open cells along the border
+    of two clusters gives one entrance, two when it is at least LONG_ENTRANCE cells long,
+    and each entrance is a pair of cells joined by a transition move. Diagonal moves across a
+    border that no run covers, and moves between the corners of diagonal clusters, become
+    transitions of their own, so the abstraction is connected exactly where the grid is.
+    The transitions are found once; the intra-cluster edges between the entrance cells of a
+    cluster are searched on first use of the cluster and then kept.
+    """
+    LONG_ENTRANCE = 6
+
+    def __init__(self, grid, cluster_size):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        # entrance cells of every cluster
+        self.nodes = defaultdict(set)
+        # cell -> [(cell in another cluster, cost)]
+        self.transitions = defaultdict(list)
+        # cluster -> {entrance cell: [(entrance cell, cost)]}
+        self._edges = dict()
+        self._find_transitions()
+
+    def cluster(self, s):
+        return s[0] // self.cluster_size, s[1] // self.cluster_size
+
+    def edges(self, c):
+        """
+        Intra-cluster edges of cluster c, searched the first time it is needed.
+        :return: ({entrance cell: [(entrance cell, cost)]}, cells expanded to build them, 0 when cached)
+        """
+        edges = self._edges.get(c)
+        if edges is not None:
+            return edges, 0
+        edges = dict()
+        expanded = 0
+        for s in self.nodes[c]:
+            dist, count = self.dijkstra(s, {c})
+            edges[s] = [(s_n, dist[s_n]) for s_n in self.nodes[c] if s_n != s and s_n in dist]
+            expanded += count
+        self._edges[c] = edges
+        return edges, expanded
+
+    def build(self):
+        """Search the intra-cluster edges of every cluster now instead of on first use."""
+        expanded = 0
+        for c in list(self.nodes):
+            expanded += self.edges(c)[1]
+        return expanded
+
+    def dijkstra(self, source, clusters, reverse=False):
+        """
+        Cost of the cheapest path inside the clusters from source to each of their cells,
+        or from each of their cells to source when reverse.
+        :return: (dict cell -> cost, number of cells expanded)
+        """
+        dist = {source: 0}
+        OPEN = [(0, source)]
+        expanded = 0
+        while OPEN:
+            d, s = heapq.heappop(OPEN)
+            if d > dist[s]:
+                continue
+            expanded += 1
+            for s_n, step in self.neighbors(s, clusters, reverse):
+                new_cost = d + step
+                if new_cost < dist.get(s_n, math.inf):
+                    dist[s_n] = new_cost
+                    heapq.heappush(OPEN, (new_cost, s_n))
+        return dist, expanded
+
+    def search(self, start, goal, clusters):
+        """
+        A* from start to goal without leaving the clusters.
+        :return: (path, number of cells expanded), path is empty when goal cannot be reached
+        """
+        g = {start: 0}
+        PARENT = {start: start}
+        OPEN = [(math.dist(start, goal), start)]
+        CLOSED = set()
+        while OPEN:
+            _, s = heapq.heappop(OPEN)
+            if s in CLOSED:
+                continue
+            CLOSED.add(s)
+            if s == goal:
+                path = [s]
+                while path[-1] != start:
+                    path.append(PARENT[path[-1]])
+                return path[::-1], len(CLOSED)
+            for s_n, step in self.neighbors(s, clusters):
+                new_cost = g[s] + step
+                if new_cost < g.get(s_n, math.inf):
+                    g[s_n] = new_cost
+                    PARENT[s_n] = s
+                    heapq.heappush(OPEN, (new_cost + math.dist(s_n, goal), s_n))
+        return [], len(CLOSED)
+
+    def neighbors(self, s, clusters, reverse=False):
+        """Legal (cell, cost) moves from s, or into s when reverse, that stay inside the clusters."""
+        if not reverse:
+            return [(s_n, step) for s_n, step in self.grid.successors(s) if self.cluster(s_n) in clusters]
+        preds = []
+        for u in self.grid.motions:
+            s_p = (s[0] - u[0], s[1] - u[1])
+            if self.cluster(s_p) not in clusters:
+                continue
+            step = self.grid.move_cost(s_p, s)
+            if step is not None and step < math.inf:
+                preds.append((s_p, step))
+        return preds
+
+    def _find_transitions(self):
+        size = self.cluster_size
+        x_range, y_range = self.grid.x_range, self.grid.y_range
+        for x in range(size, x_range, size):
+            for y0 in range(0, y_range, size):
+                ys = range(y0, min(y0 + size, y_range))
+                self._border([(x - 1, y) for y in ys], [(x, y) for y in ys])
+        for y in range(size, y_range, size):
+            for x0 in range(0, x_range, size):
+                xs = range(x0, min(x0 + size, x_range))
+                self._border([(x, y - 1) for x in xs], [(x, y) for x in xs])
+        for x in range(size, x_range, size):
+            for y in range(size, y_range, size):
+                self._transition((x - 1, y - 1), (x, y))
+                self._transition((x, y - 1), (x - 1, y))
+
+    def _border(self, a, b):
+        """Entrances between the facing border cells a[i] and b[i] of two adjacent clusters."""
+        runs = []
+        for i in range(len(a)):
+            if not self._open(a[i], b[i]):
+                continue
+            # a run holds cells that are connected along the border on both sides
+            if runs and runs[-1][-1] == i - 1 and self._open(a[i - 1], a[i]) and self._open(b[i - 1], b[i]):
+                runs[-1].append(i)
+            else:
+                runs.append([i])
+        run_of = dict()
+        for r, run in enumerate(runs):
+            for i in ([run[0], run[-1]] if len(run) >= self.LONG_ENTRANCE else [run[len(run) // 2]]):
+                self._transition(a[i], b[i])
+            run_of.update((i, r) for i in run)
+        for i in range(len(a)):
+            for j in (i - 1, i + 1):
+                if 0 <= j < len(b) and (i not in run_of or run_of.get(j) != run_of[i]):
+                    self._transition(a[i], b[j])
+
+    def _transition(self, s, s_n):
+        for u, v in ((s, s_n), (s_n, s)):
+            step = self._cost(u, v)
+            if step < math.inf:
+                self.nodes[self.cluster(u)].add(u)
+                self.nodes[self.cluster(v)].add(v)
+                self.transitions[u].append((v, step))
+
+    def _open(self, s, s_n):
+        """Is the move between s and s_n legal in both directions."""
+        return self._cost(s, s_n) < math.inf and self._cost(s_n, s) < math.inf
+
+    def _cost(self, s, s_n):
+        step = self.grid.move_cost(s, s_n)
+        return math.inf if step is None else step
+
+
+class HPAStar:
+    """
+    Hierarchical planner, HPA*. A query links its start and goal to the entrances of their
+    clusters, runs A* over the cached AbstractGraph of the map and refines only the abstract
+    path into cells, by A* restricted to the clusters that path crosses, so its cost follows the
+    length of the path rather than the area of the map. Paths are near optimal: the shortest
+    path through the corridor of clusters chosen at the abstract level.
+    Abstract graphs are cached per (map, cluster size), least recently used evicted.
+    """
+    def __init__(self, cluster_size=10, maxsize=8):
+        self.cluster_size = cluster_size
+        self._graphs = cache.LRUCache(maxsize)
+
+    def abstraction(self, query):
+        """AbstractGraph of the map of query, from the cache when possible."""
+        environment = cache.compile_environment(query)
+        return self._graphs.get((environment.key, self.cluster_size),
+                                lambda: AbstractGraph(environment.grid(motions=True), self.cluster_size))
+
+    def searching(self, query, filepath='temp.png'):
+        self.filepath = filepath
+        self.s_start = tuple(query['start'])
+        self.s_goal = tuple(query['goal'])
+        self.environment = cache.compile_environment(query)
+        cached = (self.environment.key, self.cluster_size) in self._graphs
+        self.graph = self.abstraction(query)
+
+        path, expanded = self.plan(self.s_start, self.s_goal)
+        result = {
+            "operation": expanded,
+            "storage": len(path),
+            "length": sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1)),
+            "status": self.status,
+            "path": path,
+            "cached": cached
+        }
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.environment.Env)
+            self.plot.animation(path, [], True, "HPA*", self.filepath)
+        return result
+
+    def plan(self, start, goal):
+        """
+        :return: (cell path, number of cells and abstract nodes expanded),
+                 [start] with status UNREACHABLE when there is no path
+        """
+        graph = self.graph
+        self.status = FOUND
+        if start == goal:
+            return [start], 0
+        if not (graph.grid.in_bounds(start) and graph.grid.in_bounds(goal)):
+            self.status = UNREACHABLE
+            return [start], 0
+        c_start, c_goal = graph.cluster(start), graph.cluster(goal)
+        from_start, expanded = graph.dijkstra(start, {c_start})
+        to_goal, count = graph.dijkstra(goal, {c_goal}, reverse=True)
+        expanded += count
+
+        abstract, count = self.abstract_search(start, goal, from_start, to_goal)
+        expanded += count
+        if not abstract:
+            self.status = UNREACHABLE
+            return [start], expanded
+        # one search through the clusters of the abstract path instead of one per cluster, so the
+        # refined path need not pass through the entrance cells themselves
+        path, count = graph.search(start, goal, {graph.cluster(s) for s in abstract})
+        return path, expanded + count
+
+    def abstract_search(self, start, goal, from_start, to_goal):
+        """
+        A* over the entrances from start to goal; start reaches the entrances of its cluster
+        at the costs in from_start, goal is reached from those of its cluster at the costs in to_goal.
+        :return: (list of abstract nodes from start to goal, empty when there is none, expanded count)
+        """
+        graph = self.graph
+        c_start, c_goal = graph.cluster(start), graph.cluster(goal)
+        g = {start: 0}
+        PARENT = {start: None}
+        OPEN = [(math.dist(start, goal), start)]
+        CLOSED = set()
+        expanded = 0
+        while OPEN:
+            _, s = heapq.heappop(OPEN)
+            if s in CLOSED:
+                continue
+            CLOSED.add(s)
+            if s == goal:
+                path = [s]
+                while PARENT[path[-1]] is not None:
+                    path.append(PARENT[path[-1]])
+                return path[::-1], expanded + len(CLOSED)
+            c = graph.cluster(s)
+            if s == start:
+                successors = [(s_n, from_start[s_n]) for s_n in graph.nodes[c_start] if s_n in from_start]
+                if c == c_goal and goal in from_start:
+                    successors.append((goal, from_start[goal]))
+            else:
+                edges, count = graph.edges(c)
+                expanded += count
+                successors = list(edges.get(s, []))
+                if c == c_goal and s in to_goal:
+                    successors.append((goal, to_goal[s]))
+            for s_n, step in successors + graph.transitions.get(s, []):
+                new_cost = g[s] + step
+                if new_cost < g.get(s_n, math.inf):
+                    g[s_n] = new_cost
+                    PARENT[s_n] = s
+                    heapq.heappush(OPEN, (new_cost + math.dist(s_n, goal), s_n))
+        return [], expanded + len(CLOSED)
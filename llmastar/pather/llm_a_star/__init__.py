@@ -1 +1,2 @@
-from .llm_a_star import LLMAStar
\ No newline at end of file
+from .llm_a_star import LLMAStar
+from .pipeline import LLMPipeline
@@ -1,32 +1,73 @@
 import json
 import math
+import re
 import heapq
-import threading  # برای پردازش موازی
+import time
+import asyncio
+import threading
 from llmastar.model.my_mistral import MyMistral
-from llmastar.env.search import env, plotting
-from llmastar.model import ChatGPT, Llama3
-from llmastar.utils import is_lines_collision, list_parse
+from llmastar.env.search import plotting, cache
+from llmastar.model import Backend, ChatGPT, Llama3, StandIn
+from llmastar.utils import list_parse
+from llmastar.pather.a_star.jps import JumpPointSearch, expand_path
+from llmastar.pather.a_star.anytime import ara_star
+from llmastar.pather.heuristics import WaypointHeuristic, get_heuristic, is_admissible
+from llmastar.pather.status import FOUND, UNREACHABLE, BUDGET_EXCEEDED
 from .prompt import *
 
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    """حلقه رویداد پس‌زمینه‌ای که درخواست‌های LLM حالت speculative روی آن اجرا و در صورت نیاز لغو می‌شوند"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+    return _loop
+
+
 class LLMAStar:
     """بهینه‌سازی الگوریتم LLM-A* برای سرعت بیشتر"""
 
     GPT_METHOD = "PARSE"
     GPT_LLMASTAR_METHOD = "LLM-A*"
+    # وزن اولیه هورسیتیک و کاهش آن در هر بهبود حالت anytime
+    ANYTIME_WEIGHT = 2.5
+    ANYTIME_STEP = 0.5
+    # تنظیمات تولید پاسخ هر مدل برای پرس و جوی LLM-A*
+    ASK_PARAMS = {'gpt': {'max_tokens': 1000}}
+
     def __init__(self, llm='gpt', prompt='standard'):
+        """
+        :param llm: 'gpt'، 'llama'، 'mistral' یا 'standin' (model.StandIn بدون GPU و شبکه)، یا نمونه‌ای از
+                    model.Backend؛ None برای جستجو بدون مدل که پاسخ LLM را از llm_response در searching
+                    می‌گیرد، مانند کارگرهای pipeline.LLMPipeline
+        """
         self.llm = llm
-        if llm == 'gpt':
-            self.model = ChatGPT()
+        self.parser = None
+        if llm is None:
+            self.model = None
+        elif isinstance(llm, Backend):
+            self.model = llm
+            self.llm = llm.NAME
+        elif llm == 'gpt':
+            self.model = ChatGPT(method=self.GPT_LLMASTAR_METHOD, sysprompt="", example=None)
         elif llm == 'llama':
             self.model = Llama3()
         elif llm == 'mistral':
-            from llmastar.model.my_mistral import MyMistral
             self.model = MyMistral(prompt=prompt)
+        elif llm == 'standin':
+            self.model = StandIn()
         else:
-            raise ValueError("Invalid LLM model. Choose 'gpt', 'llama', or 'mistral'.")
+            raise ValueError("Invalid LLM model. Choose 'gpt', 'llama', 'mistral', 'standin' or a Backend.")
         
         assert prompt in ['standard', 'cot', 'repe'], "نوع پرس و جو معتبر نیست. 'standard', 'cot', یا 'repe' را انتخاب کنید."
         self.prompt = prompt
+        self.jps = None
+        self._heuristic = get_heuristic('octile')
     def get_llm_model(llm='mistral', prompt='standard'):
         if llm == 'mistral':
             return MyMistral(prompt=prompt)
@@ -36,155 +77,383 @@ class LLMAStar:
         """پارس کردن ورودی با استفاده از مدل LLM مشخص شده"""
         if isinstance(query, str):
             if self.llm == 'gpt':
-                response = self.parser.chat(query)
+                if self.parser is None:
+                    self.parser = ChatGPT(method=self.GPT_METHOD, sysprompt=sysprompt_parse,
+                                          example=example_parse, cache=self.model.cache)
+                response = self.parser.chat(query, template='parse')
                 return json.loads(response)
             elif self.llm == 'llama':
-                response = self.model.ask(parse_llama.format(query=query))
+                response = self.model.ask(parse_llama.format(query=query), template='parse')
                 return json.loads(response)
         return query
 
     def _initialize_parameters(self, input_data):
         """مقداردهی اولیه به پارامترهای محیط از داده‌های ورودی"""
-        self.s_start = tuple(input_data['start'])
-        self.s_goal = tuple(input_data['goal'])
+        self._initialize_environment(input_data)
+        self._initialize_query(input_data['start'], input_data['goal'])
+
+    def _initialize_environment(self, input_data):
+        """ساخت محیط، نقشه کامپایل‌شده و بررسی برخورد؛ برای همه پرس و جوهای یک نقشه مشترک است"""
+        self.environment = cache.compile_environment(input_data)
         self.horizontal_barriers = input_data['horizontal_barriers']
         self.vertical_barriers = input_data['vertical_barriers']
-        self.range_x = input_data['range_x']
-        self.range_y = input_data['range_y']
-        self.Env = env.Env(self.range_x[1], self.range_y[1], self.horizontal_barriers, self.vertical_barriers)
-        self.plot = plotting.Plotting(self.s_start, self.s_goal, self.Env)
-        self.range_x[1] -= 1
-        self.range_y[1] -= 1
+        self.range_x = [input_data['range_x'][0], input_data['range_x'][1] - 1]
+        self.range_y = [input_data['range_y'][0], input_data['range_y'][1] - 1]
+        self.Env = self.environment.Env
+        self.grid = self.environment.grid(motions=self.precompute_motions)
+        self.collider = self.environment.collider
         self.u_set = self.Env.motions
         self.obs = self.Env.obs
+
+    def _initialize_query(self, start, goal):
+        """مقداردهی اولیه حالت جستجو برای یک جفت شروع و هدف"""
+        self.s_start = tuple(start)
+        self.s_goal = tuple(goal)
         self.OPEN = []
         self.CLOSED = set()
         self.PARENT = dict()
         self.g = dict()
 
-    def _initialize_llm_paths(self):
-        """مقداردهی اولیه مسیرها با استفاده از پیشنهادات LLM"""
-        start, goal = list(self.s_start), list(self.s_goal)
-        query = self._generate_llm_query(start, goal)
-
-        if self.llm == 'gpt':
-            response = self.model.ask(prompt=query, max_tokens=1000)
-        elif self.llm == 'llama':
-            response = self.model.ask(prompt=query)
-        nodes = list_parse(response)
-        self.target_list = self._filter_valid_nodes(nodes)
+    def _initialize_llm_paths(self, response=None):
+        """مقداردهی اولیه مسیرها با استفاده از پیشنهادات LLM؛ response پاسخ از پیش گرفته‌شده مدل است"""
+        if response is None:
+            response = self.ask(self._generate_llm_query(list(self.s_start), list(self.s_goal)))
+        # list_parse پیام خطا را به صورت رشته و برای پاسخ بدون لیست [[0, 0], [0, 0]] را برمی‌گرداند، که نقطه میانی نیست
+        nodes = list_parse(response) if re.search(r'\[\[.*?\]\]', response, re.DOTALL) else []
+        self.target_list = self._repair_waypoints(nodes if isinstance(nodes, list) else [])
 
         if not self.target_list or self.target_list[0] != self.s_start:
             self.target_list.insert(0, self.s_start)
         if not self.target_list or self.target_list[-1] != self.s_goal:
             self.target_list.append(self.s_goal)
 
-        self.i = 1
-        self.s_target = self.target_list[1]
-
-    def _generate_llm_query(self, start, goal):
-        """ساخت پرس و جو برای LLM"""
-        if self.llm == 'gpt':
-            return gpt_prompt[self.prompt].format(start=start, goal=goal,
-                                horizontal_barriers=self.horizontal_barriers,
-                                vertical_barriers=self.vertical_barriers)
-        elif self.llm == 'llama':
-            return llama_prompt[self.prompt].format(start=start, goal=goal,
-                                    horizontal_barriers=self.horizontal_barriers,
-                                    vertical_barriers=self.vertical_barriers)
-
-    def _filter_valid_nodes(self, nodes):
-        """فیلتر کردن گره‌های نامعتبر براساس محدودیت‌های محیطی"""
-        return [(node[0], node[1]) for node in nodes
-                if (node[0], node[1]) not in self.obs
-                and self.range_x[0] + 1 < node[0] < self.range_x[1] - 1
-                and self.range_y[0] + 1 < node[1] < self.range_y[1] - 1]
-
-    def searching(self, query, filepath='temp.png'):
-        """الگوریتم A* جستجو با بهینه‌سازی‌های مختلف"""
-        self.filepath = filepath
+    def _generate_llm_query(self, start, goal, horizontal_barriers=None, vertical_barriers=None):
+        """ساخت پرس و جو برای LLM؛ موانع به طور پیش‌فرض موانع محیط مقداردهی‌شده هستند"""
+        prompts = gpt_prompt if self.llm == 'gpt' else llama_prompt
+        return prompts[self.prompt].format(
+            start=start, goal=goal,
+            horizontal_barriers=self.horizontal_barriers if horizontal_barriers is None else horizontal_barriers,
+            vertical_barriers=self.vertical_barriers if vertical_barriers is None else vertical_barriers)
+
+    def llm_prompt(self, query):
+        """پرس و جوی LLM برای دیکشنری query با start، goal و موانع، بدون ساختن محیط"""
+        return self._generate_llm_query(list(query['start']), list(query['goal']),
+                                        query['horizontal_barriers'], query['vertical_barriers'])
+
+    def ask(self, prompt):
+        """پاسخ مدل به prompt، از کش پاسخ‌ها در صورت امکان"""
+        return self.model.ask(prompt, template=self.prompt, **self.ASK_PARAMS.get(self.llm, {}))
+
+    async def ask_async(self, prompt):
+        """نسخه غیرهمزمان ask که حلقه رویداد را در انتظار پاسخ مدل مسدود نمی‌کند"""
+        return await self.model.ask_async(prompt, template=self.prompt, **self.ASK_PARAMS.get(self.llm, {}))
+
+    def _repair_waypoints(self, nodes):
+        """
+        ترمیم نقاط پیشنهادی LLM به جای حذف آن‌ها: نقطه‌ای که روی مانع یا بیرون از نقشه افتاده به نزدیک‌ترین خانه آزاد
+        جدول nearest نقشه کامپایل‌شده منتقل می‌شود (llm_repaired)؛ مختصات بیرون از نقشه پیش از آن به درون نقشه محدود
+        می‌شوند. نقطه‌ای که عدد نیست، یا خودش یا خانه جایگزینش در مؤلفه همبندی جدا از شروع است، حذف می‌شود
+        (llm_dropped)، چون هیچ مسیری از شروع به آن نمی‌رسد
+        """
+        grid = self.environment.grid(components=True, nearest=True)
+        component = grid.component(self.s_start)
+        waypoints = []
+        for node in nodes:
+            try:
+                x, y = node
+                s = (int(round(x)), int(round(y)))
+            except (TypeError, ValueError, OverflowError):
+                self.llm_dropped += 1
+                continue
+            repaired = not grid.in_bounds(s) or not grid.passable[s]
+            if repaired:
+                s = grid.nearest_passable(s)
+            if s is None or grid.component(s) != component:
+                self.llm_dropped += 1
+                continue
+            self.llm_repaired += repaired
+            if not waypoints or waypoints[-1] != s:
+                waypoints.append(s)
+        return waypoints
+
+    def searching(self, query, filepath='temp.png', precompute_motions=False, use_jps=False,
+                  weight=None, anytime=False, max_seconds=None, max_expansions=None, heuristic='octile',
+                  llm_response=None, speculative=False):
+        """
+        الگوریتم A* جستجو با بهینه‌سازی‌های مختلف
+        :param precompute_motions: جستجو روی جدول حرکت‌های نقشه که در اولین پرس و جو ساخته می‌شود، به جای آزمون
+                                   برخورد هر حرکت با موانع. در هر دو حالت مؤلفه‌های همبند نقشه برچسب می‌خورند، در
+                                   نقشه‌های هم‌راستا با شبکه تنها از روی خانه‌های آزاد، و هدفی که از شروع در دسترس
+                                   نیست بدون جستجو و بدون فراخوانی LLM با مسیر [start] UNREACHABLE می‌شود
+        :param heuristic: نام یکی از heuristics.HEURISTICS یا تابع (s, goal) -> تخمین، فاصله پایه
+                          heuristics.WaypointHeuristic روی نقاط میانی پیشنهادی LLM
+        :param weight: ضریب هورسیتیک (A* وزن‌دار)؛ در حالت anytime ضریب اولیه، پیش‌فرض ANYTIME_WEIGHT. کران
+                       تنها با هورسیتیک پذیرفتنی گزارش می‌شود و در غیر این صورت None است
+        :param anytime: ARA*، بهبود مسیر اول تا رسیدن کران به ۱ یا پایان بودجه؛ این حالت و weight بدون پرسیدن از LLM
+                        اجرا می‌شوند
+        :param max_seconds, max_expansions: بودجه زمان و گسترش در همه حالت‌ها؛ با پایان آن جستجو با وضعیت
+                                            BUDGET_EXCEEDED و مسیر تا نزدیک‌ترین گره گسترش‌یافته به هدف متوقف می‌شود
+        :param llm_response: پاسخ از پیش گرفته‌شده مدل به llm_prompt(query)؛ در این صورت مدل فراخوانی نمی‌شود
+        :param speculative: جستجو بی‌درنگ با هورسیتیک پایه آغاز می‌شود و درخواست LLM در پس‌زمینه می‌ماند؛ نقاط میانی
+                            با رسیدن پاسخ با یک re-key لیست باز به کار گرفته می‌شوند و اگر هدف زودتر پیدا شود درخواست
+                            لغو می‌شود (llm_cancelled در نتیجه)، پس تأخیر برابر بیشینه تأخیر مدل و جستجو است نه مجموع آن‌ها
+        :return: دیکشنری نتیجه با status (FOUND، UNREACHABLE یا BUDGET_EXCEEDED) و path
+        """
+        self.precompute_motions = precompute_motions
         input_data = self._parse_query(query)
         self._initialize_parameters(input_data)
-        self._initialize_llm_paths()
+        return self._search(filepath, use_jps, weight, anytime, max_seconds, max_expansions, heuristic,
+                            llm_response, speculative)
+
+    def searching_batch(self, environment, start_goal, filepaths=None, precompute_motions=True, use_jps=False,
+                        weight=None, anytime=False, max_seconds=None, max_expansions=None, heuristic='octile'):
+        """
+        اجرای چند پرس و جوی شروع/هدف روی یک نقشه؛ محیط، نقشه کامپایل‌شده و جدول حرکت‌ها
+        یک بار ساخته می‌شوند و بین همه پرس و جوها مشترک هستند
+        :param environment: دیکشنری با range_x، range_y، horizontal_barriers و vertical_barriers
+        :param start_goal: فهرست [start, goal, ...] مانند مجموعه داده
+        :param filepaths: فهرست اختیاری مسیر تصویر برای هر پرس و جو
+        :return: فهرست نتایج به ترتیب start_goal
+        """
+        self.precompute_motions = precompute_motions
+        self._initialize_environment(environment)
+        results = []
+        for i, sg in enumerate(start_goal):
+            self._initialize_query(sg[0], sg[1])
+            results.append(self._search(filepaths[i] if filepaths else None, use_jps,
+                                        weight, anytime, max_seconds, max_expansions, heuristic))
+        return results
+
+    def _search(self, filepath, use_jps, weight=None, anytime=False, max_seconds=None, max_expansions=None,
+                heuristic='octile', llm_response=None, speculative=False):
+        """جستجوی A* هدایت‌شده با LLM برای پرس و جوی مقداردهی‌شده"""
+        self.filepath = filepath
+        self.use_jps = use_jps
+        # پرشی از نقطه میانی گذشته و f گره‌های لیست باز پس از گسترش دوباره حساب می‌شود
+        self._passed = False
+        self.status = FOUND
+        self.llm_cancelled = False
+        self.llm_repaired = 0
+        self.llm_dropped = 0
+        self.max_expansions = max_expansions
+        self.deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        self._heuristic = get_heuristic(heuristic)
+        if hasattr(self._heuristic, 'reset'):
+            self._heuristic.reset()
+        if not self.environment.grid(components=True).connected(self.s_start, self.s_goal):
+            # شروع و هدف در دو مؤلفه جدا هستند و هیچ جستجویی آن‌ها را به هم نمی‌رساند
+            self.status = UNREACHABLE
+            self.target_list = []
+            return self._result([self.s_start], None)
+        pending = None
+        if speculative and llm_response is None:
+            if weight is not None or anytime:
+                raise ValueError("speculative needs the plain search, without weight or anytime.")
+            # درخواست در پس‌زمینه؛ تا رسیدن پاسخ فقط شروع و هدف نقاط مسیر هستند
+            prompt = self._generate_llm_query(list(self.s_start), list(self.s_goal))
+            pending = asyncio.run_coroutine_threadsafe(self.ask_async(prompt), _event_loop())
+            self.target_list = [self.s_start, self.s_goal]
+        elif weight is not None or anytime:
+            # کران حالت وزن‌دار از هورسیتیک پایه می‌آید و نقاط میانی در آن به کار نمی‌روند، پس از مدل پرسیده نمی‌شود
+            self.target_list = [self.s_start, self.s_goal]
+        else:
+            self._initialize_llm_paths(llm_response)
+        if weight is not None or anytime:
+            # نقاط پرش به والد جستجو وابسته‌اند، پس حالت وزن‌دار روی همسایه‌های عادی اجرا می‌شود
+            self.use_jps = False
+            if weight is None:
+                weight = self.ANYTIME_WEIGHT
+            path, expanded, self.g, bound, exhausted = ara_star(
+                self.s_start, self.s_goal, self._successors, self.heuristic,
+                lambda s: self._euclidean_distance(s, self.s_goal),
+                max(1.0, weight), self.ANYTIME_STEP, anytime, max_seconds, max_expansions)
+            self.CLOSED = expanded
+            if path[-1] != self.s_goal:
+                self.status = BUDGET_EXCEEDED if exhausted else UNREACHABLE
+            # کران تنها با هورسیتیک پذیرفتنی برقرار است
+            return self._result(path, bound if is_admissible(self._heuristic) else None)
+        if pending is None and not hasattr(self._heuristic, 'reached'):
+            # هورسیتیک LLM-A*: فاصله تا نقطه میانی فعلی به‌علاوه طول زنجیره نقاط باقی‌مانده تا هدف
+            self._heuristic = WaypointHeuristic(self.target_list[1:-1], base=self._heuristic)
+        if use_jps:
+            grid = self.Env.compile(motions=True)
+            if self.jps is None or self.jps.grid is not grid:
+                self.jps = JumpPointSearch(grid)
         
         self.PARENT[self.s_start] = self.s_start
         self.g[self.s_start] = 0
         heapq.heappush(self.OPEN, (self.f_value(self.s_start), self.s_start))
+        count = 0
+        exhausted = False
 
         while self.OPEN:
+            if self._over_budget(count):
+                exhausted = True
+                break
+            count += 1
+            if pending is not None and pending.done():
+                self._adopt_waypoints(pending)
+                pending = None
             _, s = heapq.heappop(self.OPEN)
+            if s in self.CLOSED:
+                continue
             self.CLOSED.add(s)
 
             if s == self.s_goal:
                 break
+            if self._reached(s):
+                self._rekey()
+            self._expand(s)
 
-            # استفاده از چند رشته‌ای برای بهینه‌سازی انتخاب همسایگان
-            threads = []
-            for s_n in self.get_neighbor(s):
-                if s_n in self.CLOSED:
-                    continue
-
-                new_cost = self.g[s] + self.cost(s, s_n)
-                if s_n not in self.g:
-                    self.g[s_n] = math.inf
-
-                if new_cost < self.g[s_n]:
-                    self.g[s_n] = new_cost
-                    self.PARENT[s_n] = s
-                    thread = threading.Thread(target=self._update_queue, args=(s_n,))
-                    threads.append(thread)
-                    thread.start()
+        if pending is not None:
+            # جستجو پیش از پاسخ مدل تمام شد
+            pending.cancel()
+            self.llm_cancelled = True
+        # کران زیر‌بهینگی مسیر، None وقتی هورسیتیک تضمینی نمی‌دهد
+        bound = 1.0 if is_admissible(self._heuristic) else None
+        if self.s_goal in self.CLOSED:
+            path = self.extract_path(self.PARENT)
+        else:
+            path = self.extract_path(self.PARENT, self._partial(exhausted))
+        if self.use_jps:
+            path = expand_path(path)
+        return self._result(path, bound)
 
-            for thread in threads:
-                thread.join()
+    def _adopt_waypoints(self, pending):
+        """
+        به کار گرفتن نقاط میانی پاسخی که در میانه جستجوی speculative رسیده: هورسیتیک نقاط میانی از نقطه‌ای
+        که هنوز بسته نشده شروع می‌شود و لیست باز با یک heapify دوباره کلید می‌خورد، بدون شروع دوباره جستجو
+        """
+        if pending.cancelled() or pending.exception() is not None or hasattr(self._heuristic, 'reached'):
+            return
+        self._initialize_llm_paths(pending.result())
+        self._heuristic = WaypointHeuristic(self.target_list[1:-1], base=self._heuristic)
+        while self._heuristic.target in self.CLOSED:
+            self._heuristic.reached(self._heuristic.target)
+        self._rekey()
 
-        path = self.extract_path(self.PARENT)
+    def _result(self, path, bound):
+        """ساخت دیکشنری نتیجه و رسم مسیر"""
         visited = list(self.CLOSED)
         result = {
             "operation": len(self.CLOSED),
             "storage": len(self.g),
             "length": sum(self._euclidean_distance(path[i], path[i+1]) for i in range(len(path)-1)),
-            "llm_output": self.target_list
+            "bound": bound if self.status == FOUND else None,
+            "status": self.status,
+            "path": path,
+            "llm_output": self.target_list,
+            "llm_cancelled": self.llm_cancelled,
+            "llm_repaired": self.llm_repaired,
+            "llm_dropped": self.llm_dropped
         }
-        self.plot.animation(path, visited, True, "LLM-A*", self.filepath)
+        if self.filepath:
+            self.plot = plotting.Plotting(self.s_start, self.s_goal, self.Env)
+            self.plot.animation(path, visited, True, "LLM-A*", self.filepath)
         return result
 
     @staticmethod
     def _euclidean_distance(p1, p2):
         return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-    def _update_queue(self, s_n):
-        """به روز رسانی لیست باز به صورت بهینه"""
-        heapq.heappush(self.OPEN, (self.f_value(s_n), s_n))
+    def _expand(self, s):
+        """
+        گسترش s: همه همسایه‌ها با هزینه‌شان در یک گذر از جدول حرکت‌های نقشه کامپایل‌شده (یا نقاط پرش)
+        خوانده می‌شوند و همسایه‌هایی که g آن‌ها بهتر شده مستقیماً در لیست باز قرار می‌گیرند
+        """
+        OPEN, CLOSED, PARENT, g = self.OPEN, self.CLOSED, self.PARENT, self.g
+        g_s = g[s]
+        for s_n, step in self._successors(s):
+            if s_n in CLOSED and not self.use_jps:
+                continue
+            new_cost = g_s + step
+            if s_n not in g:
+                g[s_n] = math.inf
+            if new_cost < g[s_n]:
+                # نقاط پرش فقط جهت‌های باز مانده از والد را می‌پیمایند، پس با والد بهتر دوباره باز می‌شوند
+                CLOSED.discard(s_n)
+                g[s_n] = new_cost
+                PARENT[s_n] = s
+                heapq.heappush(OPEN, (new_cost + self.heuristic(s_n), s_n))
+        if self._passed:
+            self._passed = False
+            self._rekey()
+
+    def _successors(self, s):
+        """
+        جفت‌های (همسایه، هزینه) گره s؛ در حالت JPS نقاط پرش، که نقطه میانی فعلی هم یکی از آن‌هاست. پرشی که از
+        نقطه میانی فعلی بگذرد به آن رسیده است، چون نقاط پرش خانه‌های میان خود را گسترش نمی‌دهند؛ آن‌گاه پرش‌ها
+        از s در همه جهت‌ها به سوی نقطه میانی بعدی تکرار می‌شوند. این کار زنجیره نقاط میانی را درست می‌کند و صرفه‌جویی
+        چندانی ندارد: در benchmarks/llm_waypoints.py --use-jps با نقاط میانی درست گسترش‌ها از ۱۶٫۵ به ۱۰٫۳ می‌رسند، که
+        هنوز بیش از ۸٫۸ گسترش JPS بدون نقطه میانی است، و زمان هر پرس و جو از ۱٫۰ به ۱٫۸ میلی‌ثانیه می‌رسد
+        """
+        if self.use_jps:
+            parent, successors = self.PARENT[s], []
+            while True:
+                target = getattr(self._heuristic, 'target', None)
+                successors += self.jps.successors(s, parent, self.s_goal, target)
+                if not (self.jps.passed and self._reached(target)):
+                    return successors
+                self._passed, parent = True, s
+        return [(s_n, self.cost(s, s_n)) for s_n in self.get_neighbor(s)]
 
     def get_neighbor(self, s):
         """یافتن همسایگان گره s"""
-        return [(s[0] + u[0], s[1] + u[1]) for u in self.u_set]
+        if self.grid.motion_mask is not None:
+            return [s_n for s_n, _ in self.grid.successors(s)]
+        neighbors = [(s[0] + u[0], s[1] + u[1]) for u in self.u_set]
+        return [n for n in neighbors if self.grid.is_free(n)]
 
     def cost(self, s_start, s_goal):
         """محاسبه هزینه حرکت از s_start به s_goal"""
+        if self.grid.motion_mask is not None:
+            step = self.grid.move_cost(s_start, s_goal)
+            if step is not None:
+                return step
         return math.inf if self.is_collision(s_start, s_goal) else math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
 
     def is_collision(self, s_start, s_end):
         """بررسی برخورد خط (s_start, s_end) با موانع"""
-        line1 = [s_start, s_end]
-        return any(is_lines_collision(line1, [[h[1], h[0]], [h[2], h[0]]]) for h in self.horizontal_barriers) or \
-               any(is_lines_collision(line1, [[v[0], v[1]], [v[0], v[2]]]) for v in self.vertical_barriers) or \
-               any(is_lines_collision(line1, [[x, self.range_y[0]], [x, self.range_y[1]]]) for x in self.range_x) or \
-               any(is_lines_collision(line1, [[self.range_x[0], y], [self.range_x[1], y]]) for y in self.range_y)
+        return self.collider.is_collision(s_start, s_end)
 
     def f_value(self, s):
         """محاسبه f-value برای گره s"""
         return self.g[s] + self.heuristic(s)
 
-    def extract_path(self, PARENT):
-        """استخراج مسیر بر اساس والدین"""
-        path = [self.s_goal]
+    def _over_budget(self, count):
+        """True وقتی تعداد گسترش‌ها یا زمان جستجو به بودجه آن رسیده باشد"""
+        return (self.max_expansions is not None and count >= self.max_expansions) or \
+            (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+    def _partial(self, exhausted):
+        """
+        انتهای بهترین مسیر ناقص وقتی هدف نرسیده: نزدیک‌ترین گره گسترش‌یافته به هدف، یا شروع اگر گرهی
+        گسترش نیافته؛ وضعیت را بر اساس علت توقف جستجو تنظیم می‌کند
+        """
+        self.status = BUDGET_EXCEEDED if exhausted else UNREACHABLE
+        return min(self.CLOSED, key=lambda s: self._euclidean_distance(s, self.s_goal), default=self.s_start)
+
+    def extract_path(self, PARENT, s_end=None):
+        """استخراج مسیر از شروع تا s_end، به طور پیش‌فرض هدف، بر اساس والدین"""
+        path = [self.s_goal if s_end is None else s_end]
         while path[-1] != self.s_start:
             path.append(PARENT[path[-1]])
         return path[::-1]
 
     def heuristic(self, s):
-        """محاسبه مقدار هورسیتیک برای گره s"""
-        return math.hypot(self.s_goal[0] - s[0], self.s_goal[1] - s[1])
+        """محاسبه مقدار هورسیتیک انتخاب‌شده برای گره s"""
+        return self._heuristic(s, self.s_goal)
+
+    def _reached(self, s):
+        """اطلاع گسترش s به هورسیتیک حالت‌دار مانند heuristics.WaypointHeuristic؛ True اگر تغییر کرد"""
+        reached = getattr(self._heuristic, 'reached', None)
+        return reached is not None and reached(s)
+
+    def _rekey(self):
+        """
+        محاسبه دوباره f گره‌های لیست باز پس از تغییر هورسیتیک و یک heapify؛ ورودی‌های کهنه گره‌های بسته
+        و تکراری‌ها حذف می‌شوند، چون f تازه از g فعلی هر گره به دست می‌آید
+        """
+        self.OPEN = [(self.f_value(s), s) for s in dict.fromkeys(s for _, s in self.OPEN if s not in self.CLOSED)]
+        heapq.heapify(self.OPEN)
 
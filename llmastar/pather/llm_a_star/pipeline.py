@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .llm_a_star import LLMAStar
+
+# برنامه‌ریزهای بدون مدل هر رشته کارگر، به ازای نوع پرس و جو
+_local = threading.local()
+
+
+def search_with_response(prompt, query, response, options):
+    """
+    جستجوی LLM-A* برای query با پاسخ از پیش گرفته‌شده مدل، روی یک LLMAStar بدون مدل که هر رشته یا
+    پردازه کارگر یک بار می‌سازد و برای پرس و جوهای بعدی نگه می‌دارد
+    """
+    planners = getattr(_local, 'planners', None)
+    if planners is None:
+        planners = _local.planners = {}
+    if prompt not in planners:
+        planners[prompt] = LLMAStar(llm=None, prompt=prompt)
+    return planners[prompt].searching(query, filepath=None, llm_response=response, **options)
+
+
+class LLMPipeline:
+    """
+    ارزیابی LLM-A* روی تعداد زیادی پرس و جو با asyncio: حداکثر max_in_flight درخواست LLM همزمان در جریان
+    هستند و هر پاسخ به محض رسیدن به استخر workers کارگر جستجو سپرده می‌شود، پس تأخیر مدل با زمان
+    پردازنده جستجوها هم‌پوشانی دارد. کارگرها رشته هستند، یا پردازه وقتی processes تنظیم شده باشد تا
+    جستجوها واقعاً موازی اجرا شوند.
+    """
+    def __init__(self, planner, max_in_flight=8, workers=1, processes=False):
+        """
+        :param planner: LLMAStar با مدلی که ask_async دارد؛ فقط برای ساخت پرس و جو و پرسیدن از مدل به کار می‌رود
+        """
+        self.planner = planner
+        self.max_in_flight = max_in_flight
+        self.workers = workers
+        self.processes = processes
+        # بیشترین تعداد درخواست‌های همزمان و مجموع زمان انتظار برای مدل در آخرین اجرا
+        self.peak_in_flight = 0
+        self.llm_seconds = 0.0
+
+    async def run(self, queries, **options):
+        """
+        :param queries: دیکشنری‌های پرس و جو مانند searching
+        :param options: پارامترهای searching مانند precompute_motions یا use_jps
+        :return: فهرست نتایج به ترتیب queries
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        in_flight = 0
+        self.peak_in_flight = 0
+        self.llm_seconds = 0.0
+        executor = (ProcessPoolExecutor if self.processes else ThreadPoolExecutor)(self.workers)
+
+        async def solve(query):
+            nonlocal in_flight
+            prompt = self.planner.llm_prompt(query)
+            async with semaphore:
+                in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, in_flight)
+                t0 = time.perf_counter()
+                try:
+                    response = await self.planner.ask_async(prompt)
+                finally:
+                    self.llm_seconds += time.perf_counter() - t0
+                    in_flight -= 1
+            return await loop.run_in_executor(executor, search_with_response, self.planner.prompt, query,
+                                              response, options)
+
+        with executor:
+            return await asyncio.gather(*(solve(query) for query in queries))
+
+    def evaluate(self, queries, **options):
+        """run در یک حلقه رویداد تازه، برای فراخوانی از کد همزمان"""
+        return asyncio.run(self.run(queries, **options))
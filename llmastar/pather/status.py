@@ -0,0 +1,4 @@
+# "status" of a search result
+FOUND = 'found'
+UNREACHABLE = 'unreachable'
+BUDGET_EXCEEDED = 'budget_exceeded'
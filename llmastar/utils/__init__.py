@@ -1,2 +1,3 @@
 from .utils import *
-from .filter import *
\ No newline at end of file
+from .filter import *
+from .collision import *
\ No newline at end of file
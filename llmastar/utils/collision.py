@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class SegmentCollider:
+    """
+    Collision test of a segment against the axis-aligned barriers and the map border.
+    Gives the same answer as is_lines_collision (touching counts as a collision)
+    using exact integer arithmetic instead of building shapely geometries.
+    Horizontal barriers are [y, x_start, x_end], vertical barriers are [x, y_start, y_end].
+    """
+    def __init__(self, horizontal_barriers, vertical_barriers, range_x, range_y):
+        # every segment is stored as (fixed coordinate, low, high); zero-length barriers
+        # never collide with shapely and hold no cells in Env.obs_map(), so they are dropped
+        self.horizontal = [(h[0], min(h[1], h[2]), max(h[1], h[2])) for h in horizontal_barriers if h[1] != h[2]]
+        self.vertical = [(v[0], min(v[1], v[2]), max(v[1], v[2])) for v in vertical_barriers if v[1] != v[2]]
+        self.horizontal += [(y, min(range_x), max(range_x)) for y in range_y]
+        self.vertical += [(x, min(range_y), max(range_y)) for x in range_x]
+        self._h = np.array(self.horizontal, dtype=float).reshape(-1, 3)
+        self._v = np.array(self.vertical, dtype=float).reshape(-1, 3)
+
+    def is_collision(self, s_start, s_end):
+        x1, y1 = s_start
+        x2, y2 = s_end
+        for c, lo, hi in self.horizontal:
+            if _crosses(x1, y1, x2, y2, c, lo, hi):
+                return True
+        for c, lo, hi in self.vertical:
+            if _crosses(y1, x1, y2, x2, c, lo, hi):
+                return True
+        return False
+
+    def collisions(self, s_start, s_ends):
+        """
+        Vectorised is_collision, returns a boolean array with one entry per end.
+        s_start is either a single point shared by all ends or one start per end.
+        """
+        q = np.asarray(s_ends, dtype=float).reshape(-1, 2)
+        p = np.asarray(s_start, dtype=float).reshape(-1, 2)
+        x1, y1 = p[:, 0:1], p[:, 1:2]
+        x2, y2 = q[:, 0:1], q[:, 1:2]
+        hit = _crosses_many(x1, y1, x2, y2, self._h)
+        hit |= _crosses_many(y1, x1, y2, x2, self._v)
+        return hit
+
+
+def _crosses(x1, y1, x2, y2, c, lo, hi):
+    """Does segment (x1, y1)-(x2, y2) touch the segment y = c, lo <= x <= hi."""
+    if y1 == y2:
+        return y1 == c and min(x1, x2) <= hi and max(x1, x2) >= lo
+    if (y1 - c) * (y2 - c) > 0:
+        return False
+    # x where the segment meets y = c is n / d, compared without dividing
+    d = y2 - y1
+    n = x1 * d + (c - y1) * (x2 - x1)
+    if d < 0:
+        n, d = -n, -d
+    return lo * d <= n <= hi * d
+
+
+def _crosses_many(x1, y1, x2, y2, segments):
+    """_crosses of (N, 1) starts and ends against many segments, any-reduced over the segments."""
+    if not len(segments):
+        return np.zeros(len(x2), dtype=bool)
+    c, lo, hi = segments[:, 0], segments[:, 1], segments[:, 2]
+    flat = y2 == y1
+    along = flat & (y1 == c) & (np.minimum(x1, x2) <= hi) & (np.maximum(x1, x2) >= lo)
+    d = y2 - y1
+    n = x1 * d + (c - y1) * (x2 - x1)
+    sign = np.where(d < 0, -1, 1)
+    n, d = n * sign, d * sign
+    across = ~flat & ((y1 - c) * (y2 - c) <= 0) & (lo * d <= n) & (n <= hi * d)
+    return (along | across).any(axis=1)
@@ -0,0 +1,31 @@
+"""Queries and planners shared by the test modules."""
+import json
+import os
+
+from llmastar.pather.a_star.a_star import AStar
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'environment_50_30.json')
+
+# first map of the dataset
+QUERY = {"start": [5, 5], "goal": [20, 20], "range_x": [0, 51], "range_y": [0, 31],
+         "horizontal_barriers": [[10, 0, 25], [15, 30, 50]], "vertical_barriers": [[25, 10, 22]]}
+# the same map with a box of barriers around the start
+ENCLOSED = dict(QUERY, horizontal_barriers=QUERY['horizontal_barriers'] + [[3, 3, 7], [7, 3, 7]],
+                vertical_barriers=QUERY['vertical_barriers'] + [[3, 3, 7], [7, 3, 7]])
+
+
+def dataset_queries(environments=3, per_environment=3):
+    """First start/goal pairs of the first maps of the dataset, as searching() queries."""
+    with open(DATASET) as f:
+        for environment in json.load(f)[:environments]:
+            for sg in environment['start_goal'][:per_environment]:
+                yield {"start": sg[0], "goal": sg[1], "range_x": environment['range_x'],
+                       "range_y": environment['range_y'],
+                       "horizontal_barriers": environment['horizontal_barriers'],
+                       "vertical_barriers": environment['vertical_barriers']}
+
+
+class EuclideanAStar(AStar):
+    """A* with the admissible Euclidean heuristic, whose paths have the optimal length."""
+    def heuristic(self, s):
+        return self._euclidean_distance(s, self.s_goal)
@@ -0,0 +1,241 @@
+import math
+import unittest
+import warnings
+
+from llmastar.env.search import cache
+from llmastar.pather.a_star.a_star import AStar
+from llmastar.pather.a_star.landmarks import get_landmarks
+from llmastar.pather.heuristics import WaypointHeuristic, octile
+from llmastar.pather.llm_a_star import LLMAStar
+from tests.conftest import ENCLOSED, QUERY, EuclideanAStar, dataset_queries
+
+
+def search(query, planner=AStar, **options):
+    return planner().searching(query, filepath=None, **options)
+
+
+class TestDatasetMaps(unittest.TestCase):
+    """The search modes against plain A* on dataset maps."""
+
+    def assertOptimal(self, planner=AStar, **options):
+        for query in dataset_queries():
+            expected = search(query, EuclideanAStar)
+            result = search(query, planner, **options)
+            self.assertAlmostEqual(result['length'], expected['length'], msg=options)
+
+    def test_precompute_motions(self):
+        for query in dataset_queries():
+            # maps compiled afresh: the default search checks reachability without the motion tables
+            cache.environment_cache.clear()
+            planner = AStar()
+            result = planner.searching(query, filepath=None)
+            self.assertIsNone(planner.grid.motion_mask)
+            self.assertIsNotNone(planner.grid.components)
+            self.assertEqual(planner.searching(query, filepath=None, precompute_motions=True), result)
+            self.assertIsNotNone(planner.grid.motion_mask)
+
+    def test_array_state(self):
+        # one planner, so that later searches reuse the state of the first
+        planner = AStar()
+        for query in dataset_queries():
+            result = planner.searching(query, filepath=None, use_array_state=True)
+            self.assertEqual(result, search(query))
+
+    def test_bidirectional(self):
+        self.assertOptimal(use_bidirectional=True)
+        result = search(next(dataset_queries()), use_bidirectional=True)
+        self.assertGreater(result['operation'], 0)
+        self.assertGreater(result['storage'], 0)
+
+    def test_jps(self):
+        self.assertOptimal(EuclideanAStar, use_jps=True)
+        for query in dataset_queries():
+            jps = search(query, EuclideanAStar, use_jps=True)
+            self.assertLess(jps['operation'], search(query, EuclideanAStar)['operation'])
+
+    def test_batch_matches_single_queries(self):
+        queries = list(dataset_queries(environments=1))
+        results = AStar().searching_batch(queries[0], [[q['start'], q['goal']] for q in queries])
+        self.assertEqual(results, [search(query) for query in queries])
+
+    def test_weight_bounds_the_length(self):
+        for query in dataset_queries():
+            optimum = search(query, EuclideanAStar)['length']
+            result = search(query, weight=2.0)
+            self.assertTrue(1 <= result['bound'] <= 2.0)
+            self.assertLessEqual(result['length'], result['bound'] * optimum + 1e-9)
+
+    def test_inadmissible_heuristic_gives_no_bound(self):
+        calls = []
+
+        def counting(s, goal):
+            calls.append(s)
+            return octile(s, goal)
+        for options in ({'weight': 1.0}, {'weight': 2.0}, {'anytime': True}):
+            for heuristic in ('manhattan', counting):
+                result = search(QUERY, heuristic=heuristic, **options)
+                self.assertEqual(result['status'], 'found')
+                self.assertIsNone(result['bound'], msg=(options, heuristic))
+                result = LLMAStar(llm=None).searching(QUERY, filepath=None, heuristic=heuristic, **options)
+                self.assertIsNone(result['bound'], msg=(options, heuristic))
+            self.assertIsNotNone(search(QUERY, **options)['bound'])
+            # the weighted and anytime searches of AStar are keyed by the selected heuristic too
+            calls.clear()
+            search(QUERY, heuristic=counting, **options)
+            self.assertTrue(calls, msg=options)
+
+    def test_anytime_reaches_the_optimum(self):
+        self.assertOptimal(anytime=True)
+        self.assertEqual(search(next(dataset_queries()), anytime=True)['bound'], 1)
+
+
+class TestBudgets(unittest.TestCase):
+    MODES = ({}, {'use_array_state': True}, {'use_jps': True}, {'use_bidirectional': True}, {'weight': 2.0})
+
+    def test_unreachable_goal(self):
+        for options in self.MODES:
+            result = search(ENCLOSED, **options)
+            self.assertEqual(result['status'], 'unreachable', msg=options)
+            self.assertEqual(result['path'][0], (5, 5), msg=options)
+            self.assertIsNone(result['bound'], msg=options)
+
+    def test_goal_off_the_map(self):
+        query = dict(QUERY, goal=[60, 10])
+        expected = search(query)
+        self.assertEqual(expected['status'], 'unreachable')
+        self.assertEqual(search(query, use_array_state=True), expected)
+
+    def test_expansion_budget_gives_a_partial_path(self):
+        for options in self.MODES:
+            result = search(QUERY, max_expansions=5, **options)
+            self.assertEqual(result['status'], 'budget_exceeded', msg=options)
+            self.assertLessEqual(result['operation'], 5, msg=options)
+            path = result['path']
+            self.assertEqual(path[0], (5, 5), msg=options)
+            self.assertLess(math.dist(path[-1], QUERY['goal']), math.dist(path[0], QUERY['goal']), msg=options)
+
+    def test_time_budget(self):
+        result = search(QUERY, max_seconds=0)
+        self.assertEqual(result['status'], 'budget_exceeded')
+        self.assertEqual(result['path'], [(5, 5)])
+
+    def test_found_within_the_budget(self):
+        result = search(QUERY, max_expansions=10000, max_seconds=10)
+        self.assertEqual(result['status'], 'found')
+        self.assertEqual(result, search(QUERY))
+        self.assertEqual(result['path'][-1], (20, 20))
+
+
+class TestReachability(unittest.TestCase):
+
+    def test_components_agree_with_the_search(self):
+        for query in list(dataset_queries(environments=10)) + [ENCLOSED]:
+            grid = cache.compile_environment(query).grid(components=True)
+            reachable = search(query)['status'] == 'found'
+            self.assertEqual(grid.connected(tuple(query['start']), tuple(query['goal'])), reachable)
+
+    def test_nearest_passable_cells(self):
+        grid = cache.compile_environment(ENCLOSED).grid(nearest=True)
+        free = [(x, y) for x in range(grid.x_range) for y in range(grid.y_range) if grid.passable[x, y]]
+        for s in [(10, 10), (3, 5), (0, 0), (25, 15), (50, 30)]:
+            nearest = grid.nearest_passable(s)
+            self.assertTrue(grid.passable[nearest])
+            self.assertEqual(math.dist(s, nearest), min(math.dist(s, f) for f in free), msg=s)
+        self.assertEqual(grid.nearest_passable((60, -4)), grid.nearest_passable((50, 0)))
+
+    def test_component_labels(self):
+        grid = cache.compile_environment(ENCLOSED).grid(components=True)
+        self.assertNotEqual(grid.component((5, 5)), grid.component((20, 20)))
+        self.assertEqual(grid.component((5, 5)), grid.component((6, 4)))
+        self.assertEqual(grid.component((3, 5)), -1)
+        self.assertEqual(grid.component((60, 5)), -1)
+
+    def test_unreachable_goal_is_rejected_before_searching(self):
+        for options in TestBudgets.MODES:
+            result = search(ENCLOSED, precompute_motions=True, **options)
+            self.assertEqual(result['status'], 'unreachable', msg=options)
+            self.assertEqual(result['path'], [(5, 5)], msg=options)
+            self.assertEqual(result['operation'], 0, msg=options)
+
+    def test_goal_on_a_barrier_with_default_arguments(self):
+        result = search(dict(QUERY, goal=[12, 10]))
+        self.assertEqual(result['status'], 'unreachable')
+        self.assertEqual(result['path'], [(5, 5)])
+        self.assertEqual(result['operation'], 0)
+
+
+class TestHeuristics(unittest.TestCase):
+
+    def test_admissible_heuristics_are_optimal(self):
+        for query in dataset_queries():
+            expected = search(query, EuclideanAStar)['length']
+            for heuristic in ('octile', 'euclidean'):
+                result = search(query, heuristic=heuristic)
+                self.assertAlmostEqual(result['length'], expected, msg=heuristic)
+                self.assertEqual(result['bound'], 1.0)
+            self.assertLessEqual(search(query)['operation'], search(query, heuristic='euclidean')['operation'])
+
+    def test_inadmissible_heuristics_give_no_bound(self):
+        query = next(dataset_queries())
+        self.assertIsNone(search(query, heuristic='manhattan')['bound'])
+        self.assertIsNone(search(query, heuristic=lambda s, goal: 2 * octile(s, goal))['bound'])
+
+    def test_unknown_name(self):
+        with self.assertRaises(ValueError):
+            search(next(dataset_queries()), heuristic='chebyshev')
+
+    def test_waypoints_are_followed(self):
+        heuristic = WaypointHeuristic([[40, 25]])
+        for options in ({}, {'use_array_state': True}, {'use_jps': True}):
+            result = search(QUERY, heuristic=heuristic, **options)
+            self.assertIsNone(heuristic.target, msg=options)
+            self.assertIsNone(result['bound'])
+            # the waypoint steers the expansions, the path itself need not pass through it
+            self.assertGreater(result['operation'], search(QUERY, **options)['operation'])
+
+    def test_waypoint_chain(self):
+        heuristic = WaypointHeuristic([[3, 4], [3, 10]])
+        self.assertEqual(heuristic((0, 0), (6, 14)), 5 + 6 + 5)
+        self.assertTrue(heuristic.reached((3, 4)))
+        self.assertEqual(heuristic((0, 0), (6, 14)), math.hypot(3, 10) + 5)
+        self.assertTrue(heuristic.reached((3, 10)))
+        self.assertEqual(heuristic((0, 0), (6, 14)), math.hypot(6, 14))
+        self.assertFalse(heuristic.admissible)
+        self.assertTrue(WaypointHeuristic([]).admissible)
+
+
+class TestLandmarks(unittest.TestCase):
+
+    def test_optimal_with_fewer_expansions(self):
+        for query in dataset_queries():
+            octile = search(query)
+            for options in ({}, {'use_array_state': True}, {'use_jps': True}):
+                alt = search(query, landmarks=4, **options)
+                self.assertAlmostEqual(alt['length'], octile['length'])
+                self.assertEqual(alt['bound'], 1.0)
+            self.assertLessEqual(search(query, landmarks=4)['operation'], octile['operation'])
+
+    def test_unreachable_landmarks(self):
+        # start and goal inside the box of ENCLOSED, which the landmarks outside it never reach
+        query = dict(ENCLOSED, start=[4, 4], goal=[6, 6])
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            result = search(query, landmarks=3)
+        self.assertAlmostEqual(result['length'], search(query)['length'])
+        self.assertEqual(result['bound'], 1.0)
+
+    def test_tables_are_cached_per_map(self):
+        query = next(dataset_queries())
+        search(query, landmarks=3)
+        landmarks = get_landmarks(cache.compile_environment(query), 3)
+        self.assertEqual(len(landmarks.landmarks), 3)
+        search(query, landmarks=3)
+        self.assertIs(get_landmarks(cache.compile_environment(query), 3), landmarks)
+
+    def test_need_an_admissible_heuristic(self):
+        with self.assertRaises(ValueError):
+            search(next(dataset_queries()), landmarks=2, heuristic='manhattan')
+
+
+if __name__ == '__main__':
+    unittest.main()
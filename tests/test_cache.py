@@ -0,0 +1,113 @@
+import copy
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from llmastar.env.search.cache import LRUCache, EnvironmentCache
+from llmastar.model.cache import ResponseCache
+from llmastar.model.chatgpt import ChatGPT
+from llmastar.pather.a_star.a_star import AStar
+from tests.conftest import dataset_queries
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.put('c', 3)
+        self.assertNotIn('b', lru)
+        self.assertEqual([lru.get('a'), lru.get('c')], [1, 3])
+        self.assertEqual(len(lru), 2)
+
+    def test_builds_on_miss_only(self):
+        lru = LRUCache(maxsize=4)
+        built = []
+        for _ in range(3):
+            lru.get('a', lambda: built.append(1) or 'value')
+        self.assertEqual(built, [1])
+        self.assertEqual((lru.hits, lru.misses), (2, 1))
+
+    def test_max_bytes_keeps_newest(self):
+        lru = LRUCache(max_bytes=10, size=len)
+        lru.put('a', 'x' * 6)
+        lru.put('b', 'x' * 6)
+        self.assertEqual(list(lru._entries), ['b'])
+        self.assertEqual(lru.nbytes, 6)
+        lru.put('c', 'x' * 20)
+        self.assertEqual(list(lru._entries), ['c'])
+        self.assertEqual(lru.nbytes, 20)
+
+
+class TestEnvironmentCache(unittest.TestCase):
+
+    def test_shares_compiled_maps(self):
+        environments = EnvironmentCache(maxsize=1)
+        query = {"range_x": [0, 10], "range_y": [0, 10], "horizontal_barriers": [[5, 0, 4]],
+                 "vertical_barriers": []}
+        first = environments.get(query)
+        self.assertIs(environments.get(dict(query)), first)
+        environments.get(dict(query, vertical_barriers=[[3, 6, 9]]))
+        self.assertIsNot(environments.get(query), first)
+        self.assertEqual((environments.hits, environments.misses), (1, 3))
+
+    def test_query_is_left_untouched(self):
+        query = next(dataset_queries())
+        original = copy.deepcopy(query)
+        first = AStar().searching(query, filepath=None)
+        self.assertEqual(query, original)
+        self.assertEqual(AStar().searching(query, filepath=None), first)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'responses.sqlite')
+
+    def test_persists_across_instances(self):
+        calls = []
+        ask = lambda: calls.append(1) or '[[1, 2]]'
+        first = ResponseCache(self.path)
+        self.assertEqual(first.get('gpt', 'standard', 'prompt', ask, max_tokens=10), '[[1, 2]]')
+        # another run, or another process, opening the same file
+        second = ResponseCache(self.path)
+        self.assertEqual(second.get('gpt', 'standard', 'prompt', ask, max_tokens=10), '[[1, 2]]')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((second.hits, second.misses), (1, 0))
+
+    def test_keys(self):
+        responses = ResponseCache(self.path)
+        responses.put('gpt', 'standard', 'prompt', 'a', max_tokens=10)
+        self.assertEqual(responses.get('gpt', 'standard', 'prompt', max_tokens=10), 'a')
+        self.assertIsNone(responses.get('llama', 'standard', 'prompt', max_tokens=10))
+        self.assertIsNone(responses.get('gpt', 'cot', 'prompt', max_tokens=10))
+        self.assertIsNone(responses.get('gpt', 'standard', 'prompt', max_tokens=20))
+
+    def test_evicts_least_recently_used(self):
+        responses = ResponseCache(self.path, max_bytes=20)
+        responses.put('gpt', None, 'a', 'x' * 10)
+        responses.put('gpt', None, 'b', 'x' * 10)
+        responses.get('gpt', None, 'a')
+        responses.put('gpt', None, 'c', 'x' * 10)
+        self.assertIsNone(responses.get('gpt', None, 'b'))
+        self.assertEqual(len(responses), 2)
+
+    def test_chat_without_cache(self):
+        answer = {'choices': [{'message': {'content': '[[1, 2]]'}}]}
+        with mock.patch('openai.ChatCompletion.create', return_value=answer) as create:
+            model = ChatGPT(cache=False)
+            self.assertEqual([model.chat('query'), model.chat('query')], ['[[1, 2]]'] * 2)
+        self.assertEqual(create.call_count, 2)
+        cached = ChatGPT(cache=ResponseCache(self.path))
+        with mock.patch('openai.ChatCompletion.create', return_value=answer) as create:
+            self.assertEqual([cached.chat('query'), cached.chat('query')], ['[[1, 2]]'] * 2)
+        self.assertEqual(create.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import random
+import unittest
+
+import numpy as np
+
+from llmastar.env.search import cache
+from llmastar.env.search.compiled import CompiledMap
+from llmastar.utils import SegmentCollider, is_lines_collision
+from tests.conftest import ENCLOSED, dataset_queries
+
+
+class TestCompiledMap(unittest.TestCase):
+
+    def test_occupancy_matches_the_obstacles(self):
+        for query in list(dataset_queries(environments=5)) + [ENCLOSED]:
+            Env = cache.compile_environment(query).Env
+            grid = Env.compile()
+            cells = {(x, y) for x in range(grid.x_range) for y in range(grid.y_range)}
+            self.assertEqual({s for s in cells if grid.occupancy[s]}, Env.obs & cells)
+            for s in cells:
+                self.assertEqual(grid.is_free(s), s not in Env.obs, msg=s)
+
+    def test_border(self):
+        grid = cache.compile_environment(ENCLOSED).grid()
+        for x in range(grid.x_range):
+            self.assertFalse(grid.is_free((x, 0)))
+            self.assertFalse(grid.is_free((x, grid.y_range - 1)))
+        for y in range(grid.y_range):
+            self.assertFalse(grid.is_free((0, y)))
+            self.assertFalse(grid.is_free((grid.x_range - 1, y)))
+        for s in [(-1, 5), (5, -1), (grid.x_range, 5), (5, grid.y_range)]:
+            self.assertFalse(grid.is_free(s))
+
+    def test_passable_matches_the_collider(self):
+        for query in list(dataset_queries(environments=5)) + [ENCLOSED]:
+            grid = CompiledMap(cache.compile_environment(query).Env).compile_passable()
+            cells = np.stack(np.meshgrid(np.arange(grid.x_range), np.arange(grid.y_range), indexing='ij'),
+                             axis=-1).reshape(-1, 2)
+            touching = grid._collider().collisions(cells, cells).reshape(grid.x_range, grid.y_range)
+            np.testing.assert_array_equal(grid.passable, ~grid.occupancy & ~touching)
+            self.assertIsNone(grid.motion_mask)
+
+    def test_components_without_the_motion_tables(self):
+        for query in list(dataset_queries(environments=5)) + [ENCLOSED]:
+            Env = cache.compile_environment(query).Env
+            grid = CompiledMap(Env)
+            self.assertTrue(grid.grid_aligned())
+            grid.compile_components()
+            self.assertIsNone(grid.motion_mask)
+            tables = CompiledMap(Env).compile_motions().compile_components()
+            np.testing.assert_array_equal(grid.components, tables.components)
+
+
+def shapely_collision(segment, horizontal_barriers, vertical_barriers, range_x, range_y):
+    """The shapely test SegmentCollider replaces."""
+    lines = [[[h[1], h[0]], [h[2], h[0]]] for h in horizontal_barriers]
+    lines += [[[v[0], v[1]], [v[0], v[2]]] for v in vertical_barriers]
+    lines += [[[x, range_y[0]], [x, range_y[1]]] for x in range_x]
+    lines += [[[range_x[0], y], [range_x[1], y]] for y in range_y]
+    return any(is_lines_collision(segment, line) for line in lines)
+
+
+class TestSegmentCollider(unittest.TestCase):
+    HORIZONTAL = [[10, 5, 25], [15, 30, 45], [20, 12, 12]]
+    VERTICAL = [[25, 10, 22], [8, 2, 7]]
+    RANGE_X, RANGE_Y = [0, 50], [0, 30]
+
+    def assertAgrees(self, segments):
+        collider = SegmentCollider(self.HORIZONTAL, self.VERTICAL, self.RANGE_X, self.RANGE_Y)
+        ends = [end for _, end in segments]
+        for (start, end), hit in zip(segments, collider.collisions([start for start, _ in segments], ends)):
+            expected = shapely_collision([start, end], self.HORIZONTAL, self.VERTICAL, self.RANGE_X, self.RANGE_Y)
+            self.assertEqual(collider.is_collision(start, end), expected, msg=(start, end))
+            self.assertEqual(bool(hit), expected, msg=(start, end))
+
+    def test_random_segments(self):
+        rng = random.Random(0)
+        point = lambda: (rng.randint(-2, 52), rng.randint(-2, 32))
+        self.assertAgrees([(point(), point()) for _ in range(2000)])
+
+    def test_touching_and_along_barriers(self):
+        self.assertAgrees([
+            ((3, 8), (5, 10)), ((5, 10), (6, 12)), ((25, 9), (25, 10)), ((26, 22), (25, 22)),
+            ((4, 10), (3, 10)), ((24, 23), (25, 23)), ((1, 1), (1, 2)), ((1, 1), (0, 1)),
+            # along a barrier, on it or past its end
+            ((0, 10), (30, 10)), ((6, 10), (20, 10)), ((26, 10), (29, 10)), ((25, 0), (25, 9)),
+            ((25, 23), (25, 29)), ((10, 29), (10, 30)), ((11, 20), (13, 20)), ((12, 19), (12, 21)),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
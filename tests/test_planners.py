@@ -0,0 +1,350 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from llmastar.model import MicroBatcher, StandIn
+from llmastar.model.my_mistral import MyMistral
+from llmastar.pather.any_angle import AnyAngle
+from llmastar.pather.d_star_lite import DStarLite
+from llmastar.pather.distance_field import DistanceField
+from llmastar.pather.hpa_star import HPAStar
+from llmastar.pather.llm_a_star import LLMAStar, LLMPipeline
+from tests.conftest import ENCLOSED, QUERY, EuclideanAStar, dataset_queries
+
+
+class TestDistanceField(unittest.TestCase):
+
+    def test_matches_a_star_from_the_cache(self):
+        planner = DistanceField()
+        for start in ([5, 5], [45, 25], [30, 3]):
+            query = dict(QUERY, start=start)
+            result = planner.searching(query, filepath=None)
+            self.assertEqual(result['status'], 'found')
+            self.assertEqual((result['path'][0], result['path'][-1]), (tuple(start), (20, 20)))
+            self.assertAlmostEqual(result['length'], EuclideanAStar().searching(query, filepath=None)['length'])
+            self.assertEqual(result['cached'], start != [5, 5])
+
+    def test_unreachable(self):
+        result = DistanceField().searching(ENCLOSED, filepath=None)
+        self.assertEqual(result['status'], 'unreachable')
+        self.assertEqual(result['path'], [(5, 5)])
+        self.assertEqual(result['length'], 0)
+
+
+class TestDStarLite(unittest.TestCase):
+
+    def optimum(self, query):
+        return EuclideanAStar().searching(query, filepath=None)['length']
+
+    def test_repair_matches_a_fresh_search(self):
+        planner = DStarLite()
+        result = planner.searching(QUERY, filepath=None)
+        self.assertEqual(result['status'], 'found')
+        self.assertAlmostEqual(result['length'], self.optimum(QUERY))
+        wall = dict(QUERY, start=[6, 5], horizontal_barriers=QUERY['horizontal_barriers'] + [[15, 5, 24]])
+        result = planner.update_barriers(wall['horizontal_barriers'], wall['vertical_barriers'], start=(6, 5),
+                                         filepath=None)
+        self.assertEqual(result['path'][0], (6, 5))
+        self.assertAlmostEqual(result['length'], self.optimum(wall))
+
+    def test_unreachable_until_the_box_opens(self):
+        planner = DStarLite()
+        result = planner.searching(ENCLOSED, filepath=None)
+        self.assertEqual(result['status'], 'unreachable')
+        self.assertEqual(result['path'], [(5, 5)])
+        result = planner.update_barriers(QUERY['horizontal_barriers'], QUERY['vertical_barriers'], filepath=None)
+        self.assertEqual(result['status'], 'found')
+        self.assertAlmostEqual(result['length'], self.optimum(QUERY))
+
+
+class TestHPAStar(unittest.TestCase):
+
+    def test_near_optimal_legal_paths(self):
+        planner = HPAStar(cluster_size=5)
+        for query in dataset_queries():
+            result = planner.searching(query, filepath=None)
+            path = result['path']
+            self.assertEqual(result['status'], 'found')
+            self.assertEqual((path[0], path[-1]), (tuple(query['start']), tuple(query['goal'])))
+            for s, s_n in zip(path, path[1:]):
+                self.assertLess(planner.graph.grid.move_cost(s, s_n), float('inf'))
+            optimum = EuclideanAStar().searching(query, filepath=None)['length']
+            self.assertGreaterEqual(result['length'], optimum - 1e-9)
+            self.assertLessEqual(result['length'], 1.2 * optimum)
+
+    def test_abstraction_is_cached(self):
+        planner = HPAStar()
+        self.assertFalse(planner.searching(QUERY, filepath=None)['cached'])
+        graph = planner.graph
+        result = planner.searching(dict(QUERY, start=[45, 25]), filepath=None)
+        self.assertTrue(result['cached'])
+        self.assertIs(planner.graph, graph)
+
+    def test_unreachable(self):
+        result = HPAStar().searching(ENCLOSED, filepath=None)
+        self.assertEqual(result['status'], 'unreachable')
+        self.assertEqual(result['path'], [(5, 5)])
+
+
+class TestAnyAngle(unittest.TestCase):
+
+    def assertLegal(self, planner, query, result):
+        path = result['path']
+        self.assertEqual(result['status'], 'found')
+        self.assertEqual((path[0], path[-1]), (tuple(query['start']), tuple(query['goal'])))
+        for s, s_n in zip(path, path[1:]):
+            self.assertTrue(planner.line_of_sight(s, s_n))
+        # any-angle paths are never longer than the optimal grid path
+        self.assertLessEqual(result['length'], EuclideanAStar().searching(query, filepath=None)['length'] + 1e-9)
+
+    def test_visibility_graph(self):
+        planner = AnyAngle()
+        for i, query in enumerate(dataset_queries(per_environment=3)):
+            result = planner.searching(query, filepath=None)
+            self.assertLegal(planner, query, result)
+            self.assertEqual(result['cached'], i % 3 != 0)
+
+    def test_theta_star(self):
+        planner = AnyAngle()
+        for query in dataset_queries():
+            self.assertLegal(planner, query, planner.searching(query, filepath=None, use_theta_star=True))
+
+    def test_unreachable(self):
+        for use_theta_star in (False, True):
+            result = AnyAngle().searching(ENCLOSED, filepath=None, use_theta_star=use_theta_star)
+            self.assertEqual(result['status'], 'unreachable')
+            self.assertEqual(result['path'], [(5, 5)])
+
+
+class CountingStandIn(StandIn):
+    """StandIn that also counts the requests cancelled while waiting for the answer."""
+    cancelled = 0
+
+    async def _complete_async(self, prompt, **params):
+        try:
+            return await super()._complete_async(prompt, **params)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+class TestStandIn(unittest.TestCase):
+
+    def test_waypoints_go_around_the_barriers(self):
+        planner = LLMAStar(llm='standin')
+        self.assertEqual(planner.model.answer(planner.llm_prompt(QUERY)),
+                         "Generated Path: [[5, 5], [26, 9], [26, 23], [20, 20]]")
+        result = planner.searching(QUERY, filepath=None)
+        self.assertEqual(result['llm_output'], [(5, 5), (26, 9), (26, 23), (20, 20)])
+        self.assertEqual(result['status'], 'found')
+
+    def test_weighted_search_does_not_ask(self):
+        model = StandIn()
+        planner = LLMAStar(llm=model)
+        for options in ({'weight': 2.0}, {'anytime': True}):
+            result = planner.searching(QUERY, filepath=None, **options)
+            self.assertEqual(result['status'], 'found', msg=options)
+            self.assertEqual(result['llm_output'], [(5, 5), (20, 20)], msg=options)
+        self.assertEqual(model.usage()['calls'], 0)
+
+    def test_unreachable_goal_does_not_ask(self):
+        model = StandIn()
+        result = LLMAStar(llm=model).searching(dict(QUERY, goal=[12, 10]), filepath=None)
+        self.assertEqual(result['status'], 'unreachable')
+        self.assertEqual(result['operation'], 0)
+        self.assertEqual(model.usage()['calls'], 0)
+
+    def test_usage(self):
+        model = StandIn(latency=0.01)
+        prompt = LLMAStar(llm=model).llm_prompt(QUERY)
+        model.ask(prompt)
+        model.ask_batch([prompt] * 3)
+        asyncio.run(model.ask_async(prompt))
+        usage = model.usage()
+        self.assertEqual((usage['calls'], usage['prompts']), (3, 5))
+        self.assertEqual(usage['prompt_tokens'], 5 * model.count_tokens(prompt))
+        self.assertGreater(usage['completion_tokens'], 0)
+        # the batch pays the latency once
+        self.assertGreaterEqual(usage['seconds'], 0.03)
+        self.assertLess(usage['seconds'], 0.05)
+        model.reset_usage()
+        self.assertEqual(model.usage()['calls'], 0)
+
+
+class TestMyMistral(unittest.TestCase):
+
+    def test_response_leaves_out_the_prompt(self):
+        model = MyMistral.tiny()
+        prompt = "Start Point: [5, 5]\nGoal Point: [20, 20]"
+        response = model.ask(prompt, max_new_tokens=5)
+        self.assertNotIn(prompt, response)
+        self.assertEqual(model.usage()['prompt_tokens'], model.count_tokens(prompt))
+        self.assertGreater(model.usage()['completion_tokens'], 0)
+        self.assertLessEqual(model.usage()['completion_tokens'], 5)
+
+    def test_batch_leaves_out_the_prompts(self):
+        model = MyMistral.tiny()
+        prompts = ["Start Point: [5, 5]", "Goal Point: [20, 20]\nHorizontal Barriers: [[10, 0, 25]]"]
+        responses = model.ask_batch(prompts, max_new_tokens=5)
+        for prompt, response in zip(prompts, responses):
+            self.assertNotIn(prompt, response)
+        self.assertLessEqual(model.usage()['completion_tokens'], 5 * len(prompts))
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_prompts_share_a_batch(self):
+        model = StandIn(latency=0.05)
+        batcher = MicroBatcher(model, max_batch=8, max_wait=0.05)
+        planner = LLMAStar(llm=batcher)
+        prompts = [planner.llm_prompt(query) for query in dataset_queries(environments=3, per_environment=3)]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(len(prompts)) as pool:
+            responses = list(pool.map(batcher.ask, prompts))
+        self.assertLess(time.perf_counter() - t0, len(prompts) * 0.05 / 2)
+        self.assertEqual(responses, [model.answer(prompt) for prompt in prompts])
+        # nine prompts, at most eight in a batch
+        self.assertEqual(model.usage()['calls'], 2)
+        self.assertEqual(batcher.usage()['calls'], len(prompts))
+
+    def test_pipeline_through_the_batcher(self):
+        queries = list(dataset_queries(environments=4))
+        model = StandIn(latency=0.05)
+        planner = LLMAStar(llm=MicroBatcher(model, max_batch=4))
+        results = LLMPipeline(planner, max_in_flight=4).evaluate(queries, precompute_motions=True)
+        self.assertEqual(model.usage()['prompts'], len(queries))
+        self.assertLessEqual(model.usage()['calls'], len(queries) // 2)
+        serial = LLMAStar(llm=StandIn())
+        self.assertEqual(results, [serial.searching(query, filepath=None, precompute_motions=True)
+                                   for query in queries])
+
+    def test_tiny_model_pads_the_batch(self):
+        model = MyMistral.tiny()
+        prompts = ["Start Point: [5, 5]", "Goal Point: [20, 20]\nHorizontal Barriers: [[10, 0, 25]]", "[[1, 2]]"]
+        # the batch is full once every prompt arrived, max_wait only bounds a stalled test
+        batcher = MicroBatcher(model, max_batch=len(prompts), max_wait=10, min_new_tokens=0)
+        with ThreadPoolExecutor(len(prompts)) as pool:
+            responses = list(pool.map(lambda prompt: batcher.ask(prompt, max_new_tokens=4), prompts))
+        self.assertEqual(responses, [model._generate(prompt, 4) for prompt in prompts])
+        for prompt, response in zip(prompts, responses):
+            self.assertNotIn(prompt, response)
+        self.assertEqual(model.usage()['calls'], 1)
+        self.assertLessEqual(model.usage()['completion_tokens'], 4 * len(prompts))
+
+    def test_short_generations_are_not_batched(self):
+        model = MyMistral.tiny()
+        prompts = ["Start Point: [5, 5]", "Goal Point: [20, 20]", "[[1, 2]]"]
+        batcher = MicroBatcher(model, max_batch=len(prompts), max_wait=10, min_new_tokens=8)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(len(prompts)) as pool:
+            responses = list(pool.map(lambda prompt: batcher.ask(prompt, max_new_tokens=4), prompts))
+        self.assertLess(time.perf_counter() - t0, 10)
+        self.assertEqual(responses, [model._generate(prompt, 4) for prompt in prompts])
+        self.assertEqual(model.usage()['calls'], len(prompts))
+
+
+class TestLLMPipeline(unittest.TestCase):
+
+    def test_matches_serial_searches(self):
+        queries = list(dataset_queries(environments=4))
+        planner = LLMAStar(llm=StandIn(latency=0.05))
+        pipeline = LLMPipeline(planner, max_in_flight=4, workers=2)
+        t0 = time.perf_counter()
+        results = pipeline.evaluate(queries, precompute_motions=True)
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(planner.model.calls, len(queries))
+        self.assertEqual(pipeline.peak_in_flight, 4)
+        # twelve answers of 50 ms, four at a time
+        self.assertLess(elapsed, len(queries) * 0.05 / 2)
+        serial = LLMAStar(llm=None)
+        for query, result in zip(queries, results):
+            response = planner.model.answer(planner.llm_prompt(query))
+            self.assertEqual(result, serial.searching(query, filepath=None, precompute_motions=True,
+                                                      llm_response=response))
+            self.assertEqual(result['status'], 'found')
+
+
+class TestSpeculative(unittest.TestCase):
+
+    def planner(self, latency):
+        return LLMAStar(llm=CountingStandIn(latency))
+
+    def test_cancels_a_slow_model(self):
+        planner = self.planner(latency=10)
+        t0 = time.perf_counter()
+        result = planner.searching(QUERY, filepath=None, precompute_motions=True, speculative=True)
+        self.assertLess(time.perf_counter() - t0, 1)
+        self.assertTrue(result['llm_cancelled'])
+        self.assertEqual(result['status'], 'found')
+        self.assertEqual(result['bound'], 1.0)
+        for _ in range(100):
+            if planner.model.cancelled:
+                break
+            time.sleep(0.01)
+        self.assertEqual(planner.model.cancelled, 1)
+
+    def test_adopts_waypoints_that_arrive(self):
+        planner = self.planner(latency=0)
+        planner.model.answer = lambda prompt: "Generated Path: [[5, 5], [40, 25], [20, 20]]"
+        # expansions of a millisecond, so that the answer arrives early and steers the rest of the search
+        expand = planner._expand
+        planner._expand = lambda s: time.sleep(0.001) or expand(s)
+        result = planner.searching(QUERY, filepath=None, precompute_motions=True, speculative=True)
+        self.assertFalse(result['llm_cancelled'])
+        self.assertEqual(result['llm_output'], [(5, 5), (40, 25), (20, 20)])
+        self.assertEqual(result['status'], 'found')
+        self.assertIsNone(result['bound'])
+        plain = self.planner(latency=0).searching(QUERY, filepath=None, precompute_motions=True,
+                                                 llm_response="[[5, 5], [20, 20]]")
+        self.assertGreater(result['operation'], plain['operation'])
+
+
+class TestWaypointRepair(unittest.TestCase):
+
+    def search(self, query, response, **options):
+        return LLMAStar(llm=None).searching(query, filepath=None, llm_response=response, **options)
+
+    def test_snaps_waypoints_on_barriers(self):
+        result = self.search(QUERY, "[[5, 5], [12, 10], [20, 20]]")
+        self.assertEqual(result['llm_repaired'], 1)
+        self.assertEqual(result['llm_dropped'], 0)
+        self.assertEqual(len(result['llm_output']), 3)
+        x, y = result['llm_output'][1]
+        self.assertEqual((x, abs(y - 10)), (12, 1))
+        self.assertEqual(result['status'], 'found')
+
+    def test_drops_unreachable_waypoints(self):
+        # the box of ENCLOSED with the start outside it
+        query = dict(ENCLOSED, start=[20, 5])
+        result = self.search(query, "[[20, 5], [5, 5], [4, 3], [60, 5], [30, 'x'], [20, 20]]")
+        # (5, 5) is in the box and (4, 3), on its wall, is closest to a cell in it; (60, 5) is clamped
+        # into the map and snapped next to the border
+        self.assertEqual(result['llm_output'], [(20, 5), (49, 5), (20, 20)])
+        self.assertEqual(result['llm_dropped'], 3)
+        self.assertEqual(result['llm_repaired'], 1)
+        self.assertEqual(result['status'], 'found')
+
+    def test_answer_without_a_list(self):
+        result = self.search(QUERY, "no waypoints")
+        self.assertEqual(result['llm_output'], [(5, 5), (20, 20)])
+        self.assertEqual((result['llm_repaired'], result['llm_dropped']), (0, 0))
+
+    def test_waypoint_chain_with_jump_points(self):
+        response = "[[5, 5], [12, 14], [18, 19], [20, 20]]"
+        for use_jps in (False, True):
+            planner = LLMAStar(llm=None)
+            result = planner.searching(QUERY, filepath=None, llm_response=response, use_jps=use_jps)
+            self.assertEqual(result['status'], 'found')
+            # every waypoint was reached in turn
+            self.assertEqual(planner._heuristic.i, 2, msg=use_jps)
+            self.assertIsNone(planner._heuristic.target, msg=use_jps)
+
+    def test_unparsable_answer(self):
+        result = self.search(QUERY, "[[5, 5], [12, oops]]")
+        self.assertEqual(result['llm_output'], [(5, 5), (20, 20)])
+        self.assertEqual(result['status'], 'found')
+
+
+if __name__ == '__main__':
+    unittest.main()